@@ -9,7 +9,10 @@ from decimal import Decimal
 from celery import shared_task
 from django.utils import timezone
 from django.db import transaction
-from django.db.models import Q, Avg, Sum, Count, F, Max, Min
+from django.db.models import (
+    Q, Avg, Sum, Count, F, Max, Min, Case, When, Value, DecimalField, ExpressionWrapper
+)
+from django.db.models.functions import Coalesce
 from django.core.mail import send_mail
 from django.conf import settings
 
@@ -617,11 +620,54 @@ def generate_inventory_status_report() -> Dict[str, Any]:
         }
 
 
+def _order_line_profit_queryset(cutoff_date: datetime):
+    """
+    Order lines of shipped and delivered orders since cutoff_date, with
+    cost, fees and profit annotated per line.
+    
+    Cost comes from the listing matched at ingest; fees follow
+    Marketplace.calculate_marketplace_fees (commission plus listing fee).
+    """
+    from marketplaces.models import MarketplaceOrder, MarketplaceOrderLine
+    
+    money = DecimalField(max_digits=14, decimal_places=2)
+    line_cost = ExpressionWrapper(
+        Coalesce(F('listing__cost'), Value(Decimal('0.00'))) * F('quantity'),
+        output_field=money
+    )
+    line_fees = ExpressionWrapper(
+        F('total_price') * F('marketplace__commission_percentage') / 100 + F('marketplace__listing_fee'),
+        output_field=money
+    )
+    
+    return MarketplaceOrderLine.objects.filter(
+        ordered_at__gte=cutoff_date,
+        order__status__in=MarketplaceOrder.REVENUE_STATUSES,
+        listing__isnull=False
+    ).annotate(
+        line_cost=line_cost,
+        line_fees=line_fees
+    ).annotate(
+        gross_profit=ExpressionWrapper(F('total_price') - F('line_cost'), output_field=money)
+    ).annotate(
+        net_profit=ExpressionWrapper(F('gross_profit') - F('line_fees'), output_field=money)
+    ).annotate(
+        profit_margin=Case(
+            When(total_price__gt=0, then=F('net_profit') * 100 / F('total_price')),
+            default=Value(Decimal('0')),
+            output_field=DecimalField(max_digits=14, decimal_places=4)
+        )
+    )
+
+
 @shared_task
 def calculate_profitability_metrics(days: int = 30) -> Dict[str, Any]:
     """
     Calculate profitability metrics across products and marketplaces.
     
+    Joins normalized order lines to their listings and marketplaces, so
+    the summary and top products are each a single aggregate query.
+    
     Args:
         days: Number of days to analyze
         
@@ -631,125 +677,53 @@ def calculate_profitability_metrics(days: int = 30) -> Dict[str, Any]:
     logger.info(f"Calculating profitability metrics for the last {days} days")
     
     try:
-        # Import here to avoid circular imports
-        from marketplaces.models import MarketplaceOrder, MarketplaceListing
-        from suppliers.models import SupplierProduct
-        
         cutoff_date = timezone.now() - timedelta(days=days)
-        
-        # Get orders in the period
-        orders_in_period = MarketplaceOrder.objects.filter(
-            ordered_at__gte=cutoff_date,
-            status__in=['shipped', 'delivered']
+        lines = _order_line_profit_queryset(cutoff_date)
+        
+        totals = lines.aggregate(
+            total_orders=Count('order', distinct=True),
+            total_items=Count('id'),
+            total_revenue=Sum('total_price'),
+            total_cost=Sum('line_cost'),
+            total_fees=Sum('line_fees'),
+            total_gross_profit=Sum('gross_profit'),
+            total_net_profit=Sum('net_profit'),
+            avg_profit_margin=Avg('profit_margin')
         )
         
-        profitability_data = []
-        
-        # Calculate profitability by marketplace
-        for order in orders_in_period:
-            for item in order.order_items:
-                try:
-                    # Find corresponding listing and supplier product
-                    listing = MarketplaceListing.objects.filter(
-                        marketplace=order.marketplace,
-                        marketplace_sku=item.get('sku')
-                    ).first()
-                    
-                    if not listing:
-                        continue
-                    
-                    # Calculate profit
-                    selling_price = Decimal(str(item.get('price', 0)))
-                    quantity = item.get('quantity', 1)
-                    total_selling_price = selling_price * quantity
-                    
-                    # Get cost from supplier
-                    cost_price = listing.cost or Decimal('0.00')
-                    total_cost = cost_price * quantity
-                    
-                    # Calculate marketplace fees
-                    marketplace_fees = order.marketplace.calculate_marketplace_fees(total_selling_price)
-                    total_fees = marketplace_fees['total_fees']
-                    
-                    # Calculate profit
-                    gross_profit = total_selling_price - total_cost
-                    net_profit = gross_profit - total_fees
-                    
-                    profit_margin = (net_profit / total_selling_price * 100) if total_selling_price > 0 else 0
-                    
-                    profitability_data.append({
-                        'order_id': order.id,
-                        'marketplace_id': order.marketplace.id,
-                        'marketplace_name': order.marketplace.name,
-                        'product_sku': item.get('sku'),
-                        'quantity': quantity,
-                        'selling_price': float(selling_price),
-                        'total_selling_price': float(total_selling_price),
-                        'cost_price': float(cost_price),
-                        'total_cost': float(total_cost),
-                        'marketplace_fees': float(total_fees),
-                        'gross_profit': float(gross_profit),
-                        'net_profit': float(net_profit),
-                        'profit_margin_percentage': round(profit_margin, 2),
-                        'order_date': order.ordered_at.isoformat()
-                    })
-                    
-                except Exception as e:
-                    logger.error(f"Error calculating profitability for order item: {e}")
-                    continue
-        
-        # Aggregate statistics
-        if profitability_data:
-            total_revenue = sum(item['total_selling_price'] for item in profitability_data)
-            total_cost = sum(item['total_cost'] for item in profitability_data)
-            total_fees = sum(item['marketplace_fees'] for item in profitability_data)
-            total_gross_profit = sum(item['gross_profit'] for item in profitability_data)
-            total_net_profit = sum(item['net_profit'] for item in profitability_data)
-            
-            avg_profit_margin = sum(item['profit_margin_percentage'] for item in profitability_data) / len(profitability_data)
-            
-            # Top performing products
-            product_performance = {}
-            for item in profitability_data:
-                sku = item['product_sku']
-                if sku not in product_performance:
-                    product_performance[sku] = {
-                        'sku': sku,
-                        'total_revenue': 0,
-                        'total_profit': 0,
-                        'units_sold': 0,
-                        'profit_margins': []
-                    }
-                
-                product_performance[sku]['total_revenue'] += item['total_selling_price']
-                product_performance[sku]['total_profit'] += item['net_profit']
-                product_performance[sku]['units_sold'] += item['quantity']
-                product_performance[sku]['profit_margins'].append(item['profit_margin_percentage'])
-            
-            # Calculate average profit margin for each product
-            for sku, data in product_performance.items():
-                data['avg_profit_margin'] = sum(data['profit_margins']) / len(data['profit_margins'])
-                del data['profit_margins']  # Remove the raw list
-            
-            # Sort by total profit
-            top_products = sorted(
-                product_performance.values(),
-                key=lambda x: x['total_profit'],
-                reverse=True
-            )[:10]
+        if totals['total_items']:
+            total_revenue = float(totals['total_revenue'])
+            total_net_profit = float(totals['total_net_profit'])
             
             summary_stats = {
                 'analysis_period_days': days,
-                'total_orders_analyzed': len(set(item['order_id'] for item in profitability_data)),
-                'total_items_analyzed': len(profitability_data),
+                'total_orders_analyzed': totals['total_orders'],
+                'total_items_analyzed': totals['total_items'],
                 'total_revenue': total_revenue,
-                'total_cost': total_cost,
-                'total_marketplace_fees': total_fees,
-                'total_gross_profit': total_gross_profit,
+                'total_cost': float(totals['total_cost']),
+                'total_marketplace_fees': float(totals['total_fees']),
+                'total_gross_profit': float(totals['total_gross_profit']),
                 'total_net_profit': total_net_profit,
-                'average_profit_margin': round(avg_profit_margin, 2),
+                'average_profit_margin': round(float(totals['avg_profit_margin']), 2),
                 'overall_profit_margin': round((total_net_profit / total_revenue * 100) if total_revenue > 0 else 0, 2)
             }
+            
+            # Top performing products by total profit
+            top_products = [
+                {
+                    'sku': product['sku'],
+                    'total_revenue': float(product['total_revenue']),
+                    'total_profit': float(product['total_profit']),
+                    'units_sold': product['units_sold'],
+                    'avg_profit_margin': float(product['avg_profit_margin'])
+                }
+                for product in lines.values('sku').annotate(
+                    total_revenue=Sum('total_price'),
+                    total_profit=Sum('net_profit'),
+                    units_sold=Sum('quantity'),
+                    avg_profit_margin=Avg('profit_margin')
+                ).order_by('-total_profit', 'sku')[:10]
+            ]
         else:
             summary_stats = {
                 'analysis_period_days': days,
@@ -759,7 +733,32 @@ def calculate_profitability_metrics(days: int = 30) -> Dict[str, Any]:
             }
             top_products = []
         
-        logger.info(f"Calculated profitability for {len(profitability_data)} order items")
+        # Limit to first 100 items for response size
+        detailed_data = [
+            {
+                'order_id': line['order_id'],
+                'marketplace_id': line['marketplace_id'],
+                'marketplace_name': line['marketplace__name'],
+                'product_sku': line['sku'],
+                'quantity': line['quantity'],
+                'selling_price': float(line['unit_price']),
+                'total_selling_price': float(line['total_price']),
+                'cost_price': float(line['listing__cost'] or 0),
+                'total_cost': float(line['line_cost']),
+                'marketplace_fees': float(line['line_fees']),
+                'gross_profit': float(line['gross_profit']),
+                'net_profit': float(line['net_profit']),
+                'profit_margin_percentage': round(float(line['profit_margin']), 2),
+                'order_date': line['ordered_at'].isoformat()
+            }
+            for line in lines.order_by('ordered_at', 'id').values(
+                'order_id', 'marketplace_id', 'marketplace__name', 'sku', 'quantity',
+                'unit_price', 'total_price', 'listing__cost', 'line_cost', 'line_fees',
+                'gross_profit', 'net_profit', 'profit_margin', 'ordered_at'
+            )[:100]
+        ]
+        
+        logger.info(f"Calculated profitability for {totals['total_items']} order items")
         
         return {
             'success': True,
@@ -767,7 +766,7 @@ def calculate_profitability_metrics(days: int = 30) -> Dict[str, Any]:
             'generated_at': timezone.now().isoformat(),
             'summary_statistics': summary_stats,
             'top_performing_products': top_products,
-            'detailed_data': profitability_data[:100]  # Limit to first 100 items for response size
+            'detailed_data': detailed_data
         }
         
     except Exception as e:
@@ -779,6 +778,77 @@ def calculate_profitability_metrics(days: int = 30) -> Dict[str, Any]:
         }
 
 
+@shared_task
+def calculate_sales_by_sku(days: int = 30, marketplace_id: Optional[int] = None,
+                           limit: int = 50) -> Dict[str, Any]:
+    """
+    Summarize units and revenue per marketplace SKU.
+    
+    Aggregates normalized order lines grouped by (marketplace, sku),
+    served by the order line (marketplace, sku, ordered_at) index.
+    Cancelled, refunded and failed orders are excluded.
+    
+    Args:
+        days: Number of days to analyze
+        marketplace_id: Restrict to one marketplace
+        limit: Maximum number of SKUs returned, by revenue
+        
+    Returns:
+        Dictionary with per-SKU sales
+    """
+    logger.info(f"Calculating sales by SKU for the last {days} days")
+    
+    try:
+        from marketplaces.models import MarketplaceOrderLine
+        
+        cutoff_date = timezone.now() - timedelta(days=days)
+        lines = MarketplaceOrderLine.objects.filter(ordered_at__gte=cutoff_date).exclude(
+            order__status__in=['cancelled', 'refunded', 'error']
+        )
+        if marketplace_id is not None:
+            lines = lines.filter(marketplace_id=marketplace_id)
+        
+        sales = [
+            {
+                'marketplace_id': row['marketplace_id'],
+                'marketplace_name': row['marketplace__name'],
+                'sku': row['sku'],
+                'supplier_product_id': row['supplier_product_id'],
+                'orders': row['orders'],
+                'units_sold': row['units_sold'],
+                'revenue': float(row['revenue']),
+                'last_ordered_at': row['last_ordered_at'].isoformat()
+            }
+            for row in lines.values(
+                'marketplace_id', 'marketplace__name', 'sku'
+            ).annotate(
+                supplier_product_id=Max('supplier_product_id'),
+                orders=Count('order', distinct=True),
+                units_sold=Sum('quantity'),
+                revenue=Sum('total_price'),
+                last_ordered_at=Max('ordered_at')
+            ).order_by('-revenue', 'sku')[:limit]
+        ]
+        
+        logger.info(f"Calculated sales for {len(sales)} SKUs")
+        
+        return {
+            'success': True,
+            'analysis_period_days': days,
+            'marketplace_id': marketplace_id,
+            'generated_at': timezone.now().isoformat(),
+            'sales': sales
+        }
+        
+    except Exception as e:
+        error_msg = f"Error calculating sales by SKU: {str(e)}"
+        logger.error(error_msg, exc_info=True)
+        return {
+            'success': False,
+            'error': error_msg
+        }
+
+
 @shared_task
 def send_analytics_email_report(report_type: str, recipients: List[str], 
                                report_data: Dict[str, Any]) -> Dict[str, Any]:
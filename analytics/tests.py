@@ -1,3 +1,82 @@
+"""
+Tests for analytics tasks.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
 from django.test import TestCase
+from django.utils import timezone
+
+from marketplaces.models import Marketplace, MarketplaceListing
+from marketplaces.sync import ingest_orders
+from .tasks import calculate_profitability_metrics, calculate_sales_by_sku
+
+
+class OrderLineAnalyticsTest(TestCase):
+    """Test cases for analytics over normalized order lines."""
+
+    def setUp(self):
+        self.marketplace = Marketplace.objects.create(
+            name='Test Market',
+            code='test-market',
+            platform_type='custom',
+            commission_percentage=Decimal('10.00'),
+            listing_fee=Decimal('1.00')
+        )
+        for sku, cost in (('M-0', '4.00'), ('M-1', '2.00')):
+            MarketplaceListing.objects.create(
+                marketplace=self.marketplace,
+                marketplace_listing_id=f'L-{sku}',
+                marketplace_sku=sku,
+                title=sku,
+                price=Decimal('10.00'),
+                cost=Decimal(cost)
+            )
+
+        ordered_at = (timezone.now() - timedelta(days=1)).isoformat()
+        ingest_orders(self.marketplace, [
+            {
+                'order_id': 'A', 'status': 'shipped', 'total_amount': '30.00', 'ordered_at': ordered_at,
+                'items': [
+                    {'sku': 'M-0', 'quantity': 2, 'price': '10.00'},
+                    {'sku': 'M-1', 'quantity': 1, 'price': '10.00'},
+                ]
+            },
+            {
+                'order_id': 'B', 'status': 'pending', 'total_amount': '10.00', 'ordered_at': ordered_at,
+                'items': [{'sku': 'M-0', 'quantity': 1, 'price': '10.00'}]
+            },
+            {
+                'order_id': 'C', 'status': 'cancelled', 'total_amount': '10.00', 'ordered_at': ordered_at,
+                'items': [{'sku': 'M-1', 'quantity': 5, 'price': '10.00'}]
+            },
+        ])
+
+    def test_profitability_joins_lines_to_listings(self):
+        """Test profit per line from listing cost and marketplace fees."""
+        with self.assertNumQueries(3):
+            result = calculate_profitability_metrics(days=30)
+
+        summary = result['summary_statistics']
+        self.assertEqual(summary['total_orders_analyzed'], 1)
+        self.assertEqual(summary['total_items_analyzed'], 2)
+        self.assertEqual(summary['total_revenue'], 30.0)
+        self.assertEqual(summary['total_cost'], 10.0)
+        # 10% commission plus a 1.00 listing fee per line
+        self.assertEqual(summary['total_marketplace_fees'], 5.0)
+        self.assertEqual(summary['total_net_profit'], 15.0)
+
+        top = result['top_performing_products']
+        self.assertEqual([(p['sku'], p['total_profit'], p['units_sold']) for p in top],
+                         [('M-0', 9.0, 2), ('M-1', 6.0, 1)])
+        self.assertEqual(result['detailed_data'][0]['profit_margin_percentage'], 45.0)
+
+    def test_sales_by_sku_excludes_cancelled_orders(self):
+        """Test per-SKU units and revenue grouped in SQL."""
+        result = calculate_sales_by_sku(days=30, marketplace_id=self.marketplace.id)
 
-# Create your tests here.
+        sales = {row['sku']: row for row in result['sales']}
+        self.assertEqual(sales['M-0']['units_sold'], 3)
+        self.assertEqual(sales['M-0']['orders'], 2)
+        self.assertEqual(sales['M-0']['revenue'], 30.0)
+        self.assertEqual(sales['M-1']['units_sold'], 1)
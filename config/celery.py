@@ -46,7 +46,6 @@ app.conf.update(
     
     # Rate limiting
     task_annotations={
-        'suppliers.tasks.sync_supplier_products': {'rate_limit': '10/m'},
         'marketplaces.tasks.sync_marketplace_listings': {'rate_limit': '20/m'},
         'marketplaces.tasks.sync_marketplace_orders': {'rate_limit': '30/m'},
         'ai_agents.tasks.process_ai_task': {'rate_limit': '5/m'},
@@ -86,6 +85,11 @@ app.conf.beat_schedule = {
         'schedule': 1800.0,  # Run every 30 minutes
         'options': {'queue': 'marketplaces'}
     },
+    'purge-inventory-movements-daily': {
+        'task': 'marketplaces.tasks.purge_inventory_movements',
+        'schedule': 86400.0,  # Run daily
+        'options': {'queue': 'maintenance'}
+    },
     'cleanup-old-executions-daily': {
         'task': 'orchestration.tasks.cleanup_old_executions',
         'schedule': 86400.0,  # Run daily
@@ -111,7 +115,7 @@ def debug_task(self):
 
 
 # Celery signal handlers for monitoring
-from celery.signals import task_prerun, task_postrun, task_failure
+from celery.signals import task_prerun, task_postrun, task_failure, worker_process_shutdown
 import logging
 
 logger = logging.getLogger(__name__)
@@ -132,4 +136,12 @@ def task_postrun_handler(sender=None, task_id=None, task=None, args=None, kwargs
 @task_failure.connect
 def task_failure_handler(sender=None, task_id=None, exception=None, einfo=None, **kwds):
     """Handle task failure."""
-    logger.error(f'Task {sender.name} failed: {task_id} - {exception}')
\ No newline at end of file
+    logger.error(f'Task {sender.name} failed: {task_id} - {exception}')
+
+
+@worker_process_shutdown.connect
+def worker_process_shutdown_handler(**kwds):
+    """Close cached supplier connectors and their HTTP sessions."""
+    from suppliers.connectors.factory import close_cached_connectors
+    closed = close_cached_connectors()
+    logger.info(f'Closed {closed} cached supplier connectors')
@@ -173,6 +173,94 @@ CELERY_TASK_ROUTES = {
     'core.*': {'queue': 'maintenance'},
 }
 
+# Workflow engine
+# Size of the process-wide thread pool shared by all WorkflowEngine instances
+WORKFLOW_ENGINE_MAX_WORKERS = env.int('WORKFLOW_ENGINE_MAX_WORKERS', default=5)
+# Step progress writes are coalesced: at most one per interval, unless
+# progress moved by at least the given percentage
+WORKFLOW_PROGRESS_MIN_INTERVAL_SECONDS = env.float('WORKFLOW_PROGRESS_MIN_INTERVAL_SECONDS', default=2.0)
+WORKFLOW_PROGRESS_MIN_DELTA_PERCENT = env.float('WORKFLOW_PROGRESS_MIN_DELTA_PERCENT', default=5.0)
+
+# Supplier sync
+# Products written per bulk query batch; each batch commits in its own transaction
+SUPPLIER_SYNC_CHUNK_SIZE = env.int('SUPPLIER_SYNC_CHUNK_SIZE', default=1000)
+# Product pages fetched ahead on a background thread while the current page is written
+SUPPLIER_SYNC_PREFETCH_PAGES = env.int('SUPPLIER_SYNC_PREFETCH_PAGES', default=2)
+# Threads normalizing raw product pages while the next page is fetched (0 = inline)
+SUPPLIER_NORMALIZE_WORKERS = env.int('SUPPLIER_NORMALIZE_WORKERS', default=2)
+# Concurrent API calls in Alibaba1688Connector.bulk_sync_products (throughput is still bounded by the rate limiter)
+SUPPLIER_1688_SYNC_CONCURRENCY = env.int('SUPPLIER_1688_SYNC_CONCURRENCY', default=8)
+# Keep-alive connection pool size and retry count for connector HTTP sessions
+SUPPLIER_HTTP_POOL_SIZE = env.int('SUPPLIER_HTTP_POOL_SIZE', default=10)
+SUPPLIER_HTTP_MAX_RETRIES = env.int('SUPPLIER_HTTP_MAX_RETRIES', default=3)
+# Cached connectors (per worker process) idle for longer than this are closed
+SUPPLIER_CONNECTOR_IDLE_SECONDS = env.int('SUPPLIER_CONNECTOR_IDLE_SECONDS', default=300)
+# Scheduled syncs: concurrent syncs per connector type ('default' applies to unlisted types)
+SUPPLIER_SYNC_CONNECTOR_CONCURRENCY = {
+    'default': env.int('SUPPLIER_SYNC_DEFAULT_CONCURRENCY', default=2),
+    'alibaba_1688': env.int('SUPPLIER_SYNC_1688_CONCURRENCY', default=2),
+}
+# Suppliers estimated above this many pages are split into parallel page-range shards
+SUPPLIER_SYNC_SHARD_PAGES = env.int('SUPPLIER_SYNC_SHARD_PAGES', default=50)
+SUPPLIER_SYNC_MAX_SHARDS = env.int('SUPPLIER_SYNC_MAX_SHARDS', default=8)
+# Cost estimate for suppliers without a completed run
+SUPPLIER_SYNC_DEFAULT_SECONDS_PER_PAGE = env.float('SUPPLIER_SYNC_DEFAULT_SECONDS_PER_PAGE', default=2.0)
+# Running syncs not updated for this long are considered dead and rescheduled
+SUPPLIER_SYNC_STALE_SECONDS = env.int('SUPPLIER_SYNC_STALE_SECONDS', default=3600)
+
+# Append every fetched product page to <dir>/<supplier code>.jsonl for replay
+SUPPLIER_CONNECTOR_RECORD_DIR = env('SUPPLIER_CONNECTOR_RECORD_DIR', default='')
+# Register the 'replay' connector type used by benchmark_supplier_sync
+SUPPLIER_ENABLE_REPLAY_CONNECTOR = env.bool('SUPPLIER_ENABLE_REPLAY_CONNECTOR', default=DEBUG)
+
+# Upper bound on SKUs per marketplace bulk inventory call (connectors may use less)
+MARKETPLACE_INVENTORY_BATCH_SIZE = env.int('MARKETPLACE_INVENTORY_BATCH_SIZE', default=500)
+# Orders written per transaction during marketplace order sync
+MARKETPLACE_ORDER_SYNC_CHUNK_SIZE = env.int('MARKETPLACE_ORDER_SYNC_CHUNK_SIZE', default=500)
+# Listings upserted per transaction, and read per batch when pushing listings
+MARKETPLACE_LISTING_SYNC_CHUNK_SIZE = env.int('MARKETPLACE_LISTING_SYNC_CHUNK_SIZE', default=500)
+# Incremental order syncs re-read this much before the cursor to tolerate clock skew
+MARKETPLACE_ORDER_CURSOR_OVERLAP_SECONDS = env.int('MARKETPLACE_ORDER_CURSOR_OVERLAP_SECONDS', default=300)
+# Every few hours a reconciliation pass re-reads the last few days of orders
+MARKETPLACE_ORDER_RECONCILE_HOURS = env.int('MARKETPLACE_ORDER_RECONCILE_HOURS', default=24)
+MARKETPLACE_ORDER_RECONCILE_DAYS = env.int('MARKETPLACE_ORDER_RECONCILE_DAYS', default=7)
+# Running order syncs not updated for this long are considered dead
+MARKETPLACE_ORDER_SYNC_STALE_SECONDS = env.int('MARKETPLACE_ORDER_SYNC_STALE_SECONDS', default=1800)
+# Inventory movement log retention; old rows are deleted in batches of this size
+MARKETPLACE_INVENTORY_MOVEMENT_RETENTION_DAYS = env.int('MARKETPLACE_INVENTORY_MOVEMENT_RETENTION_DAYS', default=90)
+MARKETPLACE_INVENTORY_MOVEMENT_PURGE_BATCH_SIZE = env.int('MARKETPLACE_INVENTORY_MOVEMENT_PURGE_BATCH_SIZE', default=5000)
+# Statistics endpoint results are cached this long; clients may ask for fresher values
+MARKETPLACE_STATS_CACHE_SECONDS = env.int('MARKETPLACE_STATS_CACHE_SECONDS', default=60)
+
+# Connector rate limiting
+# Token buckets are shared across workers through Redis; leave empty to
+# keep buckets per process. Redis is retried after failures. Defaults to
+# the Celery broker only when that broker is Redis.
+RATE_LIMIT_REDIS_URL = env(
+    'RATE_LIMIT_REDIS_URL',
+    default=CELERY_BROKER_URL if CELERY_BROKER_URL.startswith('redis') else ''
+)
+RATE_LIMIT_REDIS_RETRY_SECONDS = env.int('RATE_LIMIT_REDIS_RETRY_SECONDS', default=30)
+# Bulk marketplace operations wait this long for request budget before deferring
+MARKETPLACE_RATE_LIMIT_MAX_WAIT_SECONDS = env.int('MARKETPLACE_RATE_LIMIT_MAX_WAIT_SECONDS', default=30)
+
+# Decrypted API credentials are cached in process memory for this long
+CREDENTIAL_CACHE_TTL_SECONDS = env.int('CREDENTIAL_CACHE_TTL_SECONDS', default=300)
+CREDENTIAL_CACHE_MAX_ENTRIES = env.int('CREDENTIAL_CACHE_MAX_ENTRIES', default=256)
+
+# Connector response cache
+# Read-only API responses are kept in a local SQLite file shared by the
+# workers on a host; leave empty to disable.
+CONNECTOR_RESPONSE_CACHE_PATH = env('CONNECTOR_RESPONSE_CACHE_PATH', default=str(BASE_DIR / 'cache' / 'connector_responses.sqlite3'))
+# Fresh lifetime in seconds per 1688 endpoint; endpoints not listed are not cached
+SUPPLIER_1688_RESPONSE_CACHE_TTLS = {
+    'alibaba.product.get': env.int('SUPPLIER_1688_PRODUCT_CACHE_TTL', default=86400),
+    'alibaba.product.price.get': env.int('SUPPLIER_1688_PRICE_CACHE_TTL', default=3600),
+    'alibaba.company.search': env.int('SUPPLIER_1688_SUPPLIER_SEARCH_CACHE_TTL', default=86400),
+}
+# Expired responses are served for this long while they are refreshed
+SUPPLIER_1688_RESPONSE_CACHE_STALE_SECONDS = env.int('SUPPLIER_1688_RESPONSE_CACHE_STALE_SECONDS', default=3600)
+
 # REST Framework
 REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
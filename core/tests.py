@@ -1,3 +1,209 @@
-from django.test import TestCase
+"""
+Tests for core utilities.
+"""
+import threading
+from unittest import mock
 
-# Create your tests here.
+from django.test import SimpleTestCase, override_settings
+
+from .utils.rate_limit import LocalTokenBucket, RateLimiter, get_rate_limiter, reset_rate_limiters
+from .utils.response_cache import ResponseCache
+
+
+class LocalTokenBucketTest(SimpleTestCase):
+    """Test cases for the in-process token bucket."""
+
+    def setUp(self):
+        self.now = 0.0
+        self.bucket = LocalTokenBucket(capacity=5, refill_rate=1.0, clock=lambda: self.now)
+
+    def test_allows_burst_up_to_capacity(self):
+        """Test that a full bucket serves its capacity without waiting."""
+        for _ in range(5):
+            acquired, _, wait = self.bucket.take()
+            self.assertTrue(acquired)
+            self.assertEqual(wait, 0.0)
+
+        acquired, remaining, wait = self.bucket.take()
+        self.assertFalse(acquired)
+        self.assertEqual(remaining, 0.0)
+        self.assertEqual(wait, 1.0)
+
+    def test_refills_over_time(self):
+        """Test that tokens refill at the configured rate, capped at capacity."""
+        for _ in range(5):
+            self.bucket.take()
+
+        self.now = 2.5
+        acquired, remaining, _ = self.bucket.take(2)
+        self.assertTrue(acquired)
+        self.assertAlmostEqual(remaining, 0.5)
+
+        self.now = 100.0
+        _, remaining, _ = self.bucket.take(0)
+        self.assertEqual(remaining, 5)
+
+
+    def test_adjust_caps_tokens_and_pauses(self):
+        """Test that reported quota caps the bucket and a pause blocks takes."""
+        self.assertEqual(self.bucket.adjust(ceiling=2), 2)
+
+        self.bucket.adjust(pause=3)
+        acquired, remaining, wait = self.bucket.take()
+        self.assertFalse(acquired)
+        self.assertEqual(remaining, 2)
+        self.assertEqual(wait, 3)
+
+        self.now = 3.0
+        acquired, remaining, _ = self.bucket.take()
+        self.assertTrue(acquired)
+        self.assertEqual(remaining, 4)
+
+
+class FailingRedis:
+    """Redis client stand-in whose scripts always fail."""
+
+    def register_script(self, script):
+        def run(keys, args):
+            raise ConnectionError('redis down')
+        return run
+
+
+@override_settings(RATE_LIMIT_REDIS_URL='', RATE_LIMIT_REDIS_RETRY_SECONDS=30)
+class RateLimiterTest(SimpleTestCase):
+    """Test cases for the credential-keyed rate limiter."""
+
+    def test_state_reports_live_bucket(self):
+        """Test that get_state() reflects tokens taken."""
+        limiter = RateLimiter('test-key', capacity=10, window_seconds=10)
+
+        self.assertTrue(limiter.acquire(timeout=0))
+        self.assertTrue(limiter.acquire(3, timeout=0))
+
+        state = limiter.get_state()
+        self.assertEqual(state['requests_remaining'], 6)
+        self.assertEqual(state['limit'], 10)
+        self.assertEqual(state['backend'], 'local')
+        self.assertGreater(state['reset_time'], 0)
+
+    def test_acquire_times_out_when_empty(self):
+        """Test that acquire() gives up once the timeout passes."""
+        limiter = RateLimiter('empty-key', capacity=1, window_seconds=3600)
+
+        self.assertTrue(limiter.acquire(timeout=0))
+        self.assertFalse(limiter.acquire(timeout=0.05))
+
+    def test_falls_back_to_local_bucket_when_redis_fails(self):
+        """Test that Redis errors do not block callers."""
+        limiter = RateLimiter('redis-key', capacity=2, window_seconds=60, redis_client=FailingRedis())
+
+        with self.assertLogs('core.utils.rate_limit', level='WARNING'):
+            self.assertTrue(limiter.acquire(timeout=0))
+
+        # Redis is not retried until the retry interval has passed
+        self.assertTrue(limiter.acquire(timeout=0))
+        self.assertEqual(limiter.get_state()['backend'], 'local')
+
+    @override_settings(RATE_LIMIT_REDIS_URL='amqp://guest@localhost//')
+    def test_non_redis_url_falls_back_to_local_bucket(self):
+        """Test that a URL Redis cannot parse keeps limiters per process."""
+        reset_rate_limiters()
+        self.addCleanup(reset_rate_limiters)
+
+        # Start without a client cached by earlier tests
+        with mock.patch('core.utils.rate_limit._redis_client', None), \
+                self.assertLogs('core.utils.rate_limit', level='WARNING'):
+            limiter = get_rate_limiter('amqp-key', 1, 3600)
+
+        self.assertTrue(limiter.acquire(timeout=0))
+        self.assertEqual(limiter.get_state()['backend'], 'local')
+
+    @override_settings(RATE_LIMIT_REDIS_URL='')
+    def test_reset_starts_limiters_with_full_buckets(self):
+        """Test that reset_rate_limiters() drops drained process-wide limiters."""
+        limiter = get_rate_limiter('reset-key', 1, 3600)
+        self.assertTrue(limiter.acquire(timeout=0))
+        self.assertIs(get_rate_limiter('reset-key', 1, 3600), limiter)
+
+        reset_rate_limiters()
+        self.assertTrue(get_rate_limiter('reset-key', 1, 3600).acquire(timeout=0))
+        reset_rate_limiters()
+
+
+class ResponseCacheTest(SimpleTestCase):
+    """Test cases for the persistent connector response cache."""
+
+    def setUp(self):
+        self.now = 1000.0
+        self.cache = ResponseCache(':memory:', clock=lambda: self.now)
+        self.calls = 0
+
+    def _fetch(self):
+        self.calls += 1
+        return {'success': True, 'version': self.calls}
+
+    def test_fresh_entries_skip_fetch(self):
+        """Test hits within the TTL and that keys depend on params and scope."""
+        first = self.cache.get_or_fetch('ns', {'id': 1}, self._fetch, ttl=60)
+        second = self.cache.get_or_fetch('ns', {'id': 1}, self._fetch, ttl=60)
+        self.cache.get_or_fetch('ns', {'id': 1}, self._fetch, ttl=60, scope='other-account')
+
+        self.assertEqual(first, second)
+        self.assertEqual(self.calls, 2)
+        self.assertEqual(self.cache.stats['hits'], 1)
+
+    def test_serves_stale_while_refreshing(self):
+        """Test that an expired entry is returned while a background refresh updates it."""
+        self.cache.get_or_fetch('ns', {'id': 1}, self._fetch, ttl=60, stale_ttl=600)
+
+        self.now += 120
+        stale = self.cache.get_or_fetch('ns', {'id': 1}, self._fetch, ttl=60, stale_ttl=600)
+        self.assertEqual(stale['version'], 1)
+
+        self.cache._refresher.shutdown(wait=True)
+        self.assertEqual(self.cache.stats['refreshes'], 1)
+        fresh = self.cache.get_or_fetch('ns', {'id': 1}, self._fetch, ttl=60, stale_ttl=600)
+        self.assertEqual(fresh['version'], 2)
+
+        # Past the stale window the caller waits for a new fetch
+        self.now += 10000
+        self.assertEqual(
+            self.cache.get_or_fetch('ns', {'id': 1}, self._fetch, ttl=60, stale_ttl=600)['version'], 3
+        )
+
+    def test_concurrent_misses_share_one_fetch(self):
+        """Test request coalescing for the same key."""
+        release = threading.Event()
+        started = threading.Event()
+
+        def slow_fetch():
+            started.set()
+            release.wait(5)
+            return self._fetch()
+
+        results = []
+        first = threading.Thread(
+            target=lambda: results.append(self.cache.get_or_fetch('ns', {'id': 1}, slow_fetch, ttl=60))
+        )
+        first.start()
+        started.wait(5)
+        second = threading.Thread(
+            target=lambda: results.append(self.cache.get_or_fetch('ns', {'id': 1}, slow_fetch, ttl=60))
+        )
+        second.start()
+        while self.cache.stats['coalesced'] == 0 and second.is_alive():
+            second.join(0.01)
+        release.set()
+        first.join(5)
+        second.join(5)
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(results, [{'success': True, 'version': 1}] * 2)
+
+    def test_uncacheable_responses_are_not_stored(self):
+        """Test that responses rejected by the predicate are fetched again."""
+        for _ in range(2):
+            self.cache.get_or_fetch(
+                'ns', {'id': 1}, self._fetch, ttl=60, cacheable=lambda result: False
+            )
+        self.assertEqual(self.calls, 2)
@@ -0,0 +1 @@
+# Core utilities module
\ No newline at end of file
@@ -0,0 +1,388 @@
+"""
+Token-bucket rate limiting shared by supplier and marketplace connectors.
+Buckets live in Redis so every worker process using the same credential
+draws from one budget; if Redis is not configured or unreachable, an
+in-process bucket is used instead. Buckets can be aligned with the quota
+an API reports (remaining requests, Retry-After) through adjust().
+"""
+import time
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from django.conf import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+# Atomically refill and take tokens. Uses the Redis server clock so that
+# workers with skewed clocks agree on the refill. While the pause key
+# (KEYS[2]) lives, no tokens are handed out.
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local wait = 0
+local paused = redis.call('PTTL', KEYS[2])
+if requested > 0 and paused > 0 then
+    wait = paused / 1000
+elseif tokens >= requested then
+    tokens = tokens - requested
+    allowed = 1
+else
+    wait = (requested - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 60)
+return {allowed, tostring(tokens), tostring(wait)}
+"""
+
+# Atomically cap the tokens at a ceiling (negative: no cap) and extend the
+# pause to at least the given number of milliseconds.
+TOKEN_BUCKET_ADJUST_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local ceiling = tonumber(ARGV[3])
+local pause_ms = tonumber(ARGV[4])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+if ceiling >= 0 then
+    tokens = math.min(tokens, ceiling)
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 60)
+if pause_ms > 0 and redis.call('PTTL', KEYS[2]) < pause_ms then
+    redis.call('SET', KEYS[2], 1, 'PX', pause_ms)
+end
+return tostring(tokens)
+"""
+
+
+class LocalTokenBucket:
+    """Thread-safe token bucket held in process memory."""
+
+    backend = 'local'
+
+    def __init__(self, capacity: float, refill_rate: float,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize the bucket, starting full.
+
+        Args:
+            capacity: Maximum number of tokens (burst size)
+            refill_rate: Tokens added per second
+            clock: Monotonic clock, injectable for tests
+        """
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+        self._clock = clock
+        self._tokens = float(capacity)
+        self._updated_at = clock()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self) -> float:
+        now = self._clock()
+        elapsed = max(0.0, now - self._updated_at)
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.refill_rate)
+        self._updated_at = now
+        return now
+
+    def take(self, tokens: float = 1) -> Tuple[bool, float, float]:
+        """
+        Try to take tokens without blocking.
+
+        Args:
+            tokens: Number of tokens to take; 0 only refreshes the state
+
+        Returns:
+            Tuple of (acquired, tokens_remaining, seconds_until_available)
+        """
+        with self._lock:
+            now = self._refill()
+
+            if tokens > 0 and now < self._paused_until:
+                return False, self._tokens, self._paused_until - now
+
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True, self._tokens, 0.0
+
+            return False, self._tokens, (tokens - self._tokens) / self.refill_rate
+
+    def adjust(self, ceiling: Optional[float] = None, pause: float = 0) -> float:
+        """
+        Cap the tokens and extend the pause.
+
+        Args:
+            ceiling: Maximum tokens to keep; None leaves them unchanged
+            pause: Seconds during which no tokens are handed out
+
+        Returns:
+            Tokens remaining
+        """
+        with self._lock:
+            now = self._refill()
+            if ceiling is not None:
+                self._tokens = min(self._tokens, max(0.0, ceiling))
+            if pause > 0:
+                self._paused_until = max(self._paused_until, now + pause)
+            return self._tokens
+
+
+class RedisTokenBucket:
+    """Token bucket stored in a Redis hash, shared across processes."""
+
+    backend = 'redis'
+
+    def __init__(self, client, key: str, capacity: float, refill_rate: float):
+        """
+        Initialize the bucket.
+
+        Args:
+            client: redis.Redis client
+            key: Redis key holding the bucket state
+            capacity: Maximum number of tokens (burst size)
+            refill_rate: Tokens added per second
+        """
+        self.key = key
+        self.pause_key = f"{key}:pause"
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+        self._script = client.register_script(TOKEN_BUCKET_SCRIPT)
+        self._adjust_script = client.register_script(TOKEN_BUCKET_ADJUST_SCRIPT)
+
+    def take(self, tokens: float = 1) -> Tuple[bool, float, float]:
+        """Try to take tokens without blocking. See LocalTokenBucket.take()."""
+        allowed, remaining, wait = self._script(
+            keys=[self.key, self.pause_key],
+            args=[self.capacity, self.refill_rate, tokens]
+        )
+        return bool(int(allowed)), float(remaining), float(wait)
+
+    def adjust(self, ceiling: Optional[float] = None, pause: float = 0) -> float:
+        """Cap the tokens and extend the pause. See LocalTokenBucket.adjust()."""
+        remaining = self._adjust_script(
+            keys=[self.key, self.pause_key],
+            args=[self.capacity, self.refill_rate, -1 if ceiling is None else max(0, ceiling), int(pause * 1000)]
+        )
+        return float(remaining)
+
+
+class RateLimiter:
+    """
+    Token-bucket limiter for one credential.
+
+    Uses a Redis bucket when RATE_LIMIT_REDIS_URL is set, falling back
+    to an in-process bucket while Redis is unavailable. Redis is retried
+    after RATE_LIMIT_REDIS_RETRY_SECONDS.
+    """
+
+    def __init__(self, key: str, capacity: float, window_seconds: float,
+                 redis_client=None):
+        """
+        Initialize the limiter.
+
+        Args:
+            key: Identifier shared by all callers using the same quota
+            capacity: Requests allowed per window (also the burst size)
+            window_seconds: Window length in seconds
+            redis_client: Optional redis.Redis client; defaults to one
+                built from RATE_LIMIT_REDIS_URL
+        """
+        self.key = key
+        self.capacity = max(1, capacity)
+        self.window_seconds = max(1, window_seconds)
+        self.refill_rate = self.capacity / self.window_seconds
+
+        self._local = LocalTokenBucket(self.capacity, self.refill_rate)
+        self._redis: Optional[RedisTokenBucket] = None
+        self._redis_failed_at: Optional[float] = None
+
+        client = redis_client or _get_redis_client()
+        if client is not None:
+            self._redis = RedisTokenBucket(
+                client, f"ratelimit:{key}", self.capacity, self.refill_rate
+            )
+
+    def _take(self, tokens: float) -> Tuple[bool, float, float, str]:
+        if self._redis is not None and self._redis_available():
+            try:
+                acquired, remaining, wait = self._redis.take(tokens)
+                self._redis_failed_at = None
+                return acquired, remaining, wait, self._redis.backend
+            except Exception as e:
+                logger.warning(f"Rate limiter Redis unavailable for {self.key}, using local bucket: {e}")
+                self._redis_failed_at = time.monotonic()
+
+        acquired, remaining, wait = self._local.take(tokens)
+        return acquired, remaining, wait, self._local.backend
+
+    def adjust(self, remaining: Optional[float] = None, pause_seconds: float = 0) -> None:
+        """
+        Align the bucket with the quota reported by the API.
+
+        Args:
+            remaining: Requests the API says are left; the bucket never
+                holds more than this
+            pause_seconds: Hand out no tokens for this long, e.g. from a
+                Retry-After header
+        """
+        if self._redis is not None and self._redis_available():
+            try:
+                self._redis.adjust(remaining, pause_seconds)
+                return
+            except Exception as e:
+                logger.warning(f"Rate limiter Redis unavailable for {self.key}, using local bucket: {e}")
+                self._redis_failed_at = time.monotonic()
+
+        self._local.adjust(remaining, pause_seconds)
+
+    def _redis_available(self) -> bool:
+        if self._redis_failed_at is None:
+            return True
+        retry_after = getattr(settings, 'RATE_LIMIT_REDIS_RETRY_SECONDS', 30)
+        return time.monotonic() - self._redis_failed_at >= retry_after
+
+    def try_acquire(self, tokens: float = 1) -> Tuple[bool, float]:
+        """
+        Take tokens if available, without waiting.
+
+        Args:
+            tokens: Number of tokens to take
+
+        Returns:
+            Tuple of (acquired, seconds_until_available)
+        """
+        acquired, _, wait, _ = self._take(tokens)
+        return acquired, wait
+
+    def acquire(self, tokens: float = 1, timeout: Optional[float] = None) -> bool:
+        """
+        Take tokens, sleeping only as long as needed for them to refill.
+
+        Args:
+            tokens: Number of tokens to take
+            timeout: Maximum seconds to wait; None waits indefinitely
+
+        Returns:
+            True if acquired, False if the timeout expired first
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            acquired, wait = self.try_acquire(tokens)
+            if acquired:
+                return True
+
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+
+            # Re-check at least once a second so other workers' refills are seen
+            time.sleep(min(max(wait, 0.01), 1.0))
+
+    def get_state(self) -> Dict[str, Any]:
+        """
+        Get live bucket state without taking tokens.
+
+        Returns:
+            Dictionary with remaining tokens, limit and time until full
+        """
+        _, remaining, _, backend = self._take(0)
+        return {
+            'requests_remaining': int(remaining),
+            'limit': self.capacity,
+            'window': self.window_seconds,
+            'refill_per_second': round(self.refill_rate, 4),
+            'reset_time': round((self.capacity - remaining) / self.refill_rate, 2),
+            'backend': backend,
+        }
+
+
+_redis_client = None
+_redis_client_lock = threading.Lock()
+
+_limiters: Dict[Tuple[str, float, float], RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def _get_redis_client():
+    """Get the shared Redis client, or None if Redis is not configured."""
+    global _redis_client
+
+    url = getattr(settings, 'RATE_LIMIT_REDIS_URL', '')
+    if not url:
+        return None
+
+    if _redis_client is None:
+        with _redis_client_lock:
+            if _redis_client is None:
+                try:
+                    import redis
+                except ImportError:
+                    logger.warning("redis package not installed, rate limits are per process")
+                    return None
+
+                try:
+                    _redis_client = redis.Redis.from_url(
+                        url,
+                        socket_connect_timeout=1,
+                        socket_timeout=1
+                    )
+                except ValueError as e:
+                    logger.warning(f"Invalid RATE_LIMIT_REDIS_URL, rate limits are per process: {e}")
+                    return None
+
+    return _redis_client
+
+
+def get_rate_limiter(key: str, capacity: float, window_seconds: float) -> RateLimiter:
+    """
+    Get the process-wide limiter for a key, creating it on first use.
+
+    Args:
+        key: Identifier shared by all callers using the same quota
+        capacity: Requests allowed per window
+        window_seconds: Window length in seconds
+
+    Returns:
+        Shared RateLimiter instance
+    """
+    cache_key = (key, capacity, window_seconds)
+
+    limiter = _limiters.get(cache_key)
+    if limiter is None:
+        with _limiters_lock:
+            limiter = _limiters.get(cache_key)
+            if limiter is None:
+                limiter = RateLimiter(key, capacity, window_seconds)
+                _limiters[cache_key] = limiter
+
+    return limiter
+
+
+def reset_rate_limiters() -> None:
+    """
+    Forget every process-wide limiter, so the next get_rate_limiter()
+    call starts with a full local bucket.
+
+    Buckets shared through Redis are not touched. Used by tests, which
+    otherwise inherit budgets drained by earlier tests.
+    """
+    with _limiters_lock:
+        _limiters.clear()
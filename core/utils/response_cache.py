@@ -0,0 +1,239 @@
+"""
+Persistent response cache for read-only connector API calls.
+Responses are stored in a local SQLite file keyed by namespace and request
+parameters, so they survive worker restarts and are shared by every worker
+process on the host. Expired entries are served while a background refresh
+runs, and concurrent misses for the same key in a process share one fetch.
+"""
+import os
+import json
+import time
+import hashlib
+import logging
+import sqlite3
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from django.conf import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """SQLite-backed response cache with stale-while-revalidate and request coalescing."""
+
+    def __init__(self, path: str, clock: Callable[[], float] = time.time,
+                 refresh_workers: int = 2):
+        """
+        Initialize the cache. The database is opened lazily per process.
+
+        Args:
+            path: SQLite database file, or ':memory:'
+            clock: Wall clock, injectable for tests
+            refresh_workers: Threads used for background refreshes
+        """
+        self.path = str(path)
+        self._clock = clock
+        self._refresh_workers = refresh_workers
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._conn_pid: Optional[int] = None
+        self._inflight: Dict[str, Future] = {}
+        self._refresher: Optional[ThreadPoolExecutor] = None
+        self.stats = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'coalesced': 0, 'refreshes': 0}
+
+    @staticmethod
+    def make_key(namespace: str, params: Optional[Dict[str, Any]] = None, scope: str = '') -> str:
+        """
+        Build a cache key from the endpoint namespace and request parameters.
+
+        Args:
+            namespace: API endpoint namespace
+            params: Request parameters
+            scope: Credential or account scope, so accounts do not share entries
+
+        Returns:
+            Cache key string
+        """
+        encoded = json.dumps(params or {}, sort_keys=True, separators=(',', ':'), default=str)
+        digest = hashlib.sha256(f'{scope}|{encoded}'.encode('utf-8')).hexdigest()
+        return f'{namespace}:{digest}'
+
+    def get_or_fetch(self, namespace: str, params: Optional[Dict[str, Any]],
+                     fetch: Callable[[], Any], ttl: float, stale_ttl: float = 0,
+                     scope: str = '', cacheable: Callable[[Any], bool] = bool) -> Any:
+        """
+        Return a cached response, fetching it on a miss.
+
+        Args:
+            namespace: API endpoint namespace
+            params: Request parameters
+            fetch: Callable that performs the request and returns a JSON-serializable response
+            ttl: Seconds a response is fresh
+            stale_ttl: Seconds after expiry an entry is still served while it is refreshed
+            scope: Credential or account scope
+            cacheable: Predicate deciding whether a response is stored
+
+        Returns:
+            Response from the cache or from fetch()
+        """
+        key = self.make_key(namespace, params, scope)
+        entry = self._read(key)
+        now = self._clock()
+
+        if entry is not None:
+            payload, expires_at, stale_until = entry
+            if now < expires_at:
+                self.stats['hits'] += 1
+                return payload
+            if now < stale_until:
+                self.stats['stale_hits'] += 1
+                self._refresh_in_background(key, namespace, fetch, ttl, stale_ttl, cacheable)
+                return payload
+
+        self.stats['misses'] += 1
+        return self._fetch_coalesced(key, namespace, fetch, ttl, stale_ttl, cacheable).result()
+
+    def invalidate(self, namespace: str, params: Optional[Dict[str, Any]] = None, scope: str = '') -> None:
+        """Delete one cached response."""
+        key = self.make_key(namespace, params, scope)
+        with self._lock:
+            conn = self._connection()
+            conn.execute('DELETE FROM responses WHERE key = ?', (key,))
+            conn.commit()
+
+    def purge_expired(self) -> int:
+        """
+        Delete entries past their stale window.
+
+        Returns:
+            Number of entries deleted
+        """
+        with self._lock:
+            conn = self._connection()
+            cursor = conn.execute('DELETE FROM responses WHERE stale_until <= ?', (self._clock(),))
+            conn.commit()
+            return cursor.rowcount
+
+    def _fetch_coalesced(self, key: str, namespace: str, fetch: Callable[[], Any], ttl: float,
+                         stale_ttl: float, cacheable: Callable[[Any], bool]) -> Future:
+        """Run fetch() for a key unless a fetch for it is already in flight."""
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                self.stats['coalesced'] += 1
+                return future
+            future = Future()
+            self._inflight[key] = future
+
+        try:
+            payload = fetch()
+            if cacheable(payload):
+                self._write(key, namespace, payload, ttl, stale_ttl)
+            future.set_result(payload)
+        except Exception as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+        return future
+
+    def _refresh_in_background(self, key: str, namespace: str, fetch: Callable[[], Any], ttl: float,
+                               stale_ttl: float, cacheable: Callable[[Any], bool]) -> None:
+        """Schedule a refresh of a stale entry unless one is already running."""
+        with self._lock:
+            if key in self._inflight:
+                return
+            if self._refresher is None:
+                self._refresher = ThreadPoolExecutor(
+                    max_workers=self._refresh_workers, thread_name_prefix='response-cache'
+                )
+            refresher = self._refresher
+
+        def refresh():
+            future = self._fetch_coalesced(key, namespace, fetch, ttl, stale_ttl, cacheable)
+            if future.exception() is not None:
+                logger.warning(f"Background refresh failed for {namespace}: {future.exception()}")
+            else:
+                self.stats['refreshes'] += 1
+
+        refresher.submit(refresh)
+
+    def _read(self, key: str) -> Optional[tuple]:
+        """Read (payload, expires_at, stale_until) for a key."""
+        with self._lock:
+            row = self._connection().execute(
+                'SELECT payload, expires_at, stale_until FROM responses WHERE key = ?', (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1], row[2]
+
+    def _write(self, key: str, namespace: str, payload: Any, ttl: float, stale_ttl: float) -> None:
+        """Store a response with its freshness window."""
+        now = self._clock()
+        encoded = json.dumps(payload, separators=(',', ':'), default=str)
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                'INSERT OR REPLACE INTO responses '
+                '(key, namespace, payload, fetched_at, expires_at, stale_until) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (key, namespace, encoded, now, now + ttl, now + ttl + stale_ttl)
+            )
+            conn.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Open the database for this process; callers hold self._lock."""
+        pid = os.getpid()
+        if self._conn is None or self._conn_pid != pid:
+            if self.path != ':memory:':
+                Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS responses ('
+                'key TEXT PRIMARY KEY, namespace TEXT NOT NULL, payload TEXT NOT NULL, '
+                'fetched_at REAL NOT NULL, expires_at REAL NOT NULL, stale_until REAL NOT NULL)'
+            )
+            conn.commit()
+            # Connections and in-flight fetches are not inherited across fork
+            self._conn = conn
+            self._conn_pid = pid
+            self._inflight = {}
+            self._refresher = None
+        return self._conn
+
+
+_response_caches: Dict[str, ResponseCache] = {}
+_response_caches_lock = threading.Lock()
+
+
+def get_response_cache(path: Optional[str] = None) -> Optional[ResponseCache]:
+    """
+    Get the process-wide response cache for a path.
+
+    Args:
+        path: SQLite file; defaults to CONNECTOR_RESPONSE_CACHE_PATH
+
+    Returns:
+        Shared ResponseCache instance, or None if caching is disabled
+    """
+    path = path if path is not None else getattr(settings, 'CONNECTOR_RESPONSE_CACHE_PATH', '')
+    if not path:
+        return None
+    path = str(path)
+
+    cache = _response_caches.get(path)
+    if cache is None:
+        with _response_caches_lock:
+            cache = _response_caches.get(path)
+            if cache is None:
+                cache = ResponseCache(path)
+                _response_caches[path] = cache
+
+    return cache
@@ -2,13 +2,16 @@
 Admin configuration for marketplace models.
 """
 from django.contrib import admin
-from django.utils.html import format_html
+from django.utils.html import format_html, format_html_join
+from django.utils.safestring import mark_safe
 from django.urls import reverse
 from django.db.models import Count, Sum
 
 from .models import (
-    Marketplace, MarketplaceListing, MarketplaceOrder, MarketplaceInventory
+    Marketplace, MarketplaceListing, MarketplaceOrder, MarketplaceInventory,
+    MarketplaceOrderSyncState, MarketplaceSyncJob
 )
+from .tasks import start_marketplace_sync_job
 
 
 @admin.register(Marketplace)
@@ -117,6 +120,18 @@ class MarketplaceAdmin(admin.ModelAdmin):
                     level='ERROR'
                 )
     test_connection.short_description = "Test connection"
+    
+    def sync_marketplace(self, request, queryset):
+        """Queue a background sync for selected marketplaces."""
+        jobs = [
+            start_marketplace_sync_job(marketplace, 'all', user=request.user)
+            for marketplace in queryset
+        ]
+        self.message_user(
+            request,
+            f"Queued sync jobs {', '.join(str(job.id) for job in jobs)}"
+        )
+    sync_marketplace.short_description = "Sync marketplace"
 
 
 @admin.register(MarketplaceListing)
@@ -331,7 +346,7 @@ class MarketplaceInventoryAdmin(admin.ModelAdmin):
     search_fields = ['internal_sku', 'marketplace_sku']
     readonly_fields = [
         'effective_quantity', 'last_sync_at', 'sync_attempts',
-        'created_at', 'updated_at'
+        'recent_quantity_changes', 'created_at', 'updated_at'
     ]
     raw_id_fields = ['marketplace', 'listing']
     
@@ -359,7 +374,7 @@ class MarketplaceInventoryAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
         ('History', {
-            'fields': ('quantity_changes',),
+            'fields': ('recent_quantity_changes',),
             'classes': ('collapse',)
         }),
     )
@@ -375,22 +390,36 @@ class MarketplaceInventoryAdmin(admin.ModelAdmin):
         return obj.effective_quantity
     effective_quantity.short_description = 'Effective Qty'
     
+    def recent_quantity_changes(self, obj):
+        """Display the latest quantity changes from the movement log."""
+        if not obj.pk:
+            return '-'
+        return format_html_join(
+            mark_safe('<br>'),
+            '{}: {} &rarr; {} ({})',
+            (
+                (change['timestamp'], change['old_quantity'], change['new_quantity'], change['reason'])
+                for change in obj.recent_quantity_changes(limit=20)
+            )
+        ) or '-'
+    recent_quantity_changes.short_description = 'Recent Changes'
+    
     actions = ['sync_inventory', 'enable_manual_override', 'disable_manual_override']
     
     def sync_inventory(self, request, queryset):
-        """Sync inventory with marketplace."""
-        success_count = 0
-        error_count = 0
-        
-        for item in queryset:
-            if item.sync_to_marketplace():
-                success_count += 1
-            else:
-                error_count += 1
+        """Mark selected items pending and push them in a background sync."""
+        queued = queryset.filter(manual_override=False).update(sync_status='pending')
+        marketplaces = Marketplace.objects.filter(
+            id__in=queryset.values('marketplace_id')
+        )
+        jobs = [
+            start_marketplace_sync_job(marketplace, 'inventory', user=request.user)
+            for marketplace in marketplaces
+        ]
         
         self.message_user(
             request,
-            f"Synced {success_count} items successfully, {error_count} errors"
+            f"Queued {queued} items in sync jobs {', '.join(str(job.id) for job in jobs)}"
         )
     sync_inventory.short_description = "Sync inventory"
     
@@ -405,3 +434,59 @@ class MarketplaceInventoryAdmin(admin.ModelAdmin):
         count = queryset.update(manual_override=False)
         self.message_user(request, f"Disabled manual override for {count} items")
     disable_manual_override.short_description = "Disable manual override"
+
+
+@admin.register(MarketplaceOrderSyncState)
+class MarketplaceOrderSyncStateAdmin(admin.ModelAdmin):
+    """Admin interface for MarketplaceOrderSyncState model."""
+    
+    list_display = [
+        'marketplace', 'status', 'run_type', 'pages_committed',
+        'orders_processed', 'updated_after', 'last_reconciled_at', 'updated_at'
+    ]
+    list_filter = ['status', 'run_type']
+    search_fields = ['marketplace__name', 'marketplace__code']
+    readonly_fields = [
+        'marketplace', 'run_type', 'run_since', 'run_high_water_mark', 'page_token',
+        'pages_committed', 'orders_processed', 'orders_created',
+        'orders_updated', 'orders_unchanged', 'orders_errors',
+        'last_reconciled_at', 'run_started_at', 'run_completed_at', 'last_error',
+        'created_at', 'updated_at'
+    ]
+    
+    actions = ['reset_cursor']
+    
+    def reset_cursor(self, request, queryset):
+        """Discard interrupted runs so the next sync starts from the first page."""
+        updated = queryset.update(status='idle', page_token='')
+        self.message_user(request, f'{updated} sync states reset.')
+    
+    reset_cursor.short_description = 'Reset sync cursor'
+    
+    def get_queryset(self, request):
+        """Optimize queryset with select_related."""
+        return super().get_queryset(request).select_related('marketplace')
+
+
+@admin.register(MarketplaceSyncJob)
+class MarketplaceSyncJobAdmin(admin.ModelAdmin):
+    """Admin interface for MarketplaceSyncJob model."""
+    
+    list_display = [
+        'id', 'marketplace', 'sync_type', 'status',
+        'progress_percentage', 'requested_by', 'created_at', 'completed_at'
+    ]
+    list_filter = ['status', 'sync_type', 'marketplace']
+    readonly_fields = [
+        'marketplace', 'sync_type', 'status', 'phases', 'task_id',
+        'requested_by', 'created_at', 'started_at', 'completed_at', 'updated_at'
+    ]
+    
+    def get_queryset(self, request):
+        """Optimize queryset with select_related."""
+        return super().get_queryset(request).select_related('marketplace', 'requested_by')
+    
+    def progress_percentage(self, obj):
+        """Display phase progress."""
+        return f"{obj.progress_percentage}%"
+    progress_percentage.short_description = 'Progress'
@@ -8,5 +8,4 @@ class MarketplacesConfig(AppConfig):
     
     def ready(self):
         """Import signal handlers when the app is ready."""
-        # Import signals here if needed in the future
-        pass
+        from . import signals  # noqa: F401
@@ -6,15 +6,24 @@ from abc import ABC, abstractmethod
 from typing import Any, Dict, List, Optional, Tuple
 from datetime import datetime
 from decimal import Decimal
+from email.utils import parsedate_to_datetime
+import time
 import logging
 
 from django.core.exceptions import ValidationError
 from tenacity import retry, stop_after_attempt, wait_exponential
 
+from core.utils.rate_limit import RateLimiter, get_rate_limiter
+
 
 logger = logging.getLogger(__name__)
 
 
+# Response headers carrying the API's own view of the quota
+REMAINING_HEADERS = ('X-RateLimit-Remaining', 'RateLimit-Remaining', 'X-Rate-Limit-Remaining')
+RESET_HEADERS = ('X-RateLimit-Reset', 'RateLimit-Reset', 'X-Rate-Limit-Reset')
+
+
 class MarketplaceConnectorBase(ABC):
     """
     Abstract base class for marketplace connectors.
@@ -26,6 +35,12 @@ class MarketplaceConnectorBase(ABC):
     connector_version: str = "1.0.0"
     supported_operations: List[str] = []
     marketplace_type: str = "base"
+    # Maximum SKUs per bulk_update_inventory() call accepted by the marketplace API
+    inventory_batch_size: int = 100
+    # Orders per fetch_order_page() call
+    order_page_size: int = 100
+    # Maximum orders per bulk_acknowledge_orders() call
+    acknowledge_batch_size: int = 50
     
     def __init__(self, marketplace):
         """
@@ -39,6 +54,7 @@ class MarketplaceConnectorBase(ABC):
         self._connection = None
         self._last_sync = None
         self._rate_limiter = None
+        self._consecutive_throttles = 0
     
     @property
     def credentials(self) -> Dict[str, Any]:
@@ -150,6 +166,27 @@ class MarketplaceConnectorBase(ABC):
         """
         pass
     
+    def fetch_order_page(self, updated_after: Optional[datetime] = None,
+                         page_token: Optional[str] = None,
+                         page_size: Optional[int] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Fetch one page of orders updated after a given time.
+        
+        Connectors whose marketplace supports paging should override this;
+        the default fetches everything with fetch_orders() as one page.
+        
+        Args:
+            updated_after: Only return orders updated after this time
+            page_token: Token returned with the previous page, None for the first
+            page_size: Orders per page (defaults to order_page_size)
+            
+        Returns:
+            Tuple of (orders, token of the next page or None if this was the last)
+        """
+        if page_token:
+            return [], None
+        return self.fetch_orders(since=updated_after), None
+    
     @abstractmethod
     def get_order(self, order_id: str) -> Optional[Dict[str, Any]]:
         """
@@ -176,6 +213,34 @@ class MarketplaceConnectorBase(ABC):
         """
         pass
     
+    def bulk_acknowledge_orders(self, order_ids: List[str]) -> Dict[str, Any]:
+        """
+        Acknowledge several orders.
+        
+        Calls acknowledge_order() per order; connectors whose marketplace
+        has a batch endpoint should override this with one request.
+        
+        Args:
+            order_ids: Marketplace order IDs, at most acknowledge_batch_size
+            
+        Returns:
+            Results dictionary with success/failed order IDs
+        """
+        results = {'success': [], 'failed': []}
+        for order_id in order_ids:
+            try:
+                acknowledged = self.acknowledge_order(order_id)
+                error = 'Acknowledge failed'
+            except Exception as e:
+                acknowledged = False
+                error = str(e)
+            
+            if acknowledged:
+                results['success'].append(order_id)
+            else:
+                results['failed'].append({'order_id': order_id, 'error': error})
+        return results
+    
     @abstractmethod
     def update_order_status(self, order_id: str, status: str, **kwargs) -> bool:
         """
@@ -337,7 +402,8 @@ class MarketplaceConnectorBase(ABC):
             Response data
         """
         # This is a placeholder - actual implementation would use httpx or requests
-        # Each connector should implement their specific request logic
+        # Each connector should implement their specific request logic and
+        # pass every response to handle_rate_limit()
         raise NotImplementedError("Subclasses must implement make_request")
     
     def log_activity(self, activity_type: str, details: Dict[str, Any], 
@@ -413,33 +479,104 @@ class MarketplaceConnectorBase(ABC):
         """
         return self.marketplace.calculate_marketplace_fees(order_amount)
     
+    @property
+    def rate_limiter(self) -> RateLimiter:
+        """Token-bucket limiter shared by every worker calling this marketplace."""
+        if self._rate_limiter is None:
+            self._rate_limiter = get_rate_limiter(
+                f"marketplace:{self.marketplace.pk}",
+                self.marketplace.rate_limit_requests,
+                self.marketplace.rate_limit_window
+            )
+        return self._rate_limiter
+    
+    def throttle(self, tokens: int = 1, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for request budget before calling the marketplace API.
+        
+        Bulk pipelines call this once per API call; a False return means
+        the budget did not refill in time and the work should be deferred.
+        
+        Args:
+            tokens: Number of API calls about to be made
+            timeout: Maximum seconds to wait; None waits indefinitely
+            
+        Returns:
+            True if the budget was acquired
+        """
+        return self.rate_limiter.acquire(tokens, timeout=timeout)
+    
     def handle_rate_limit(self, response: Any) -> None:
         """
-        Handle rate limiting from marketplace API.
+        Align the shared limiter with rate limit headers of an API response.
+        
+        Remaining-quota headers cap the bucket, so every worker slows down
+        before the marketplace starts rejecting calls. Retry-After, or an
+        exhausted quota's reset time, pauses the bucket; a 429 without
+        either backs off exponentially up to the rate limit window.
         
         Args:
-            response: API response object
+            response: API response object with headers and status_code
         """
-        # Override in subclasses to handle specific rate limit headers
-        pass
+        headers = getattr(response, 'headers', None) or {}
+        status_code = getattr(response, 'status_code', None)
+        
+        remaining = self._header_number(headers, REMAINING_HEADERS)
+        reset = self._header_number(headers, RESET_HEADERS)
+        pause = self._header_number(headers, ('Retry-After',)) or 0
+        
+        if status_code == 429:
+            self._consecutive_throttles += 1
+            if not pause:
+                pause = reset or min(
+                    2 ** self._consecutive_throttles,
+                    self.marketplace.rate_limit_window
+                )
+            logger.warning(f"Rate limited by {self.marketplace.name}, pausing requests for {pause:.1f}s")
+        else:
+            self._consecutive_throttles = 0
+            if remaining is not None and remaining <= 0 and reset:
+                pause = reset
+        
+        if remaining is not None or pause:
+            self.rate_limiter.adjust(remaining=remaining, pause_seconds=pause)
+    
+    @staticmethod
+    def _header_number(headers: Dict[str, Any], names: Tuple[str, ...]) -> Optional[float]:
+        """
+        Read the first present header as a number.
+        
+        HTTP dates and epoch timestamps are converted to seconds from now.
+        """
+        for name in names:
+            value = headers.get(name)
+            if value in (None, ''):
+                continue
+            try:
+                number = float(value)
+            except (TypeError, ValueError):
+                try:
+                    return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+                except (TypeError, ValueError):
+                    return None
+            # Reset headers are either a delay or a Unix timestamp
+            return max(0.0, number - time.time()) if number > 1e9 else number
+        return None
     
     def get_rate_limit_info(self) -> Dict[str, Any]:
         """
         Get current rate limit information for the API.
         
         Returns:
-            Dictionary with rate limit details
+            Dictionary with live token-bucket state; reset_time is the
+            number of seconds until the bucket is full again
         """
-        return {
-            'requests_remaining': None,
-            'reset_time': None,
-            'limit': self.marketplace.rate_limit_requests,
-            'window': self.marketplace.rate_limit_window
-        }
+        return self.rate_limiter.get_state()
     
     def close(self) -> None:
         """Clean up any open connections or resources."""
         if self._connection:
             # Close connection if applicable
             self._connection = None
-        self._credentials = None
\ No newline at end of file
+        self._credentials = None
+        self._rate_limiter = None
\ No newline at end of file
@@ -0,0 +1,69 @@
+"""
+Management command to backfill normalized order lines from order_items.
+Orders ingested before the order line table existed only carry their
+items in the order_items JSON; this writes their lines in batches.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from marketplaces.models import Marketplace, MarketplaceOrder
+from marketplaces.sync import build_order_lines
+
+
+class Command(BaseCommand):
+    help = 'Populate marketplace order lines from existing orders'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--marketplace',
+            type=str,
+            help='Code of specific marketplace to backfill (all if not provided)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Orders per transaction (default: 1000)',
+        )
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='Rewrite lines of orders that already have them',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size <= 0:
+            raise CommandError('--batch-size must be positive')
+
+        orders = MarketplaceOrder.objects.all()
+        if options.get('marketplace'):
+            try:
+                marketplace = Marketplace.objects.get(code=options['marketplace'])
+            except Marketplace.DoesNotExist:
+                raise CommandError(f'Marketplace with code "{options["marketplace"]}" does not exist')
+            orders = orders.filter(marketplace=marketplace)
+        if not options['rebuild']:
+            orders = orders.filter(lines__isnull=True)
+
+        orders = orders.only('id', 'marketplace_id', 'marketplace_order_id', 'order_items', 'ordered_at')
+
+        orders_done = 0
+        lines_written = 0
+        last_id = 0
+        while True:
+            # Keyset pagination, so orders given lines drop out of the filter safely
+            batch = list(orders.filter(id__gt=last_id).order_by('id')[:batch_size])
+            if not batch:
+                break
+
+            with transaction.atomic():
+                lines_written += build_order_lines(batch, replace=options['rebuild'])
+
+            orders_done += len(batch)
+            last_id = batch[-1].id
+            self.stdout.write(f'Processed {orders_done} orders, {lines_written} lines written')
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Backfilled {lines_written} order lines from {orders_done} orders')
+        )
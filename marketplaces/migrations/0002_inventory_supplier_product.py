@@ -0,0 +1,20 @@
+# Generated by Django 5.1.5 on 2026-10-18 21:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketplaces', '0001_initial'),
+        ('suppliers', '0004_sync_state_shards'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='marketplaceinventory',
+            name='supplier_product',
+            field=models.ForeignKey(blank=True, help_text='Supplier product whose stock feeds this SKU', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='marketplace_inventory', to='suppliers.supplierproduct'),
+        ),
+    ]
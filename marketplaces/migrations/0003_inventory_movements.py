@@ -0,0 +1,59 @@
+# Generated by Django 5.1.5 on 2026-10-18 21:40
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+from django.utils.dateparse import parse_datetime
+
+
+def copy_quantity_changes(apps, schema_editor):
+    """Move the JSON change history into the movement table."""
+    MarketplaceInventory = apps.get_model('marketplaces', 'MarketplaceInventory')
+    InventoryMovement = apps.get_model('marketplaces', 'InventoryMovement')
+
+    movements = []
+    rows = MarketplaceInventory.objects.exclude(quantity_changes=[]).values_list('id', 'quantity_changes')
+    for inventory_id, changes in rows.iterator(chunk_size=1000):
+        for change in changes if isinstance(changes, list) else []:
+            movements.append(InventoryMovement(
+                inventory_id=inventory_id,
+                old_quantity=change.get('old_quantity') or 0,
+                new_quantity=change.get('new_quantity') or 0,
+                reason=(change.get('reason') or '')[:100],
+                created_at=parse_datetime(change.get('timestamp') or '') or django.utils.timezone.now()
+            ))
+        if len(movements) >= 5000:
+            InventoryMovement.objects.bulk_create(movements)
+            movements = []
+    InventoryMovement.objects.bulk_create(movements)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketplaces', '0002_inventory_supplier_product'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventoryMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('old_quantity', models.IntegerField()),
+                ('new_quantity', models.IntegerField()),
+                ('reason', models.CharField(blank=True, help_text='Reason for change', max_length=100)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('inventory', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='movements', to='marketplaces.marketplaceinventory')),
+            ],
+            options={
+                'db_table': 'marketplace_inventory_movements',
+                'ordering': ['-created_at', '-id'],
+                'indexes': [models.Index(fields=['inventory', '-created_at'], name='marketplace_invento_5b86b3_idx'), models.Index(fields=['created_at'], name='marketplace_created_8fd053_idx')],
+            },
+        ),
+        migrations.RunPython(copy_quantity_changes, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='marketplaceinventory',
+            name='quantity_changes',
+        ),
+    ]
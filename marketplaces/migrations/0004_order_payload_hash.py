@@ -0,0 +1,18 @@
+# Generated by Django 5.1.5 on 2026-10-18 21:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketplaces', '0003_inventory_movements'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='marketplaceorder',
+            name='payload_hash',
+            field=models.CharField(blank=True, help_text='Fingerprint of the last marketplace payload, used to skip unchanged orders', max_length=64),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.1.5 on 2026-10-18 21:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketplaces', '0004_order_payload_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MarketplaceOrderSyncState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('idle', 'Idle'), ('running', 'Running'), ('failed', 'Failed'), ('completed', 'Completed')], default='idle', max_length=20)),
+                ('run_type', models.CharField(choices=[('incremental', 'Incremental'), ('reconcile', 'Reconciliation')], default='incremental', max_length=20)),
+                ('updated_after', models.DateTimeField(blank=True, help_text='Latest marketplace-side order update time covered by a completed sync', null=True)),
+                ('run_since', models.DateTimeField(blank=True, help_text='Update time the current run fetches from', null=True)),
+                ('run_high_water_mark', models.DateTimeField(blank=True, help_text='Latest marketplace-side update time committed in the current run', null=True)),
+                ('page_token', models.CharField(blank=True, help_text='Connector page token of the next page in the current run', max_length=1024)),
+                ('pages_committed', models.IntegerField(default=0)),
+                ('orders_processed', models.IntegerField(default=0)),
+                ('orders_created', models.IntegerField(default=0)),
+                ('orders_updated', models.IntegerField(default=0)),
+                ('orders_unchanged', models.IntegerField(default=0)),
+                ('orders_errors', models.IntegerField(default=0)),
+                ('last_reconciled_at', models.DateTimeField(blank=True, null=True)),
+                ('run_started_at', models.DateTimeField(blank=True, null=True)),
+                ('run_completed_at', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('marketplace', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='order_sync_state', to='marketplaces.marketplace')),
+            ],
+            options={
+                'verbose_name': 'Marketplace Order Sync State',
+                'verbose_name_plural': 'Marketplace Order Sync States',
+                'db_table': 'marketplace_order_sync_states',
+            },
+        ),
+    ]
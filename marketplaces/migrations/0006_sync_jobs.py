@@ -0,0 +1,38 @@
+# Generated by Django 5.1.5 on 2026-10-18 21:47
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketplaces', '0005_order_sync_state'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MarketplaceSyncJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sync_type', models.CharField(choices=[('all', 'All'), ('orders', 'Orders'), ('listings', 'Listings'), ('inventory', 'Inventory')], default='all', max_length=20)),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='queued', max_length=20)),
+                ('phases', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder, help_text='Status, result and error of each phase')),
+                ('task_id', models.CharField(blank=True, help_text='Celery task running the job', max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('marketplace', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sync_jobs', to='marketplaces.marketplace')),
+                ('requested_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='marketplace_sync_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'marketplace_sync_jobs',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['marketplace', '-created_at'], name='marketplace_marketp_8f7d52_idx')],
+            },
+        ),
+    ]
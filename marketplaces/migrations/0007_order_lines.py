@@ -0,0 +1,39 @@
+# Generated by Django 5.1.5 on 2026-10-18 21:52
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketplaces', '0006_sync_jobs'),
+        ('suppliers', '0004_sync_state_shards'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MarketplaceOrderLine',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('line_number', models.PositiveIntegerField(help_text='Position of the item in order_items')),
+                ('sku', models.CharField(blank=True, help_text='Marketplace SKU of the item', max_length=255)),
+                ('title', models.CharField(blank=True, max_length=500)),
+                ('quantity', models.IntegerField(default=1)),
+                ('unit_price', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=10)),
+                ('total_price', models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='Unit price times quantity', max_digits=12)),
+                ('ordered_at', models.DateTimeField()),
+                ('listing', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='order_lines', to='marketplaces.marketplacelisting')),
+                ('marketplace', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='order_lines', to='marketplaces.marketplace')),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lines', to='marketplaces.marketplaceorder')),
+                ('supplier_product', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='marketplace_order_lines', to='suppliers.supplierproduct')),
+            ],
+            options={
+                'db_table': 'marketplace_order_lines',
+                'ordering': ['order', 'line_number'],
+                'indexes': [models.Index(fields=['marketplace', 'sku', 'ordered_at'], name='marketplace_marketp_4ef334_idx'), models.Index(fields=['ordered_at'], name='marketplace_ordered_afe555_idx')],
+                'constraints': [models.UniqueConstraint(fields=('order', 'line_number'), name='unique_order_line_number')],
+            },
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.1.5 on 2026-10-18 21:55
+
+import hashlib
+import json
+from decimal import Decimal
+
+from django.db import migrations, models
+
+
+def listing_content_hash(listing):
+    """
+    Fingerprint of the listing's push payload, as defined when this
+    migration was written. Kept inline so later model changes cannot
+    change what this migration computes.
+    """
+    sale_price = listing.sale_price
+    payload = {
+        'title': listing.title,
+        'description': listing.description,
+        'price': f"{Decimal(str(listing.price)):.2f}",
+        'sale_price': f"{Decimal(str(sale_price)):.2f}" if sale_price is not None else None,
+        'quantity': int(listing.quantity_listed),
+        'category_id': listing.marketplace_category_id,
+    }
+    canonical = json.dumps(payload, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def baseline_pushed_hashes(apps, schema_editor):
+    """
+    Treat existing listings as in sync, so the first push only sends
+    listings edited after this migration.
+    """
+    MarketplaceListing = apps.get_model('marketplaces', 'MarketplaceListing')
+    batch = []
+    for listing in MarketplaceListing.objects.all().iterator(chunk_size=1000):
+        listing.pushed_hash = listing_content_hash(listing)
+        batch.append(listing)
+        if len(batch) >= 1000:
+            MarketplaceListing.objects.bulk_update(batch, ['pushed_hash'])
+            batch = []
+    MarketplaceListing.objects.bulk_update(batch, ['pushed_hash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketplaces', '0007_order_lines'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='marketplacelisting',
+            name='payload_hash',
+            field=models.CharField(blank=True, help_text='Fingerprint of the last marketplace payload applied', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='marketplacelisting',
+            name='pushed_hash',
+            field=models.CharField(blank=True, help_text='Content hash the marketplace last had, pushed or synced', max_length=64),
+        ),
+        migrations.RunPython(baseline_pushed_hashes, migrations.RunPython.noop),
+    ]
@@ -2,17 +2,34 @@
 Marketplace models for managing marketplace integrations, listings, orders, and inventory.
 """
 import json
+import hashlib
 from decimal import Decimal
 from typing import Any, Dict, Optional, List
 
 from django.db import models
 from django.contrib.auth.models import User
+from django.core.serializers.json import DjangoJSONEncoder
 from django.core.exceptions import ValidationError
+from django.db.models import Count, F, Q, Sum
 from django.utils import timezone
 
 from .utils.encryption import credential_encryption
 
 
+def compute_payload_hash(data: Any) -> str:
+    """
+    Compute a stable fingerprint of a JSON-like payload.
+    
+    Args:
+        data: Payload to fingerprint
+        
+    Returns:
+        SHA-256 hex digest of the canonical JSON form
+    """
+    canonical = json.dumps(data, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
 class Marketplace(models.Model):
     """
     Represents a marketplace platform (e.g., Amazon, eBay, Shopify).
@@ -242,6 +259,8 @@ class Marketplace(models.Model):
         if not isinstance(credentials, dict):
             raise ValidationError("Credentials must be a dictionary")
         
+        # Drop the cached plaintext for the credentials being replaced
+        credential_encryption.invalidate(self.encrypted_credentials)
         self.encrypted_credentials = credential_encryption.encrypt_credentials(credentials)
     
     def get_decrypted_credentials(self) -> Optional[Dict[str, Any]]:
@@ -269,6 +288,46 @@ class Marketplace(models.Model):
         self.last_sync_error = error_message if not success else ""
         self.save(update_fields=['last_sync_at', 'last_sync_status', 'last_sync_error'])
     
+    def adjust_totals(self, listings: int = 0, orders: int = 0,
+                      revenue: Decimal = Decimal('0.00')) -> None:
+        """
+        Apply deltas to the statistics counters with one atomic UPDATE.
+        
+        Callers pass the change caused by the rows they wrote, so the
+        counters stay current without re-aggregating the listing and
+        order tables.
+        
+        Args:
+            listings: Change in the number of active listings
+            orders: Number of orders added
+            revenue: Change in revenue from shipped and delivered orders
+        """
+        if not (listings or orders or revenue):
+            return
+        
+        Marketplace.objects.filter(pk=self.pk).update(
+            total_listings=F('total_listings') + listings,
+            total_orders=F('total_orders') + orders,
+            total_revenue=F('total_revenue') + revenue
+        )
+        self.refresh_from_db(fields=['total_listings', 'total_orders', 'total_revenue'])
+    
+    def recount_totals(self) -> None:
+        """
+        Recompute the statistics counters from the listing and order tables.
+        
+        Corrects drift from writes that bypass adjust_totals(), such as
+        admin or API edits of order status. Runs one aggregate per table.
+        """
+        self.total_listings = self.listings.filter(status='active').count()
+        order_totals = self.orders.aggregate(
+            total=Count('id'),
+            revenue=Sum('total_amount', filter=Q(status__in=MarketplaceOrder.REVENUE_STATUSES))
+        )
+        self.total_orders = order_totals['total']
+        self.total_revenue = order_totals['revenue'] or Decimal('0.00')
+        self.save(update_fields=['total_listings', 'total_orders', 'total_revenue'])
+    
     def get_connector(self):
         """
         Get the appropriate connector instance for this marketplace.
@@ -470,6 +529,18 @@ class MarketplaceListing(models.Model):
         help_text="Number of consecutive errors"
     )
     
+    # Change detection
+    payload_hash = models.CharField(
+        max_length=64,
+        blank=True,
+        help_text="Fingerprint of the last marketplace payload applied"
+    )
+    pushed_hash = models.CharField(
+        max_length=64,
+        blank=True,
+        help_text="Content hash the marketplace last had, pushed or synced"
+    )
+    
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -528,6 +599,30 @@ class MarketplaceListing(models.Model):
         self.last_synced_at = timezone.now()
         self.error_message = ""
         self.error_count = 0
+    
+    def get_push_payload(self) -> Dict[str, Any]:
+        """
+        Listing content sent to the marketplace by update_listing().
+        
+        Uses the marketplace field names of update_from_marketplace(),
+        with prices as two-decimal strings.
+        
+        Returns:
+            Dictionary of listing data
+        """
+        sale_price = self.sale_price
+        return {
+            'title': self.title,
+            'description': self.description,
+            'price': f"{Decimal(str(self.price)):.2f}",
+            'sale_price': f"{Decimal(str(sale_price)):.2f}" if sale_price is not None else None,
+            'quantity': int(self.quantity_listed),
+            'category_id': self.marketplace_category_id,
+        }
+    
+    def compute_content_hash(self) -> str:
+        """Fingerprint of get_push_payload(), compared with pushed_hash."""
+        return compute_payload_hash(self.get_push_payload())
 
 
 class MarketplaceOrder(models.Model):
@@ -548,6 +643,9 @@ class MarketplaceOrder(models.Model):
         ('error', 'Error'),
     ]
     
+    # Statuses counted towards Marketplace.total_revenue
+    REVENUE_STATUSES = ('shipped', 'delivered')
+    
     # Relationships
     marketplace = models.ForeignKey(
         Marketplace,
@@ -662,6 +760,11 @@ class MarketplaceOrder(models.Model):
         blank=True,
         help_text="Internal notes about the order"
     )
+    payload_hash = models.CharField(
+        max_length=64,
+        blank=True,
+        help_text="Fingerprint of the last marketplace payload, used to skip unchanged orders"
+    )
     
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
@@ -694,6 +797,40 @@ class MarketplaceOrder(models.Model):
             self.internal_order_number = f"{prefix}-{timestamp}"
         super().save(*args, **kwargs)
     
+    @staticmethod
+    def build_internal_order_number(marketplace: Marketplace, marketplace_order_id: str) -> str:
+        """
+        Build a unique internal order number without a database round trip.
+        
+        Used for bulk-created orders, where save() is not called.
+        
+        Args:
+            marketplace: Marketplace the order belongs to
+            marketplace_order_id: Order ID from marketplace
+            
+        Returns:
+            Internal order reference number
+        """
+        prefix = marketplace.order_prefix or marketplace.code.upper()
+        number = f"{prefix}-{marketplace_order_id}"
+        if len(number) > 100:
+            digest = hashlib.sha256(str(marketplace_order_id).encode('utf-8')).hexdigest()[:32]
+            number = f"{prefix[:60]}-{digest}"
+        return number
+    
+    @staticmethod
+    def compute_payload_hash(data: Dict[str, Any]) -> str:
+        """
+        Compute a stable fingerprint of a marketplace order payload.
+        
+        Args:
+            data: Dictionary of order data from marketplace
+            
+        Returns:
+            SHA-256 hex digest of the canonical JSON form
+        """
+        return compute_payload_hash(data)
+    
     @property
     def net_revenue(self) -> Decimal:
         """Calculate net revenue after marketplace fees."""
@@ -718,11 +855,286 @@ class MarketplaceOrder(models.Model):
             tracking_number: Shipment tracking number
             carrier: Shipping carrier name
         """
+        counted = self.status in self.REVENUE_STATUSES
         self.status = 'shipped'
         self.tracking_number = tracking_number
         self.carrier = carrier
         self.shipped_at = timezone.now()
         self.save(update_fields=['status', 'tracking_number', 'carrier', 'shipped_at', 'updated_at'])
+        if not counted:
+            self.marketplace.adjust_totals(revenue=self.total_amount)
+
+
+class MarketplaceOrderLine(models.Model):
+    """
+    One item of a marketplace order, normalized from order_items.
+    Written when orders are ingested so sales can be joined to listings
+    and supplier products by SKU in SQL. Marketplace and order date are
+    copied from the order for the (marketplace, sku, ordered_at) index.
+    """
+    
+    order = models.ForeignKey(
+        MarketplaceOrder,
+        on_delete=models.CASCADE,
+        related_name='lines'
+    )
+    marketplace = models.ForeignKey(
+        Marketplace,
+        on_delete=models.CASCADE,
+        related_name='order_lines'
+    )
+    listing = models.ForeignKey(
+        MarketplaceListing,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='order_lines'
+    )
+    supplier_product = models.ForeignKey(
+        'suppliers.SupplierProduct',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='marketplace_order_lines'
+    )
+    line_number = models.PositiveIntegerField(
+        help_text="Position of the item in order_items"
+    )
+    sku = models.CharField(
+        max_length=255,
+        blank=True,
+        help_text="Marketplace SKU of the item"
+    )
+    title = models.CharField(max_length=500, blank=True)
+    quantity = models.IntegerField(default=1)
+    unit_price = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        default=Decimal('0.00')
+    )
+    total_price = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        help_text="Unit price times quantity"
+    )
+    ordered_at = models.DateTimeField()
+    
+    class Meta:
+        db_table = 'marketplace_order_lines'
+        ordering = ['order', 'line_number']
+        constraints = [
+            models.UniqueConstraint(fields=['order', 'line_number'], name='unique_order_line_number'),
+        ]
+        indexes = [
+            models.Index(fields=['marketplace', 'sku', 'ordered_at']),
+            models.Index(fields=['ordered_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.order_id} #{self.line_number}: {self.sku} x {self.quantity}"
+    
+    @classmethod
+    def from_item(cls, order: MarketplaceOrder, line_number: int,
+                  item: Dict[str, Any]) -> 'MarketplaceOrderLine':
+        """
+        Build an unsaved line from one order_items entry.
+        
+        Args:
+            order: Order the item belongs to
+            line_number: Position of the item in order_items
+            item: Item with sku, title, quantity and price
+            
+        Returns:
+            Unsaved order line without listing or supplier product
+        """
+        quantity = int(item.get('quantity', 1) or 0)
+        unit_price = Decimal(str(item.get('price', 0) or 0))
+        return cls(
+            order=order,
+            marketplace_id=order.marketplace_id,
+            line_number=line_number,
+            sku=str(item.get('sku') or '')[:255],
+            title=str(item.get('title') or '')[:500],
+            quantity=quantity,
+            unit_price=unit_price,
+            total_price=unit_price * quantity,
+            ordered_at=order.ordered_at
+        )
+
+
+class MarketplaceOrderSyncState(models.Model):
+    """
+    Persisted cursor of a marketplace's incremental order sync.
+    
+    Incremental runs fetch orders updated after the cursor, one connector
+    page at a time; the page token and counters are saved in the same
+    transaction as each page of orders, so an interrupted run resumes
+    after the last committed page. Reconciliation runs periodically
+    re-read a fixed window to catch changes the cursor missed.
+    """
+    
+    # Status choices
+    STATUS_CHOICES = [
+        ('idle', 'Idle'),
+        ('running', 'Running'),
+        ('failed', 'Failed'),
+        ('completed', 'Completed'),
+    ]
+    
+    RUN_TYPE_CHOICES = [
+        ('incremental', 'Incremental'),
+        ('reconcile', 'Reconciliation'),
+    ]
+    
+    marketplace = models.OneToOneField(
+        Marketplace,
+        on_delete=models.CASCADE,
+        related_name='order_sync_state'
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='idle'
+    )
+    run_type = models.CharField(
+        max_length=20,
+        choices=RUN_TYPE_CHOICES,
+        default='incremental'
+    )
+    
+    # Watermarks
+    updated_after = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Latest marketplace-side order update time covered by a completed sync"
+    )
+    run_since = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Update time the current run fetches from"
+    )
+    run_high_water_mark = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Latest marketplace-side update time committed in the current run"
+    )
+    
+    # Cursor
+    page_token = models.CharField(
+        max_length=1024,
+        blank=True,
+        help_text="Connector page token of the next page in the current run"
+    )
+    pages_committed = models.IntegerField(default=0)
+    
+    # Progress counters for the current run
+    orders_processed = models.IntegerField(default=0)
+    orders_created = models.IntegerField(default=0)
+    orders_updated = models.IntegerField(default=0)
+    orders_unchanged = models.IntegerField(default=0)
+    orders_errors = models.IntegerField(default=0)
+    
+    last_reconciled_at = models.DateTimeField(null=True, blank=True)
+    run_started_at = models.DateTimeField(null=True, blank=True)
+    run_completed_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    
+    # Timestamps
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    COUNTER_FIELDS = [
+        'orders_processed', 'orders_created', 'orders_updated',
+        'orders_unchanged', 'orders_errors'
+    ]
+    
+    class Meta:
+        db_table = 'marketplace_order_sync_states'
+        verbose_name = 'Marketplace Order Sync State'
+        verbose_name_plural = 'Marketplace Order Sync States'
+    
+    def __str__(self):
+        return f"{self.marketplace.name} order sync ({self.status}, {self.pages_committed} pages)"
+    
+    @property
+    def is_resumable(self) -> bool:
+        """Whether an earlier run stopped before committing every page."""
+        return self.status in ('running', 'failed')
+    
+    def start_run(self, run_type: str, since=None) -> None:
+        """
+        Begin a new run from the first page.
+        
+        Args:
+            run_type: 'incremental' or 'reconcile'
+            since: Fetch orders updated after this time
+        """
+        self.status = 'running'
+        self.run_type = run_type
+        self.run_since = since
+        self.run_high_water_mark = None
+        self.page_token = ''
+        self.pages_committed = 0
+        for field in self.COUNTER_FIELDS:
+            setattr(self, field, 0)
+        self.run_started_at = timezone.now()
+        self.run_completed_at = None
+        self.last_error = ''
+        self.save()
+    
+    def record_page(self, next_page_token: Optional[str], stats: Dict[str, int],
+                    page_high_water_mark=None) -> None:
+        """
+        Advance the cursor past a committed page.
+        
+        Call inside the transaction that wrote the page's orders.
+        
+        Args:
+            next_page_token: Connector token of the next page, if any
+            stats: Ingestion counters for this page only
+            page_high_water_mark: Latest marketplace-side update time on the page
+        """
+        self.page_token = next_page_token or ''
+        self.pages_committed += 1
+        for field in self.COUNTER_FIELDS:
+            setattr(self, field, getattr(self, field) + stats.get(field, 0))
+        
+        if page_high_water_mark and (
+            self.run_high_water_mark is None or page_high_water_mark > self.run_high_water_mark
+        ):
+            self.run_high_water_mark = page_high_water_mark
+        
+        self.save(update_fields=[
+            'page_token', 'pages_committed', 'run_high_water_mark',
+            *self.COUNTER_FIELDS, 'updated_at'
+        ])
+    
+    def complete_run(self) -> None:
+        """
+        Mark the run complete and advance the cursor.
+        
+        Uses the latest marketplace-side update time seen, or the run
+        start time when the marketplace does not report update times.
+        The cursor never moves backwards.
+        """
+        new_mark = self.run_high_water_mark or self.run_started_at
+        if new_mark and (self.updated_after is None or new_mark > self.updated_after):
+            self.updated_after = new_mark
+        if self.run_type == 'reconcile':
+            self.last_reconciled_at = self.run_started_at
+        
+        self.status = 'completed'
+        self.run_completed_at = timezone.now()
+        self.page_token = ''
+        self.last_error = ''
+        self.save()
+    
+    def fail_run(self, error_message: str) -> None:
+        """Record a failure, keeping the cursor so the next run resumes."""
+        self.status = 'failed'
+        self.last_error = error_message
+        self.save(update_fields=['status', 'last_error', 'updated_at'])
 
 
 class MarketplaceInventory(models.Model):
@@ -750,6 +1162,14 @@ class MarketplaceInventory(models.Model):
         on_delete=models.CASCADE,
         related_name='inventory_records'
     )
+    supplier_product = models.ForeignKey(
+        'suppliers.SupplierProduct',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='marketplace_inventory',
+        help_text="Supplier product whose stock feeds this SKU"
+    )
     
     # SKU Mapping
     internal_sku = models.CharField(
@@ -814,13 +1234,6 @@ class MarketplaceInventory(models.Model):
         help_text="Reason for manual override"
     )
     
-    # Tracking
-    quantity_changes = models.JSONField(
-        default=list,
-        blank=True,
-        help_text="History of quantity changes"
-    )
-    
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -848,28 +1261,42 @@ class MarketplaceInventory(models.Model):
         buffer = self.buffer_quantity or self.marketplace.inventory_buffer
         return max(0, self.available_quantity - self.reserved_quantity - buffer)
     
-    def log_quantity_change(self, old_qty: int, new_qty: int, reason: str) -> None:
+    def log_quantity_change(self, old_qty: int, new_qty: int, reason: str) -> 'InventoryMovement':
         """
         Log inventory quantity changes.
         
+        Appends a row to the movement log; the inventory row itself is
+        not rewritten.
+        
         Args:
             old_qty: Previous quantity
             new_qty: New quantity
             reason: Reason for change
+            
+        Returns:
+            The recorded InventoryMovement
         """
-        change_entry = {
-            'timestamp': timezone.now().isoformat(),
-            'old_quantity': old_qty,
-            'new_quantity': new_qty,
-            'reason': reason
-        }
-        
-        if not isinstance(self.quantity_changes, list):
-            self.quantity_changes = []
+        return InventoryMovement.objects.create(
+            inventory=self,
+            old_quantity=old_qty,
+            new_quantity=new_qty,
+            reason=reason
+        )
+    
+    def recent_quantity_changes(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        Get the most recent quantity changes, newest first.
         
-        self.quantity_changes.append(change_entry)
-        # Keep only last 100 changes
-        self.quantity_changes = self.quantity_changes[-100:]
+        Args:
+            limit: Maximum number of changes to return
+            
+        Returns:
+            List of change dictionaries
+        """
+        return [
+            movement.as_dict()
+            for movement in self.movements.order_by('-created_at', '-id')[:limit]
+        ]
     
     def sync_to_marketplace(self) -> bool:
         """
@@ -907,3 +1334,171 @@ class MarketplaceInventory(models.Model):
             self.sync_attempts += 1
             self.save()
             return False
+
+
+class InventoryMovement(models.Model):
+    """
+    Append-only log of inventory quantity changes.
+    Rows are only ever inserted, in batches where possible, and removed
+    by age through purge_inventory_movements.
+    """
+    
+    inventory = models.ForeignKey(
+        MarketplaceInventory,
+        on_delete=models.CASCADE,
+        related_name='movements'
+    )
+    old_quantity = models.IntegerField()
+    new_quantity = models.IntegerField()
+    reason = models.CharField(
+        max_length=100,
+        blank=True,
+        help_text="Reason for change"
+    )
+    created_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        db_table = 'marketplace_inventory_movements'
+        ordering = ['-created_at', '-id']
+        indexes = [
+            models.Index(fields=['inventory', '-created_at']),
+            models.Index(fields=['created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.inventory_id}: {self.old_quantity} -> {self.new_quantity} ({self.reason})"
+    
+    def as_dict(self) -> Dict[str, Any]:
+        """Change entry in the format of the former quantity_changes list."""
+        return {
+            'timestamp': self.created_at.isoformat(),
+            'old_quantity': self.old_quantity,
+            'new_quantity': self.new_quantity,
+            'reason': self.reason
+        }
+
+
+class MarketplaceSyncJob(models.Model):
+    """
+    On-demand marketplace sync run in the background.
+    Requested from the API or admin; a Celery task runs each phase in
+    turn and records its status and result here for polling.
+    """
+    
+    # Status choices
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+    
+    SYNC_TYPE_CHOICES = [
+        ('all', 'All'),
+        ('orders', 'Orders'),
+        ('listings', 'Listings'),
+        ('inventory', 'Inventory'),
+    ]
+    
+    # Phases run for each sync type, in order
+    PHASES = {
+        'all': ['orders', 'listings', 'inventory'],
+        'orders': ['orders'],
+        'listings': ['listings'],
+        'inventory': ['inventory'],
+    }
+    
+    marketplace = models.ForeignKey(
+        Marketplace,
+        on_delete=models.CASCADE,
+        related_name='sync_jobs'
+    )
+    sync_type = models.CharField(
+        max_length=20,
+        choices=SYNC_TYPE_CHOICES,
+        default='all'
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='queued'
+    )
+    phases = models.JSONField(
+        default=dict,
+        encoder=DjangoJSONEncoder,
+        help_text="Status, result and error of each phase"
+    )
+    task_id = models.CharField(
+        max_length=255,
+        blank=True,
+        help_text="Celery task running the job"
+    )
+    requested_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='marketplace_sync_jobs'
+    )
+    
+    # Timestamps
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'marketplace_sync_jobs'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['marketplace', '-created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_sync_type_display()} sync of {self.marketplace.name} ({self.status})"
+    
+    @classmethod
+    def initial_phases(cls, sync_type: str) -> Dict[str, Dict[str, Any]]:
+        """Build the queued phase entries for a sync type."""
+        return {
+            phase: {'status': 'queued', 'result': {}, 'error': '', 'started_at': None, 'completed_at': None}
+            for phase in cls.PHASES[sync_type]
+        }
+    
+    @property
+    def progress_percentage(self) -> float:
+        """Share of phases that have finished."""
+        if not self.phases:
+            return 0.0
+        finished = sum(1 for phase in self.phases.values() if phase['status'] in ('completed', 'failed'))
+        return round(finished / len(self.phases) * 100, 1)
+    
+    def start_phase(self, phase: str) -> None:
+        """Mark a phase as running."""
+        if self.status == 'queued':
+            self.status = 'running'
+            self.started_at = timezone.now()
+        self.phases[phase].update(status='running', started_at=timezone.now())
+        self.save(update_fields=['status', 'started_at', 'phases', 'updated_at'])
+    
+    def finish_phase(self, phase: str, result: Optional[Dict[str, Any]] = None, error: str = '') -> None:
+        """
+        Record a phase's outcome; the last phase completes the job.
+        
+        Args:
+            phase: Phase name
+            result: Result dictionary of the phase's sync task
+            error: Error message if the phase failed
+        """
+        self.phases[phase].update(
+            status='failed' if error else 'completed',
+            result=result or {},
+            error=error,
+            completed_at=timezone.now()
+        )
+        
+        if all(entry['status'] in ('completed', 'failed') for entry in self.phases.values()):
+            failed = any(entry['status'] == 'failed' for entry in self.phases.values())
+            self.status = 'failed' if failed else 'completed'
+            self.completed_at = timezone.now()
+        self.save(update_fields=['status', 'phases', 'completed_at', 'updated_at'])
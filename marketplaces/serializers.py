@@ -3,7 +3,8 @@ Serializers for marketplace models.
 """
 from rest_framework import serializers
 from .models import (
-    Marketplace, MarketplaceListing, MarketplaceOrder, MarketplaceInventory
+    Marketplace, MarketplaceListing, MarketplaceOrder, MarketplaceInventory,
+    InventoryMovement, MarketplaceSyncJob
 )
 
 
@@ -141,7 +142,7 @@ class MarketplaceInventorySerializer(serializers.ModelSerializer):
             'reserved_quantity', 'marketplace_quantity', 'buffer_quantity',
             'effective_quantity', 'sync_status', 'last_sync_at',
             'last_sync_error', 'sync_attempts', 'manual_override',
-            'override_quantity', 'override_reason', 'quantity_changes',
+            'override_quantity', 'override_reason',
             'created_at', 'updated_at'
         ]
         read_only_fields = [
@@ -155,4 +156,29 @@ class MarketplaceInventorySerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(
                 "Override quantity is required when manual override is enabled"
             )
-        return data
\ No newline at end of file
+        return data
+
+
+class InventoryMovementSerializer(serializers.ModelSerializer):
+    """Serializer for InventoryMovement model."""
+    
+    class Meta:
+        model = InventoryMovement
+        fields = ['id', 'old_quantity', 'new_quantity', 'reason', 'created_at']
+        read_only_fields = fields
+
+
+class MarketplaceSyncJobSerializer(serializers.ModelSerializer):
+    """Serializer for MarketplaceSyncJob model."""
+    
+    marketplace_name = serializers.CharField(source='marketplace.name', read_only=True)
+    progress_percentage = serializers.ReadOnlyField()
+    
+    class Meta:
+        model = MarketplaceSyncJob
+        fields = [
+            'id', 'marketplace', 'marketplace_name', 'sync_type', 'status',
+            'phases', 'progress_percentage', 'task_id', 'created_at',
+            'started_at', 'completed_at', 'updated_at'
+        ]
+        read_only_fields = fields
@@ -0,0 +1,16 @@
+"""
+Signal handlers connecting supplier stock changes to marketplace inventory.
+"""
+from django.db import transaction
+from django.dispatch import receiver
+
+from suppliers.signals import supplier_quantities_changed
+
+
+@receiver(supplier_quantities_changed)
+def queue_inventory_propagation(sender, supplier, quantities, **kwargs):
+    """Queue propagation of changed supplier quantities once the write commits."""
+    from .tasks import propagate_supplier_inventory
+
+    payload = [[product_id, quantity] for product_id, quantity in quantities.items()]
+    transaction.on_commit(lambda: propagate_supplier_inventory.delay(payload))
@@ -0,0 +1,82 @@
+"""
+Marketplace statistics with conditional aggregation and caching.
+Each table is summarized with one aggregate query, counting every status
+bucket with a filtered COUNT, and the result is cached so dashboards
+polling the endpoint can be served values of a bounded age.
+"""
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from .models import Marketplace
+
+
+def compute_marketplace_statistics(marketplace: Marketplace) -> Dict[str, Any]:
+    """
+    Compute listing, order and inventory statistics for a marketplace.
+
+    Args:
+        marketplace: Marketplace to summarize
+
+    Returns:
+        Statistics grouped by table, with the time they were computed
+    """
+    listings = marketplace.listings.aggregate(
+        total=Count('id'),
+        active=Count('id', filter=Q(status='active')),
+        pending=Count('id', filter=Q(status='pending')),
+        error=Count('id', filter=Q(status='error')),
+    )
+    orders = marketplace.orders.aggregate(
+        total=Count('id'),
+        pending=Count('id', filter=Q(status='pending')),
+        processing=Count('id', filter=Q(status='processing')),
+        shipped=Count('id', filter=Q(status='shipped')),
+        revenue=Sum('total_amount'),
+    )
+    orders['revenue'] = orders['revenue'] or 0
+    inventory = marketplace.inventory_items.aggregate(
+        total_skus=Count('id'),
+        synced=Count('id', filter=Q(sync_status='synced')),
+        pending=Count('id', filter=Q(sync_status='pending')),
+        error=Count('id', filter=Q(sync_status='error')),
+    )
+
+    return {
+        'listings': listings,
+        'orders': orders,
+        'inventory': inventory,
+        'computed_at': timezone.now(),
+    }
+
+
+def get_marketplace_statistics(marketplace: Marketplace,
+                               max_age: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Get marketplace statistics, from the cache when fresh enough.
+
+    Args:
+        marketplace: Marketplace to summarize
+        max_age: Oldest cached result to accept, in seconds; 0 always
+            recomputes (defaults to MARKETPLACE_STATS_CACHE_SECONDS)
+
+    Returns:
+        Statistics as returned by compute_marketplace_statistics()
+    """
+    timeout = getattr(settings, 'MARKETPLACE_STATS_CACHE_SECONDS', 60)
+    if max_age is None:
+        max_age = timeout
+
+    key = f'marketplace-stats:{marketplace.pk}'
+    if max_age > 0:
+        stats = cache.get(key)
+        if stats and (timezone.now() - stats['computed_at']).total_seconds() <= max_age:
+            return stats
+
+    stats = compute_marketplace_statistics(marketplace)
+    if timeout > 0:
+        cache.set(key, stats, timeout)
+    return stats
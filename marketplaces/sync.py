@@ -0,0 +1,833 @@
+"""
+Batched write-back pipelines for marketplace synchronization.
+Pushes pending inventory to a marketplace in connector-sized batches with
+one bulk API call each, and records per-SKU results with one bulk_update
+per batch. Supplier stock changes are propagated to the mapped inventory
+rows, marking only rows whose pushed quantity would change, and the
+changes are appended to the inventory movement log in bulk. Listings are
+upserted only when their payload fingerprint changed, and pushed back
+only when their local content hash differs from the last pushed one.
+Order pages are ingested with one existence lookup, one bulk insert and
+one bulk update per chunk, new orders' items are written as normalized
+order lines in bulk, and the marketplace's order and revenue counters
+are adjusted in the same transaction; acknowledgements are sent
+afterwards, outside the transaction.
+"""
+import logging
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from suppliers.models import SupplierProduct
+from .models import (
+    InventoryMovement, Marketplace, MarketplaceInventory, MarketplaceListing,
+    MarketplaceOrder, MarketplaceOrderLine, compute_payload_hash
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+# Fields written back after each inventory push
+INVENTORY_RESULT_FIELDS = [
+    'marketplace_quantity', 'sync_status', 'last_sync_at',
+    'last_sync_error', 'sync_attempts', 'updated_at'
+]
+
+# Fields refreshed on existing listings whose payload changed
+LISTING_UPDATE_FIELDS = [
+    'title', 'description', 'price', 'quantity_listed', 'status', 'views',
+    'marketplace_category_id', 'marketplace_category_name', 'last_synced_at',
+    'error_message', 'error_count', 'payload_hash', 'pushed_hash', 'updated_at'
+]
+
+# Fields written back after each listing push
+LISTING_PUSH_FIELDS = ['pushed_hash', 'last_synced_at', 'error_message', 'error_count', 'updated_at']
+
+# Fields refreshed on existing orders whose payload changed
+ORDER_UPDATE_FIELDS = [
+    'status', 'marketplace_status', 'tracking_number', 'carrier',
+    'marketplace_data', 'payload_hash', 'last_synced_at', 'updated_at'
+]
+
+
+def iter_pending_inventory(marketplace: Marketplace, batch_size: int) -> Iterator[List[MarketplaceInventory]]:
+    """
+    Yield batches of inventory items waiting to be pushed.
+
+    Uses keyset pagination on the primary key, so items written back by
+    earlier batches never shift later ones. Manual overrides are skipped.
+
+    Args:
+        marketplace: Marketplace to read from
+        batch_size: Items per batch
+
+    Yields:
+        Lists of MarketplaceInventory
+    """
+    last_id = 0
+    while True:
+        batch = list(
+            MarketplaceInventory.objects.filter(
+                marketplace=marketplace,
+                sync_status__in=['pending', 'error'],
+                manual_override=False,
+                id__gt=last_id
+            ).order_by('id')[:batch_size]
+        )
+        if not batch:
+            return
+
+        for item in batch:
+            # effective_quantity reads the marketplace buffer; avoid a query per row
+            item.marketplace = marketplace
+        yield batch
+
+        if len(batch) < batch_size:
+            return
+        last_id = batch[-1].id
+
+
+def push_inventory(marketplace: Marketplace, connector: Any = None,
+                   batch_size: Optional[int] = None) -> Dict[str, int]:
+    """
+    Push pending inventory quantities to a marketplace in bulk.
+
+    Each batch costs one read, one bulk_update_inventory() call, and a
+    locked re-read plus one bulk_update of the per-SKU results; rows
+    changed during the call stay pending. A failed API call marks the whole
+    batch as failed and moves on to the next. Each call draws from the
+    marketplace's request budget; when the budget does not refill within
+    MARKETPLACE_RATE_LIMIT_MAX_WAIT_SECONDS the push stops early and
+    reports rate_limited.
+
+    Args:
+        marketplace: Marketplace to push to
+        connector: Connector to use (defaults to marketplace.get_connector())
+        batch_size: SKUs per API call (defaults to the connector's
+            inventory_batch_size, capped by MARKETPLACE_INVENTORY_BATCH_SIZE)
+
+    Returns:
+        Statistics dictionary
+    """
+    connector = connector or marketplace.get_connector()
+    batch_size = batch_size or min(
+        connector.inventory_batch_size,
+        getattr(settings, 'MARKETPLACE_INVENTORY_BATCH_SIZE', 500)
+    )
+
+    stats = {
+        'items_processed': 0,
+        'items_synced': 0,
+        'items_failed': 0,
+        'api_calls': 0,
+        'rate_limited': False
+    }
+
+    max_wait = getattr(settings, 'MARKETPLACE_RATE_LIMIT_MAX_WAIT_SECONDS', 30)
+
+    for batch in iter_pending_inventory(marketplace, batch_size):
+        if not connector.throttle(timeout=max_wait):
+            # Out of request budget; the rest stays pending for the next run
+            logger.info(f"Request budget for {marketplace.name} exhausted, deferring inventory push")
+            stats['rate_limited'] = True
+            break
+
+        stats['items_processed'] += len(batch)
+        quantities = {item.marketplace_sku: item.effective_quantity for item in batch}
+
+        try:
+            stats['api_calls'] += 1
+            results = connector.bulk_update_inventory([
+                {'sku': sku, 'quantity': quantity} for sku, quantity in quantities.items()
+            ])
+            succeeded = set(results.get('success', []))
+            errors = {
+                failure.get('sku'): failure.get('error', 'Update failed')
+                for failure in results.get('failed', [])
+            }
+        except Exception as e:
+            logger.error(f"Bulk inventory update failed for {marketplace.name}: {e}")
+            succeeded = set()
+            errors = {sku: str(e) for sku in quantities}
+
+        _record_push_results(marketplace, [item.id for item in batch], quantities,
+                             succeeded, errors, stats)
+
+    return stats
+
+
+def _record_push_results(marketplace: Marketplace, item_ids: List[int], quantities: Dict[str, int],
+                         succeeded: Set[str], errors: Dict[str, str], stats: Dict[str, Any]) -> None:
+    """
+    Write back the results of one push batch.
+
+    Rows are re-read under a row lock, since propagation or a manual edit
+    may have changed them while the API call was in flight. A pushed row
+    is marked synced only if its effective quantity still equals the
+    quantity pushed; otherwise it records what the marketplace now has
+    and stays pending for the next push.
+    """
+    now = timezone.now()
+
+    with transaction.atomic():
+        rows = list(
+            MarketplaceInventory.objects.select_for_update().filter(id__in=item_ids).order_by('id')
+        )
+        for row in rows:
+            row.marketplace = marketplace
+            sku = row.marketplace_sku
+            row.updated_at = now
+            if sku in succeeded:
+                row.marketplace_quantity = quantities[sku]
+                row.sync_status = 'synced' if row.effective_quantity == quantities[sku] else 'pending'
+                row.last_sync_at = now
+                row.last_sync_error = ''
+                row.sync_attempts = 0
+                stats['items_synced'] += 1
+            else:
+                row.sync_status = 'error'
+                row.last_sync_error = errors.get(sku, 'No result returned for SKU')
+                row.sync_attempts += 1
+                stats['items_failed'] += 1
+
+        MarketplaceInventory.objects.bulk_update(rows, INVENTORY_RESULT_FIELDS)
+
+
+def link_supplier_products(marketplace: Optional[Marketplace] = None) -> int:
+    """
+    Map unlinked inventory rows to supplier products by SKU.
+
+    A row is linked when its internal_sku matches exactly one supplier
+    product's supplier_sku; ambiguous SKUs are left for manual mapping.
+
+    Args:
+        marketplace: Limit to one marketplace (defaults to all)
+
+    Returns:
+        Number of rows linked
+    """
+    unique_skus = (
+        SupplierProduct.objects.values('supplier_sku')
+        .annotate(matches=Count('id'))
+        .filter(matches=1)
+        .values('supplier_sku')
+    )
+    rows = MarketplaceInventory.objects.filter(
+        supplier_product__isnull=True,
+        internal_sku__in=unique_skus
+    )
+    if marketplace is not None:
+        rows = rows.filter(marketplace=marketplace)
+
+    return rows.update(supplier_product_id=Subquery(
+        SupplierProduct.objects.filter(supplier_sku=OuterRef('internal_sku')).values('id')[:1]
+    ))
+
+
+def propagate_supplier_quantities(quantities: Dict[int, int]) -> Dict[str, Any]:
+    """
+    Apply new supplier quantities to the marketplace inventory rows they feed.
+
+    Rows are found through the indexed supplier_product mapping. Each
+    row's available quantity is updated and logged as an InventoryMovement,
+    and the row is marked pending only if its effective quantity now
+    differs from what was last pushed to the marketplace. Manual overrides
+    keep their status. Each chunk is read with select_for_update() and
+    written, movements included, in one transaction.
+
+    Args:
+        quantities: Mapping of SupplierProduct id to new quantity_available
+
+    Returns:
+        Statistics with the ids of marketplaces that now have pending rows
+    """
+    chunk_size = getattr(settings, 'SUPPLIER_SYNC_CHUNK_SIZE', 1000)
+    product_ids = list(quantities)
+    now = timezone.now()
+
+    stats = {'rows_updated': 0, 'rows_dirty': 0}
+    dirty_marketplaces: Set[int] = set()
+
+    for start in range(0, len(product_ids), chunk_size):
+        # Lock the rows so concurrent propagations and pushes apply in turn
+        # and each movement records the quantity it actually replaced
+        with transaction.atomic():
+            rows = MarketplaceInventory.objects.select_for_update(of=('self',)).filter(
+                supplier_product_id__in=product_ids[start:start + chunk_size]
+            ).select_related('marketplace').order_by('id')
+
+            to_update = []
+            movements = []
+            for row in rows:
+                new_quantity = quantities[row.supplier_product_id]
+                if row.available_quantity == new_quantity:
+                    continue
+
+                movements.append(InventoryMovement(
+                    inventory=row,
+                    old_quantity=row.available_quantity,
+                    new_quantity=new_quantity,
+                    reason='supplier_sync',
+                    created_at=now
+                ))
+                row.available_quantity = new_quantity
+                row.updated_at = now
+                if not row.manual_override:
+                    if row.effective_quantity != row.marketplace_quantity:
+                        row.sync_status = 'pending'
+                        stats['rows_dirty'] += 1
+                        dirty_marketplaces.add(row.marketplace_id)
+                    elif row.sync_status == 'pending' and row.last_sync_at:
+                        # Back to the quantity already on the marketplace; nothing to push
+                        row.sync_status = 'synced'
+                to_update.append(row)
+
+            if to_update:
+                MarketplaceInventory.objects.bulk_update(
+                    to_update, ['available_quantity', 'sync_status', 'updated_at']
+                )
+                InventoryMovement.objects.bulk_create(movements)
+                stats['rows_updated'] += len(to_update)
+
+    stats['marketplace_ids'] = sorted(dirty_marketplaces)
+    return stats
+
+
+def get_listing_id(listing_data: Dict[str, Any]) -> Optional[str]:
+    """Get the marketplace listing ID from a listing payload."""
+    listing_id = listing_data.get('listing_id') or listing_data.get('id')
+    return str(listing_id) if listing_id else None
+
+
+def ingest_listings(marketplace: Marketplace, listings_data: Iterable[Dict[str, Any]],
+                    chunk_size: Optional[int] = None) -> Dict[str, int]:
+    """
+    Write marketplace listings, skipping those whose payload is unchanged.
+
+    Each chunk loads the existing listings in one query, compares payload
+    fingerprints, and upserts only new and changed listings with one
+    INSERT ... ON CONFLICT, in one transaction. Unchanged listings are
+    not written, so their last_synced_at keeps the time of their last
+    change. The marketplace's active listing counter is adjusted in the
+    same transaction.
+
+    Args:
+        marketplace: Marketplace the listings belong to
+        listings_data: Listing payloads
+        chunk_size: Listings per transaction (defaults to MARKETPLACE_LISTING_SYNC_CHUNK_SIZE)
+
+    Returns:
+        Statistics dictionary
+    """
+    chunk_size = chunk_size or getattr(settings, 'MARKETPLACE_LISTING_SYNC_CHUNK_SIZE', 500)
+    stats = {
+        'listings_processed': 0,
+        'listings_created': 0,
+        'listings_updated': 0,
+        'listings_unchanged': 0,
+        'listings_errors': 0,
+        'chunks_failed': 0
+    }
+
+    chunk: Dict[str, Dict[str, Any]] = {}
+    for listing_data in listings_data:
+        stats['listings_processed'] += 1
+        listing_id = get_listing_id(listing_data)
+        if not listing_id:
+            logger.warning(f"Listing missing ID: {listing_data}")
+            stats['listings_errors'] += 1
+            continue
+
+        # A later payload for the same listing wins
+        chunk[listing_id] = listing_data
+        if len(chunk) >= chunk_size:
+            _ingest_listing_chunk(marketplace, chunk, stats)
+            chunk = {}
+
+    if chunk:
+        _ingest_listing_chunk(marketplace, chunk, stats)
+
+    return stats
+
+
+def _build_listing(marketplace: Marketplace, listing_id: str,
+                   listing_data: Dict[str, Any]) -> MarketplaceListing:
+    """Build an unsaved listing with the fields only set on creation."""
+    return MarketplaceListing(
+        marketplace=marketplace,
+        marketplace_listing_id=listing_id,
+        marketplace_sku=listing_data.get('sku', ''),
+        title=listing_data.get('title', ''),
+        price=Decimal('0.00'),
+        status='active',
+        listing_url=listing_data.get('url', ''),
+        watchers=listing_data.get('watchers', 0)
+    )
+
+
+def _ingest_listing_chunk(marketplace: Marketplace, chunk: Dict[str, Dict[str, Any]],
+                          stats: Dict[str, int]) -> None:
+    """Upsert the new and changed listings of one chunk in a single transaction."""
+    hashes = {
+        listing_id: compute_payload_hash(listing_data)
+        for listing_id, listing_data in chunk.items()
+    }
+
+    try:
+        with transaction.atomic():
+            existing = {
+                listing.marketplace_listing_id: listing
+                for listing in MarketplaceListing.objects.filter(
+                    marketplace=marketplace,
+                    marketplace_listing_id__in=list(chunk)
+                )
+            }
+
+            to_upsert = []
+            created = 0
+            unchanged = 0
+            errors = 0
+            active_delta = 0
+            for listing_id, listing_data in chunk.items():
+                listing = existing.get(listing_id)
+                if listing is not None and listing.payload_hash == hashes[listing_id]:
+                    unchanged += 1
+                    continue
+
+                is_new = listing is None
+                if is_new:
+                    listing = _build_listing(marketplace, listing_id, listing_data)
+                was_active = not is_new and listing.status == 'active'
+
+                try:
+                    listing.update_from_marketplace(listing_data)
+                    listing.price = Decimal(str(listing.price))
+                    listing.quantity_listed = int(listing.quantity_listed)
+                    # The marketplace now holds exactly this content
+                    listing.pushed_hash = listing.compute_content_hash()
+                except (TypeError, ValueError, ArithmeticError) as e:
+                    logger.error(f"Error processing listing {listing_id}: {e}")
+                    errors += 1
+                    continue
+
+                listing.payload_hash = hashes[listing_id]
+                to_upsert.append(listing)
+                created += is_new
+                active_delta += (listing.status == 'active') - was_active
+
+            if to_upsert:
+                MarketplaceListing.objects.bulk_create(
+                    to_upsert,
+                    update_conflicts=True,
+                    unique_fields=['marketplace', 'marketplace_listing_id'],
+                    update_fields=LISTING_UPDATE_FIELDS
+                )
+            marketplace.adjust_totals(listings=active_delta)
+
+    except Exception as e:
+        logger.error(f"Error writing listing chunk for marketplace {marketplace.name}: {e}")
+        stats['listings_errors'] += len(chunk)
+        stats['chunks_failed'] += 1
+        return
+
+    stats['listings_unchanged'] += unchanged
+    stats['listings_errors'] += errors
+    stats['listings_created'] += created
+    stats['listings_updated'] += len(to_upsert) - created
+
+
+def push_listings(marketplace: Marketplace, connector: Any = None,
+                  batch_size: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Push locally changed listings to a marketplace.
+
+    A listing is pushed with update_listing() only when its content hash
+    differs from pushed_hash, the hash of what the marketplace last
+    received or reported. Listings are read in keyset batches, and each
+    batch's results are written back with one bulk_update. Each call
+    draws from the marketplace's request budget; when the budget does
+    not refill within MARKETPLACE_RATE_LIMIT_MAX_WAIT_SECONDS the push
+    stops early and reports rate_limited.
+
+    Args:
+        marketplace: Marketplace to push to
+        connector: Connector to use (defaults to marketplace.get_connector())
+        batch_size: Listings read per batch (defaults to MARKETPLACE_LISTING_SYNC_CHUNK_SIZE)
+
+    Returns:
+        Statistics dictionary
+    """
+    connector = connector or marketplace.get_connector()
+    batch_size = batch_size or getattr(settings, 'MARKETPLACE_LISTING_SYNC_CHUNK_SIZE', 500)
+    max_wait = getattr(settings, 'MARKETPLACE_RATE_LIMIT_MAX_WAIT_SECONDS', 30)
+
+    stats = {
+        'listings_checked': 0,
+        'listings_pushed': 0,
+        'listings_unchanged': 0,
+        'listings_failed': 0,
+        'rate_limited': False
+    }
+
+    listings = MarketplaceListing.objects.filter(marketplace=marketplace).exclude(status='ended')
+    last_id = 0
+    while not stats['rate_limited']:
+        batch = list(listings.filter(id__gt=last_id).order_by('id')[:batch_size])
+        if not batch:
+            break
+        last_id = batch[-1].id
+
+        written = []
+        for listing in batch:
+            stats['listings_checked'] += 1
+            content_hash = listing.compute_content_hash()
+            if content_hash == listing.pushed_hash:
+                stats['listings_unchanged'] += 1
+                continue
+
+            if not connector.throttle(timeout=max_wait):
+                # Out of request budget; the rest is pushed on the next run
+                logger.info(f"Request budget for {marketplace.name} exhausted, deferring listing push")
+                stats['rate_limited'] = True
+                break
+
+            try:
+                result = connector.update_listing(listing.marketplace_listing_id, listing.get_push_payload())
+                error = None if result.get('success') else result.get('error', 'Update failed')
+            except Exception as e:
+                logger.error(f"Listing push failed for {listing.marketplace_listing_id}: {e}")
+                error = str(e)
+
+            now = timezone.now()
+            listing.updated_at = now
+            if error is None:
+                listing.pushed_hash = content_hash
+                listing.last_synced_at = now
+                listing.error_message = ''
+                listing.error_count = 0
+                stats['listings_pushed'] += 1
+            else:
+                listing.error_message = error
+                listing.error_count += 1
+                stats['listings_failed'] += 1
+            written.append(listing)
+
+        if written:
+            MarketplaceListing.objects.bulk_update(written, LISTING_PUSH_FIELDS)
+
+    return stats
+
+
+def get_order_id(order_data: Dict[str, Any]) -> Optional[str]:
+    """Extract the marketplace order ID from an order payload."""
+    order_id = order_data.get('order_id') or order_data.get('id')
+    return str(order_id) if order_id else None
+
+
+def get_order_updated_at(order_data: Dict[str, Any]) -> Optional[datetime]:
+    """
+    Get the marketplace-side last modification time from an order payload.
+
+    Falls back to the order time for marketplaces that report no update time.
+
+    Returns:
+        Aware datetime, or None if the payload carries no parseable time
+    """
+    for key in ('updated_at', 'last_modified', 'ordered_at', 'created_at'):
+        value = order_data.get(key)
+        if isinstance(value, str):
+            value = parse_datetime(value)
+        if isinstance(value, datetime):
+            if timezone.is_naive(value):
+                value = timezone.make_aware(value, dt_timezone.utc)
+            return value
+    return None
+
+
+def get_orders_high_water_mark(orders_data: Iterable[Dict[str, Any]]) -> Optional[datetime]:
+    """Get the latest marketplace-side update time in a page of orders."""
+    times = [t for t in (get_order_updated_at(o) for o in orders_data) if t]
+    return max(times) if times else None
+
+
+def ingest_orders(marketplace: Marketplace, orders_data: Iterable[Dict[str, Any]],
+                  chunk_size: Optional[int] = None) -> Tuple[Dict[str, int], List[str]]:
+    """
+    Write a page of marketplace orders with bulk queries.
+
+    Each chunk resolves which order IDs already exist in one query, then
+    bulk-creates new orders and bulk-updates existing orders whose
+    payload hash changed, in one transaction that holds the marketplace
+    row lock, so overlapping syncs of one marketplace never insert the
+    same order twice. Unchanged orders are not written, and an order
+    acknowledged here is not moved back to 'pending' by a marketplace
+    that has not caught up yet. No marketplace API is called here: new
+    orders that should be acknowledged are returned instead, for
+    acknowledge_orders().
+
+    Args:
+        marketplace: Marketplace the orders belong to
+        orders_data: Order payloads
+        chunk_size: Orders per transaction (defaults to MARKETPLACE_ORDER_SYNC_CHUNK_SIZE)
+
+    Returns:
+        Tuple of (statistics, marketplace order IDs to acknowledge)
+    """
+    chunk_size = chunk_size or getattr(settings, 'MARKETPLACE_ORDER_SYNC_CHUNK_SIZE', 500)
+    stats = {
+        'orders_processed': 0,
+        'orders_created': 0,
+        'orders_updated': 0,
+        'orders_unchanged': 0,
+        'orders_errors': 0,
+        'chunks_failed': 0
+    }
+    to_acknowledge: List[str] = []
+
+    chunk: Dict[str, Dict[str, Any]] = {}
+    for order_data in orders_data:
+        stats['orders_processed'] += 1
+        order_id = get_order_id(order_data)
+        if not order_id:
+            logger.warning(f"Order missing ID: {order_data}")
+            stats['orders_errors'] += 1
+            continue
+
+        # A later payload for the same order wins
+        chunk[order_id] = order_data
+        if len(chunk) >= chunk_size:
+            to_acknowledge.extend(_ingest_order_chunk(marketplace, chunk, stats))
+            chunk = {}
+
+    if chunk:
+        to_acknowledge.extend(_ingest_order_chunk(marketplace, chunk, stats))
+
+    return stats, to_acknowledge
+
+
+def _build_order(marketplace: Marketplace, order_id: str, order_data: Dict[str, Any],
+                 payload_hash: str, now) -> MarketplaceOrder:
+    """Build an unsaved order from its marketplace payload."""
+    return MarketplaceOrder(
+        marketplace=marketplace,
+        marketplace_order_id=order_id,
+        internal_order_number=MarketplaceOrder.build_internal_order_number(marketplace, order_id),
+        customer_name=order_data.get('customer_name', ''),
+        customer_email=order_data.get('customer_email', ''),
+        customer_phone=order_data.get('customer_phone', ''),
+        shipping_address=order_data.get('shipping_address', {}),
+        billing_address=order_data.get('billing_address', {}),
+        order_items=order_data.get('items', []),
+        subtotal=Decimal(str(order_data.get('subtotal', 0))),
+        shipping_cost=Decimal(str(order_data.get('shipping_cost', 0))),
+        tax_amount=Decimal(str(order_data.get('tax_amount', 0))),
+        total_amount=Decimal(str(order_data.get('total_amount', 0))),
+        status=order_data.get('status', 'pending'),
+        marketplace_status=order_data.get('marketplace_status', ''),
+        ordered_at=order_data.get('ordered_at', now),
+        shipping_method=order_data.get('shipping_method', ''),
+        tracking_number=order_data.get('tracking_number', ''),
+        carrier=order_data.get('carrier', ''),
+        marketplace_data=order_data,
+        payload_hash=payload_hash,
+        last_synced_at=now
+    )
+
+
+def _ingest_order_chunk(marketplace: Marketplace, chunk: Dict[str, Dict[str, Any]],
+                        stats: Dict[str, int]) -> List[str]:
+    """Write one chunk of orders in a single transaction; returns order IDs to acknowledge."""
+    now = timezone.now()
+    hashes = {
+        order_id: MarketplaceOrder.compute_payload_hash(order_data)
+        for order_id, order_data in chunk.items()
+    }
+
+    try:
+        with transaction.atomic():
+            # Serialize chunk writes per marketplace: an overlapping sync
+            # (beat schedule plus an on-demand job) waits here, then sees
+            # this chunk's orders as existing instead of inserting them again
+            list(
+                Marketplace.objects.select_for_update()
+                .filter(pk=marketplace.pk)
+                .order_by()
+                .values_list('pk')
+            )
+
+            existing = {
+                order.marketplace_order_id: order
+                for order in MarketplaceOrder.objects.filter(
+                    marketplace=marketplace,
+                    marketplace_order_id__in=list(chunk)
+                ).only('id', 'marketplace_order_id', 'payload_hash', 'total_amount', *ORDER_UPDATE_FIELDS)
+            }
+
+            to_create = []
+            to_update = []
+            unchanged = 0
+            revenue = Decimal('0.00')
+            for order_id, order_data in chunk.items():
+                order = existing.get(order_id)
+                if order is None:
+                    order = _build_order(marketplace, order_id, order_data, hashes[order_id], now)
+                    to_create.append(order)
+                    if order.status in MarketplaceOrder.REVENUE_STATUSES:
+                        revenue += order.total_amount
+                elif order.payload_hash == hashes[order_id]:
+                    unchanged += 1
+                else:
+                    counted = order.status in MarketplaceOrder.REVENUE_STATUSES
+                    status = order_data.get('status', order.status)
+                    # Acknowledgement is recorded locally first; keep it
+                    # while the marketplace still reports the order pending
+                    if not (order.status == 'acknowledged' and status == 'pending'):
+                        order.status = status
+                    if counted != (order.status in MarketplaceOrder.REVENUE_STATUSES):
+                        revenue += order.total_amount if not counted else -order.total_amount
+                    order.marketplace_status = order_data.get('marketplace_status', order.marketplace_status)
+                    order.tracking_number = order_data.get('tracking_number', order.tracking_number)
+                    order.carrier = order_data.get('carrier', order.carrier)
+                    order.marketplace_data = order_data
+                    order.payload_hash = hashes[order_id]
+                    order.last_synced_at = now
+                    order.updated_at = now
+                    to_update.append(order)
+
+            if to_create:
+                MarketplaceOrder.objects.bulk_create(to_create)
+                build_order_lines(to_create)
+            if to_update:
+                MarketplaceOrder.objects.bulk_update(to_update, ORDER_UPDATE_FIELDS)
+            marketplace.adjust_totals(orders=len(to_create), revenue=revenue)
+
+    except Exception as e:
+        logger.error(f"Error writing order chunk for marketplace {marketplace.name}: {e}")
+        stats['orders_errors'] += len(chunk)
+        stats['chunks_failed'] += 1
+        return []
+
+    stats['orders_unchanged'] += unchanged
+    stats['orders_created'] += len(to_create)
+    stats['orders_updated'] += len(to_update)
+
+    if not marketplace.auto_acknowledge_orders:
+        return []
+    return [order.marketplace_order_id for order in to_create if order.status == 'pending']
+
+
+def build_order_lines(orders: List[MarketplaceOrder], replace: bool = False) -> int:
+    """
+    Write normalized order lines for saved orders.
+
+    Lines are linked to the listing with the same marketplace SKU and to
+    the supplier product mapped to that SKU, resolved with one query
+    each for the whole batch, and inserted with one bulk_create.
+    Items that cannot be parsed are skipped.
+
+    Args:
+        orders: Saved orders whose order_items should be normalized
+        replace: Delete the orders' existing lines first
+
+    Returns:
+        Number of lines written
+    """
+    lines = []
+    for order in orders:
+        for line_number, item in enumerate(order.order_items or [], start=1):
+            try:
+                lines.append(MarketplaceOrderLine.from_item(order, line_number, item))
+            except (TypeError, ValueError, ArithmeticError, AttributeError) as e:
+                logger.warning(f"Skipping order item {line_number} of order {order.marketplace_order_id}: {e}")
+
+    if replace:
+        MarketplaceOrderLine.objects.filter(order__in=[order.pk for order in orders]).delete()
+    if not lines:
+        return 0
+
+    marketplace_ids = {line.marketplace_id for line in lines}
+    skus = {line.sku for line in lines if line.sku}
+    if skus:
+        listings = {}
+        for listing_id, marketplace_id, sku in MarketplaceListing.objects.filter(
+            marketplace_id__in=marketplace_ids,
+            marketplace_sku__in=skus
+        ).order_by('id').values_list('id', 'marketplace_id', 'marketplace_sku'):
+            listings.setdefault((marketplace_id, sku), listing_id)
+
+        supplier_products = dict(
+            ((marketplace_id, sku), product_id)
+            for marketplace_id, sku, product_id in MarketplaceInventory.objects.filter(
+                marketplace_id__in=marketplace_ids,
+                marketplace_sku__in=skus,
+                supplier_product__isnull=False
+            ).values_list('marketplace_id', 'marketplace_sku', 'supplier_product_id')
+        )
+
+        for line in lines:
+            key = (line.marketplace_id, line.sku)
+            line.listing_id = listings.get(key)
+            line.supplier_product_id = supplier_products.get(key)
+
+    MarketplaceOrderLine.objects.bulk_create(lines)
+    return len(lines)
+
+
+def acknowledge_orders(marketplace: Marketplace, order_ids: List[str],
+                       connector: Any = None) -> Dict[str, Any]:
+    """
+    Acknowledge orders on the marketplace and record the result.
+
+    Orders are sent in connector-sized batches with one
+    bulk_acknowledge_orders() call each, and acknowledged orders are
+    marked with one UPDATE per batch. Must not run inside a transaction.
+    Orders left when the request budget runs out are returned as
+    orders_deferred.
+
+    Args:
+        marketplace: Marketplace the orders belong to
+        order_ids: Marketplace order IDs
+        connector: Connector to use (defaults to marketplace.get_connector())
+
+    Returns:
+        Statistics dictionary
+    """
+    connector = connector or marketplace.get_connector()
+    batch_size = connector.acknowledge_batch_size
+    max_wait = getattr(settings, 'MARKETPLACE_RATE_LIMIT_MAX_WAIT_SECONDS', 30)
+    stats = {'orders_acknowledged': 0, 'orders_failed': 0, 'api_calls': 0}
+
+    for start in range(0, len(order_ids), batch_size):
+        batch = order_ids[start:start + batch_size]
+        if not connector.throttle(timeout=max_wait):
+            logger.info(f"Request budget for {marketplace.name} exhausted, deferring acknowledgements")
+            stats['orders_deferred'] = order_ids[start:]
+            break
+
+        try:
+            stats['api_calls'] += 1
+            results = connector.bulk_acknowledge_orders(batch)
+            succeeded = list(results.get('success', []))
+        except Exception as e:
+            logger.error(f"Bulk acknowledge failed for {marketplace.name}: {e}")
+            succeeded = []
+
+        if succeeded:
+            now = timezone.now()
+            MarketplaceOrder.objects.filter(
+                marketplace=marketplace,
+                marketplace_order_id__in=succeeded,
+                status='pending'
+            ).update(status='acknowledged', acknowledged_at=now, updated_at=now)
+
+        stats['orders_acknowledged'] += len(succeeded)
+        stats['orders_failed'] += len(batch) - len(succeeded)
+
+    return stats
@@ -1,6 +1,7 @@
 """
 Celery tasks for marketplace data synchronization and management.
 """
+import uuid
 import logging
 from typing import Dict, List, Optional, Any
 from datetime import datetime, timedelta
@@ -15,12 +16,20 @@ from django.db.models import Q, Avg, Sum, Count
 
 from .models import (
     Marketplace, MarketplaceListing, MarketplaceOrder, 
-    MarketplaceInventory
+    MarketplaceInventory, InventoryMovement, MarketplaceOrderSyncState,
+    MarketplaceSyncJob
 )
 from .connectors.factory import create_connector
+from .sync import (
+    acknowledge_orders, get_orders_high_water_mark, ingest_listings, ingest_orders,
+    propagate_supplier_quantities, push_inventory, push_listings
+)
 
 logger = logging.getLogger(__name__)
 
+# Delay before work deferred by an exhausted request budget is retried
+RATE_LIMIT_RETRY_SECONDS = 60
+
 
 @shared_task(bind=True, max_retries=3)
 def sync_marketplace_listings(self, marketplace_id: int, force_full_sync: bool = False) -> Dict[str, Any]:
@@ -63,7 +72,7 @@ def sync_marketplace_listings(self, marketplace_id: int, force_full_sync: bool =
         
         # Fetch listings from marketplace
         logger.info(f"Fetching listings from {marketplace.name} since {since}")
-        listings_data = connector.get_listings(since=since)
+        listings_data = connector.search_listings(since=since)
         
         if not listings_data:
             logger.warning(f"No listings returned from {marketplace.name}")
@@ -73,19 +82,15 @@ def sync_marketplace_listings(self, marketplace_id: int, force_full_sync: bool =
                 'listings_processed': 0,
                 'listings_created': 0,
                 'listings_updated': 0,
+                'listings_unchanged': 0,
                 'marketplace_id': marketplace_id
             }
         
-        # Process listings
-        stats = _process_marketplace_listings(marketplace, listings_data)
+        # Upsert new and changed listings in chunks, skipping unchanged payloads
+        stats = ingest_listings(marketplace, listings_data)
         
         # Update marketplace sync status
         marketplace.update_sync_status(True, "")
-        marketplace.total_listings = MarketplaceListing.objects.filter(
-            marketplace=marketplace,
-            status='active'
-        ).count()
-        marketplace.save(update_fields=['total_listings'])
         
         logger.info(f"Completed listing sync for {marketplace.name}: {stats}")
         
@@ -118,71 +123,21 @@ def sync_marketplace_listings(self, marketplace_id: int, force_full_sync: bool =
         raise self.retry(exc=e, countdown=60)
 
 
-def _process_marketplace_listings(marketplace: Marketplace, listings_data: List[Dict]) -> Dict[str, int]:
-    """Process and save marketplace listings data."""
-    stats = {
-        'listings_processed': 0,
-        'listings_created': 0,
-        'listings_updated': 0,
-        'listings_errors': 0
-    }
-    
-    with transaction.atomic():
-        for listing_data in listings_data:
-            try:
-                stats['listings_processed'] += 1
-                
-                listing_id = listing_data.get('listing_id') or listing_data.get('id')
-                if not listing_id:
-                    logger.warning(f"Listing missing ID: {listing_data}")
-                    stats['listings_errors'] += 1
-                    continue
-                
-                listing, created = MarketplaceListing.objects.get_or_create(
-                    marketplace=marketplace,
-                    marketplace_listing_id=listing_id,
-                    defaults={
-                        'marketplace_sku': listing_data.get('sku', ''),
-                        'title': listing_data.get('title', ''),
-                        'description': listing_data.get('description', ''),
-                        'price': Decimal(str(listing_data.get('price', 0))),
-                        'quantity_listed': listing_data.get('quantity', 0),
-                        'status': listing_data.get('status', 'active'),
-                        'marketplace_category_id': listing_data.get('category_id', ''),
-                        'marketplace_category_name': listing_data.get('category_name', ''),
-                        'listing_url': listing_data.get('url', ''),
-                        'views': listing_data.get('views', 0),
-                        'watchers': listing_data.get('watchers', 0)
-                    }
-                )
-                
-                if created:
-                    stats['listings_created'] += 1
-                    logger.debug(f"Created new listing: {listing_id}")
-                else:
-                    stats['listings_updated'] += 1
-                    logger.debug(f"Updated existing listing: {listing_id}")
-                
-                # Update listing data from marketplace
-                listing.update_from_marketplace(listing_data)
-                listing.save()
-                
-            except Exception as e:
-                logger.error(f"Error processing listing {listing_data}: {e}")
-                stats['listings_errors'] += 1
-                continue
-    
-    return stats
-
-
 @shared_task(bind=True, max_retries=3)
-def sync_marketplace_orders(self, marketplace_id: int, days_back: int = 7) -> Dict[str, Any]:
+def sync_marketplace_orders(self, marketplace_id: int, days_back: int = 7,
+                            reconcile: bool = False) -> Dict[str, Any]:
     """
     Synchronize orders from a specific marketplace.
     
+    Fetches only orders updated since the marketplace's order sync cursor,
+    page by page, advancing the cursor with each committed page. A
+    reconciliation pass over the last MARKETPLACE_ORDER_RECONCILE_DAYS
+    runs when due, to catch updates the cursor missed.
+    
     Args:
         marketplace_id: ID of the marketplace to sync
-        days_back: Number of days back to sync orders
+        days_back: Window of the first sync, before any cursor exists
+        reconcile: Force a reconciliation pass
         
     Returns:
         Dictionary with sync results
@@ -210,37 +165,88 @@ def sync_marketplace_orders(self, marketplace_id: int, days_back: int = 7) -> Di
                 'marketplace_id': marketplace_id
             }
         
-        # Calculate date range
-        since = timezone.now() - timedelta(days=days_back)
+        state, _ = MarketplaceOrderSyncState.objects.get_or_create(marketplace=marketplace)
+        now = timezone.now()
+        stale_after = timedelta(seconds=getattr(settings, 'MARKETPLACE_ORDER_SYNC_STALE_SECONDS', 1800))
         
-        # Fetch orders from marketplace
-        logger.info(f"Fetching orders from {marketplace.name} since {since}")
-        orders_data = connector.get_orders(since=since)
-        
-        if not orders_data:
-            logger.info(f"No orders returned from {marketplace.name}")
+        if state.status == 'running' and state.updated_at > now - stale_after and not self.request.retries:
+            logger.info(f"Order sync for {marketplace.name} is already running, skipping")
             return {
-                'success': True,
-                'orders_processed': 0,
-                'orders_created': 0,
-                'orders_updated': 0,
+                'success': False,
+                'error': 'Order sync already running',
                 'marketplace_id': marketplace_id
             }
         
-        # Process orders
-        stats = _process_marketplace_orders(marketplace, orders_data)
-        
-        # Update marketplace statistics
-        marketplace.total_orders = MarketplaceOrder.objects.filter(
-            marketplace=marketplace
-        ).count()
+        # Resume an interrupted run from its page token; otherwise start a
+        # reconciliation pass when due, or an incremental run from the cursor
+        reconcile_every = timedelta(hours=getattr(settings, 'MARKETPLACE_ORDER_RECONCILE_HOURS', 24))
+        if state.is_resumable and not reconcile:
+            logger.info(f"Resuming {state.run_type} order sync for {marketplace.name}")
+        elif reconcile or (
+            state.updated_after and (
+                state.last_reconciled_at is None or state.last_reconciled_at < now - reconcile_every
+            )
+        ):
+            reconcile_days = getattr(settings, 'MARKETPLACE_ORDER_RECONCILE_DAYS', 7)
+            state.start_run('reconcile', since=now - timedelta(days=reconcile_days))
+        elif state.updated_after:
+            # Overlap the cursor a little to tolerate marketplace clock skew
+            overlap = getattr(settings, 'MARKETPLACE_ORDER_CURSOR_OVERLAP_SECONDS', 300)
+            state.start_run('incremental', since=state.updated_after - timedelta(seconds=overlap))
+        else:
+            state.start_run('incremental', since=now - timedelta(days=days_back))
+        
+        logger.info(f"Fetching orders from {marketplace.name} updated since {state.run_since}")
+        
+        # Each page commits together with the cursor that moves past it;
+        # acknowledgements are queued once the page is committed
+        page_token = state.page_token or None
+        max_wait = getattr(settings, 'MARKETPLACE_RATE_LIMIT_MAX_WAIT_SECONDS', 30)
+        while True:
+            if not connector.throttle(timeout=max_wait):
+                # Out of request budget; the requeued run resumes from this page
+                state.fail_run('Request budget exhausted')
+                logger.info(f"Request budget for {marketplace.name} exhausted, pausing order sync")
+                sync_marketplace_orders.apply_async((marketplace_id,), countdown=RATE_LIMIT_RETRY_SECONDS)
+                return {
+                    'success': False,
+                    'error': 'Request budget exhausted',
+                    'rate_limited': True,
+                    'marketplace_id': marketplace_id
+                }
+            
+            orders_data, next_page_token = connector.fetch_order_page(
+                updated_after=state.run_since,
+                page_token=page_token,
+                page_size=connector.order_page_size
+            )
+            
+            with transaction.atomic():
+                stats, to_acknowledge = ingest_orders(marketplace, orders_data)
+                if stats['chunks_failed']:
+                    # Leave the cursor on this page so the retry rewrites it
+                    raise RuntimeError(f"Failed to write order page for {marketplace.name}")
+                state.record_page(next_page_token, stats, get_orders_high_water_mark(orders_data))
+                if to_acknowledge:
+                    transaction.on_commit(
+                        lambda ids=to_acknowledge: _queue_acknowledgements(marketplace_id, ids, connector)
+                    )
+            
+            if not next_page_token or not orders_data:
+                break
+            page_token = next_page_token
         
-        marketplace.total_revenue = MarketplaceOrder.objects.filter(
-            marketplace=marketplace,
-            status__in=['shipped', 'delivered']
-        ).aggregate(total=Sum('total_amount'))['total'] or Decimal('0.00')
+        state.complete_run()
+        stats = {
+            field: getattr(state, field) for field in MarketplaceOrderSyncState.COUNTER_FIELDS
+        }
+        stats['pages_fetched'] = state.pages_committed
+        stats['run_type'] = state.run_type
         
-        marketplace.save(update_fields=['total_orders', 'total_revenue'])
+        # Counters are adjusted as pages are ingested; reconciliation
+        # runs also recount them to correct drift from other writers
+        if state.run_type == 'reconcile':
+            marketplace.recount_totals()
         
         logger.info(f"Completed order sync for {marketplace.name}: {stats}")
         
@@ -263,77 +269,58 @@ def sync_marketplace_orders(self, marketplace_id: int, days_back: int = 7) -> Di
     except Exception as e:
         error_msg = f"Error syncing marketplace orders {marketplace_id}: {str(e)}"
         logger.error(error_msg, exc_info=True)
+        
+        # Keep the cursor so the retry resumes after the last committed page
+        MarketplaceOrderSyncState.objects.filter(
+            marketplace_id=marketplace_id,
+            status='running'
+        ).update(status='failed', last_error=error_msg, updated_at=timezone.now())
+        
         raise self.retry(exc=e, countdown=60)
 
 
-def _process_marketplace_orders(marketplace: Marketplace, orders_data: List[Dict]) -> Dict[str, int]:
-    """Process and save marketplace orders data."""
-    stats = {
-        'orders_processed': 0,
-        'orders_created': 0,
-        'orders_updated': 0,
-        'orders_errors': 0
-    }
+def _queue_acknowledgements(marketplace_id: int, order_ids: List[str], connector) -> None:
+    """Queue acknowledge_marketplace_orders in connector-sized batches."""
+    batch_size = connector.acknowledge_batch_size
+    for start in range(0, len(order_ids), batch_size):
+        acknowledge_marketplace_orders.delay(marketplace_id, order_ids[start:start + batch_size])
+
+
+@shared_task
+def acknowledge_marketplace_orders(marketplace_id: int, order_ids: List[str]) -> Dict[str, Any]:
+    """
+    Acknowledge newly ingested orders on the marketplace in bulk.
     
-    with transaction.atomic():
-        for order_data in orders_data:
-            try:
-                stats['orders_processed'] += 1
-                
-                order_id = order_data.get('order_id') or order_data.get('id')
-                if not order_id:
-                    logger.warning(f"Order missing ID: {order_data}")
-                    stats['orders_errors'] += 1
-                    continue
-                
-                order, created = MarketplaceOrder.objects.get_or_create(
-                    marketplace=marketplace,
-                    marketplace_order_id=order_id,
-                    defaults={
-                        'customer_name': order_data.get('customer_name', ''),
-                        'customer_email': order_data.get('customer_email', ''),
-                        'customer_phone': order_data.get('customer_phone', ''),
-                        'shipping_address': order_data.get('shipping_address', {}),
-                        'billing_address': order_data.get('billing_address', {}),
-                        'order_items': order_data.get('items', []),
-                        'subtotal': Decimal(str(order_data.get('subtotal', 0))),
-                        'shipping_cost': Decimal(str(order_data.get('shipping_cost', 0))),
-                        'tax_amount': Decimal(str(order_data.get('tax_amount', 0))),
-                        'total_amount': Decimal(str(order_data.get('total_amount', 0))),
-                        'status': order_data.get('status', 'pending'),
-                        'marketplace_status': order_data.get('marketplace_status', ''),
-                        'ordered_at': order_data.get('ordered_at', timezone.now()),
-                        'shipping_method': order_data.get('shipping_method', ''),
-                        'marketplace_data': order_data
-                    }
-                )
-                
-                if created:
-                    stats['orders_created'] += 1
-                    logger.debug(f"Created new order: {order_id}")
-                    
-                    # Auto-acknowledge if enabled
-                    if marketplace.auto_acknowledge_orders:
-                        order.acknowledge_order()
-                else:
-                    stats['orders_updated'] += 1
-                    logger.debug(f"Updated existing order: {order_id}")
-                    
-                    # Update order status and details
-                    order.status = order_data.get('status', order.status)
-                    order.marketplace_status = order_data.get('marketplace_status', order.marketplace_status)
-                    order.tracking_number = order_data.get('tracking_number', order.tracking_number)
-                    order.carrier = order_data.get('carrier', order.carrier)
-                    order.marketplace_data = order_data
-                    order.last_synced_at = timezone.now()
-                    order.save()
-                
-            except Exception as e:
-                logger.error(f"Error processing order {order_data}: {e}")
-                stats['orders_errors'] += 1
-                continue
+    Args:
+        marketplace_id: ID of the marketplace
+        order_ids: Marketplace order IDs to acknowledge
+        
+    Returns:
+        Dictionary with acknowledgement results
+    """
+    try:
+        marketplace = Marketplace.objects.get(id=marketplace_id)
+    except Marketplace.DoesNotExist:
+        return {
+            'success': False,
+            'error': f"Marketplace with ID {marketplace_id} not found",
+            'marketplace_id': marketplace_id
+        }
+    
+    stats = acknowledge_orders(marketplace, order_ids)
+    if stats['orders_failed']:
+        logger.warning(f"Failed to acknowledge {stats['orders_failed']} orders on {marketplace.name}")
     
-    return stats
+    deferred = stats.pop('orders_deferred', None)
+    if deferred:
+        acknowledge_marketplace_orders.apply_async((marketplace_id, deferred), countdown=RATE_LIMIT_RETRY_SECONDS)
+        stats['orders_deferred'] = len(deferred)
+    
+    return {
+        'success': True,
+        'marketplace_id': marketplace_id,
+        **stats
+    }
 
 
 @shared_task(bind=True, max_retries=3)
@@ -359,37 +346,58 @@ def sync_marketplace_inventory(self, marketplace_id: int) -> Dict[str, Any]:
                 'marketplace_id': marketplace_id
             }
         
-        # Get all inventory items for this marketplace
-        inventory_items = MarketplaceInventory.objects.filter(
-            marketplace=marketplace,
-            sync_status__in=['pending', 'error']
-        )
+        # Push pending items in connector-sized batches through the bulk API
+        stats = push_inventory(marketplace)
+        if stats['rate_limited']:
+            sync_marketplace_inventory.apply_async((marketplace_id,), countdown=RATE_LIMIT_RETRY_SECONDS)
         
-        stats = {
-            'items_processed': 0,
-            'items_synced': 0,
-            'items_failed': 0
+        logger.info(f"Completed inventory sync for {marketplace.name}: {stats}")
+        
+        return {
+            'success': True,
+            'marketplace_id': marketplace_id,
+            'marketplace_name': marketplace.name,
+            **stats
         }
         
-        for item in inventory_items:
-            stats['items_processed'] += 1
-            
-            try:
-                # Skip manual overrides
-                if item.manual_override:
-                    continue
-                
-                # Sync to marketplace
-                if item.sync_to_marketplace():
-                    stats['items_synced'] += 1
-                else:
-                    stats['items_failed'] += 1
-                    
-            except Exception as e:
-                logger.error(f"Error syncing inventory item {item.id}: {e}")
-                stats['items_failed'] += 1
+    except Marketplace.DoesNotExist:
+        error_msg = f"Marketplace with ID {marketplace_id} not found"
+        logger.error(error_msg)
+        return {
+            'success': False,
+            'error': error_msg,
+            'marketplace_id': marketplace_id
+        }
         
-        logger.info(f"Completed inventory sync for {marketplace.name}: {stats}")
+    except Exception as e:
+        error_msg = f"Error syncing marketplace inventory {marketplace_id}: {str(e)}"
+        logger.error(error_msg, exc_info=True)
+        raise self.retry(exc=e, countdown=60)
+
+
+@shared_task(bind=True, max_retries=3)
+def push_marketplace_listings(self, marketplace_id: int) -> Dict[str, Any]:
+    """
+    Push locally edited listings to a marketplace.
+    
+    Only listings whose content changed since the marketplace last had
+    them are sent, one update_listing() call each.
+    
+    Args:
+        marketplace_id: ID of the marketplace to push to
+        
+    Returns:
+        Dictionary with push results
+    """
+    try:
+        marketplace = Marketplace.objects.get(id=marketplace_id)
+        logger.info(f"Starting listing push for marketplace: {marketplace.name}")
+        
+        stats = push_listings(marketplace)
+        if stats['rate_limited']:
+            push_marketplace_listings.apply_async((marketplace_id,), countdown=RATE_LIMIT_RETRY_SECONDS)
+        
+        logger.info(f"Completed listing push for {marketplace.name}: {stats}")
         
         return {
             'success': True,
@@ -408,11 +416,89 @@ def sync_marketplace_inventory(self, marketplace_id: int) -> Dict[str, Any]:
         }
         
     except Exception as e:
-        error_msg = f"Error syncing marketplace inventory {marketplace_id}: {str(e)}"
+        error_msg = f"Error pushing marketplace listings {marketplace_id}: {str(e)}"
         logger.error(error_msg, exc_info=True)
         raise self.retry(exc=e, countdown=60)
 
 
+def start_marketplace_sync_job(marketplace: Marketplace, sync_type: str = 'all',
+                               user=None) -> MarketplaceSyncJob:
+    """
+    Create a sync job and queue it once the current transaction commits.
+    
+    Args:
+        marketplace: Marketplace to sync
+        sync_type: One of MarketplaceSyncJob.PHASES
+        user: User who requested the sync
+        
+    Returns:
+        The queued MarketplaceSyncJob
+    """
+    job = MarketplaceSyncJob.objects.create(
+        marketplace=marketplace,
+        sync_type=sync_type,
+        phases=MarketplaceSyncJob.initial_phases(sync_type),
+        task_id=str(uuid.uuid4()),
+        requested_by=user
+    )
+    transaction.on_commit(
+        lambda: run_marketplace_sync_job.apply_async((job.id,), task_id=job.task_id)
+    )
+    return job
+
+
+@shared_task
+def run_marketplace_sync_job(job_id: int) -> Dict[str, Any]:
+    """
+    Run the phases of a marketplace sync job in order.
+    
+    Each phase runs its regular sync task in this worker and records the
+    task's result on the job, so clients can poll progress per phase.
+    
+    Args:
+        job_id: ID of the MarketplaceSyncJob
+        
+    Returns:
+        Dictionary with the job's final status
+    """
+    try:
+        job = MarketplaceSyncJob.objects.select_related('marketplace').get(id=job_id)
+    except MarketplaceSyncJob.DoesNotExist:
+        return {
+            'success': False,
+            'error': f"Sync job with ID {job_id} not found",
+            'job_id': job_id
+        }
+    
+    phase_tasks = {
+        'orders': sync_marketplace_orders,
+        'listings': sync_marketplace_listings,
+        'inventory': sync_marketplace_inventory,
+    }
+    
+    for phase in list(job.phases):
+        job.start_phase(phase)
+        try:
+            result = phase_tasks[phase](job.marketplace_id)
+            error = '' if result.get('success') else result.get('error', 'Sync failed')
+        except Exception as e:
+            logger.error(f"Sync job {job_id} phase {phase} failed: {e}", exc_info=True)
+            result, error = {}, str(e)
+        job.finish_phase(phase, result=result, error=error)
+    
+    job.marketplace.update_sync_status(job.status == 'completed', '' if job.status == 'completed' else (
+        '; '.join(f"{phase}: {entry['error']}" for phase, entry in job.phases.items() if entry['error'])
+    ))
+    
+    logger.info(f"Sync job {job_id} for {job.marketplace.name} finished with status {job.status}")
+    
+    return {
+        'success': job.status == 'completed',
+        'job_id': job_id,
+        'status': job.status
+    }
+
+
 @shared_task
 def sync_all_marketplace_orders() -> Dict[str, Any]:
     """Sync orders from all active marketplaces."""
@@ -442,15 +528,51 @@ def sync_all_marketplace_orders() -> Dict[str, Any]:
     }
 
 
+@shared_task
+def propagate_supplier_inventory(quantities: List[List[int]]) -> Dict[str, Any]:
+    """
+    Propagate supplier stock changes to mapped marketplace inventory.
+    
+    Only rows whose pushed quantity would change are marked pending, and
+    an inventory sync is queued only for marketplaces that have such rows.
+    
+    Args:
+        quantities: List of [supplier product id, new quantity] pairs
+        
+    Returns:
+        Dictionary with propagation results
+    """
+    stats = propagate_supplier_quantities({product_id: quantity for product_id, quantity in quantities})
+    
+    marketplaces = Marketplace.objects.filter(
+        id__in=stats['marketplace_ids'],
+        status='active',
+        inventory_sync_enabled=True
+    ).values_list('id', flat=True)
+    for marketplace_id in marketplaces:
+        sync_marketplace_inventory.delay(marketplace_id)
+    
+    logger.info(f"Propagated {len(quantities)} supplier quantity changes: {stats}")
+    
+    return {
+        'success': True,
+        **stats
+    }
+
+
 @shared_task
 def sync_all_marketplace_inventory() -> Dict[str, Any]:
-    """Sync inventory for all active marketplaces."""
+    """Sync inventory for all active marketplaces that have pending or failed items."""
     logger.info("Starting inventory sync for all marketplaces")
     
+    # Idle marketplaces are skipped; supplier changes reach marketplaces
+    # through propagate_supplier_inventory, so this is a safety net
     marketplaces = Marketplace.objects.filter(
         status='active',
-        inventory_sync_enabled=True
-    )
+        inventory_sync_enabled=True,
+        inventory_items__sync_status__in=['pending', 'error'],
+        inventory_items__manual_override=False
+    ).distinct()
     
     sync_results = []
     for marketplace in marketplaces:
@@ -471,6 +593,50 @@ def sync_all_marketplace_inventory() -> Dict[str, Any]:
     }
 
 
+@shared_task
+def purge_inventory_movements(retention_days: Optional[int] = None,
+                              batch_size: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Delete inventory movements older than the retention period.
+    
+    Rows are deleted in short batches, oldest first, so the purge never
+    holds long locks on the log while syncs keep appending to it.
+    
+    Args:
+        retention_days: Keep movements newer than this many days
+            (defaults to MARKETPLACE_INVENTORY_MOVEMENT_RETENTION_DAYS)
+        batch_size: Rows per DELETE
+            (defaults to MARKETPLACE_INVENTORY_MOVEMENT_PURGE_BATCH_SIZE)
+        
+    Returns:
+        Dictionary with purge results
+    """
+    retention_days = retention_days or getattr(settings, 'MARKETPLACE_INVENTORY_MOVEMENT_RETENTION_DAYS', 90)
+    batch_size = batch_size or getattr(settings, 'MARKETPLACE_INVENTORY_MOVEMENT_PURGE_BATCH_SIZE', 5000)
+    cutoff_date = timezone.now() - timedelta(days=retention_days)
+    
+    deleted = 0
+    while True:
+        batch = list(
+            InventoryMovement.objects.filter(created_at__lt=cutoff_date)
+            .order_by('created_at')
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if not batch:
+            break
+        deleted += InventoryMovement.objects.filter(id__in=batch).delete()[0]
+        if len(batch) < batch_size:
+            break
+    
+    logger.info(f"Purged {deleted} inventory movements older than {retention_days} days")
+    
+    return {
+        'success': True,
+        'movements_deleted': deleted,
+        'cutoff_date': cutoff_date.isoformat()
+    }
+
+
 @shared_task
 def update_listing_performance(marketplace_id: int, listing_id: int, metrics: Dict[str, Any]) -> Dict[str, Any]:
     """
@@ -1,3 +1,786 @@
-from django.test import TestCase
+"""
+Tests for marketplace synchronization.
+"""
+import io
+import threading
+from decimal import Decimal
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from rest_framework.test import APIClient
+from django.utils import timezone
+
+from core.utils.rate_limit import reset_rate_limiters
+from .connectors.example import ExampleMarketplaceConnector
+from .models import (
+    InventoryMovement, Marketplace, MarketplaceInventory, MarketplaceListing,
+    MarketplaceOrder, MarketplaceOrderLine, MarketplaceOrderSyncState, MarketplaceSyncJob
+)
+from suppliers.models import Supplier, SupplierProduct
+from suppliers.sync import apply_inventory_updates
+from .statistics import get_marketplace_statistics
+from .sync import (
+    acknowledge_orders, build_order_lines, ingest_listings, ingest_orders, link_supplier_products,
+    propagate_supplier_quantities, push_inventory, push_listings
+)
+from .tasks import (
+    RATE_LIMIT_RETRY_SECONDS, propagate_supplier_inventory, purge_inventory_movements,
+    run_marketplace_sync_job, sync_marketplace_inventory, sync_marketplace_orders
+)
+
+
+class MarketplaceTestMixin:
+    """Creates a marketplace with listings and inventory rows."""
+
+    def create_marketplace(self, code='test-market', inventory_buffer=0):
+        return Marketplace.objects.create(
+            name='Test Market',
+            code=code,
+            platform_type='custom',
+            inventory_buffer=inventory_buffer
+        )
+
+    def create_inventory(self, marketplace, count, **kwargs):
+        items = []
+        for index in range(count):
+            listing = MarketplaceListing.objects.create(
+                marketplace=marketplace,
+                marketplace_listing_id=f'L-{index}',
+                marketplace_sku=f'M-{index}',
+                title=f'Listing {index}',
+                price=Decimal('10.00')
+            )
+            items.append(MarketplaceInventory.objects.create(
+                marketplace=marketplace,
+                listing=listing,
+                internal_sku=f'I-{index}',
+                marketplace_sku=f'M-{index}',
+                available_quantity=10 + index,
+                **kwargs
+            ))
+        return items
+
+
+class InventoryPushTest(MarketplaceTestMixin, TestCase):
+    """Test cases for batched marketplace inventory pushes."""
+
+    def setUp(self):
+        self.marketplace = self.create_marketplace(inventory_buffer=2)
+        self.items = self.create_inventory(self.marketplace, 5)
+
+    def test_pushes_batches_and_writes_results_in_bulk(self):
+        """Test one API call and one bulk write per batch, with per-SKU results."""
+        connector = ExampleMarketplaceConnector(self.marketplace)
+        MarketplaceInventory.objects.filter(pk=self.items[4].pk).update(manual_override=True)
+
+        original = connector.bulk_update_inventory
+
+        def partial_failure(updates):
+            results = original([u for u in updates if u['sku'] != 'M-1'])
+            results['failed'].append({'sku': 'M-1', 'error': 'Listing locked'})
+            return results
+
+        # Two batches of two: each is one SELECT, then a savepoint around a
+        # SELECT ... FOR UPDATE and one UPDATE; plus a final empty SELECT
+        with mock.patch.object(connector, 'bulk_update_inventory', side_effect=partial_failure) as bulk, \
+                self.assertNumQueries(11):
+            stats = push_inventory(self.marketplace, connector=connector, batch_size=2)
+
+        self.assertEqual(bulk.call_count, 2)
+        self.assertEqual(stats['items_processed'], 4)
+        self.assertEqual(stats['items_synced'], 3)
+        self.assertEqual(stats['items_failed'], 1)
+
+        synced = MarketplaceInventory.objects.get(marketplace_sku='M-3')
+        self.assertEqual(synced.sync_status, 'synced')
+        self.assertEqual(synced.marketplace_quantity, 11)
+        self.assertEqual(connector._inventory['M-3']['quantity'], 11)
+
+        failed = MarketplaceInventory.objects.get(marketplace_sku='M-1')
+        self.assertEqual(failed.sync_status, 'error')
+        self.assertEqual(failed.last_sync_error, 'Listing locked')
+        self.assertEqual(failed.sync_attempts, 1)
+
+        self.assertEqual(MarketplaceInventory.objects.get(marketplace_sku='M-4').sync_status, 'pending')
+
+    def test_rows_changed_during_push_stay_pending(self):
+        """Test that a quantity change made while the API call runs is not lost."""
+        connector = ExampleMarketplaceConnector(self.marketplace)
+        original = connector.bulk_update_inventory
+
+        def concurrent_change(updates):
+            MarketplaceInventory.objects.filter(marketplace_sku='M-0').update(
+                available_quantity=50, sync_status='pending'
+            )
+            return original(updates)
+
+        with mock.patch.object(connector, 'bulk_update_inventory', side_effect=concurrent_change):
+            stats = push_inventory(self.marketplace, connector=connector)
+
+        self.assertEqual(stats['items_synced'], 5)
+        changed = MarketplaceInventory.objects.get(marketplace_sku='M-0')
+        self.assertEqual(changed.marketplace_quantity, 8)
+        self.assertEqual(changed.sync_status, 'pending')
+        self.assertEqual(MarketplaceInventory.objects.get(marketplace_sku='M-1').sync_status, 'synced')
+
+    def test_api_error_fails_batch_and_task_reports_stats(self):
+        """Test that a failed bulk call marks its batch as errored without aborting the sync."""
+        with mock.patch.object(
+            ExampleMarketplaceConnector, 'bulk_update_inventory', side_effect=ConnectionError('timeout')
+        ):
+            result = sync_marketplace_inventory.run(self.marketplace.id)
+
+        self.assertTrue(result['success'])
+        self.assertEqual(result['items_failed'], 5)
+        self.assertEqual(result['api_calls'], 1)
+        self.assertFalse(
+            MarketplaceInventory.objects.exclude(sync_status='error').exists()
+        )
+
+
+class SupplierPropagationTest(MarketplaceTestMixin, TestCase):
+    """Test cases for propagating supplier stock to marketplace inventory."""
+
+    def setUp(self):
+        self.marketplace = self.create_marketplace(inventory_buffer=2)
+        self.items = self.create_inventory(self.marketplace, 3, sync_status='synced')
+        self.supplier = Supplier.objects.create(name='Test Supplier', code='test-supplier')
+        self.products = [
+            SupplierProduct.objects.create(
+                supplier=self.supplier,
+                supplier_sku=f'I-{index}',
+                supplier_name=f'Product {index}',
+                quantity_available=10 + index
+            )
+            for index in range(3)
+        ]
+        # Everything currently on the marketplace matches the buffered quantity
+        for item in self.items:
+            MarketplaceInventory.objects.filter(pk=item.pk).update(
+                marketplace_quantity=item.available_quantity - 2
+            )
+
+    def test_links_by_sku_and_marks_only_changed_rows(self):
+        """Test that rows are pending only when the pushed quantity would change."""
+        self.assertEqual(link_supplier_products(self.marketplace), 3)
+        MarketplaceInventory.objects.filter(internal_sku='I-1').update(
+            available_quantity=1, marketplace_quantity=0
+        )
+
+        stats = propagate_supplier_quantities({
+            self.products[0].id: 10,   # unchanged
+            self.products[1].id: 2,    # buffered to 0 either way
+            self.products[2].id: 30,
+        })
+
+        self.assertEqual(stats['rows_updated'], 2)
+        self.assertEqual(stats['rows_dirty'], 1)
+        self.assertEqual(stats['marketplace_ids'], [self.marketplace.id])
+        statuses = dict(MarketplaceInventory.objects.values_list('internal_sku', 'sync_status'))
+        self.assertEqual(statuses, {'I-0': 'synced', 'I-1': 'synced', 'I-2': 'pending'})
+
+        [change] = self.items[2].recent_quantity_changes()
+        self.assertEqual(change['old_quantity'], 12)
+        self.assertEqual(change['new_quantity'], 30)
+        self.assertEqual(change['reason'], 'supplier_sync')
+
+    def test_quantity_and_movement_writes_are_atomic(self):
+        """Test that a failed movement insert rolls back the quantity update."""
+        link_supplier_products(self.marketplace)
+
+        with mock.patch.object(InventoryMovement.objects, 'bulk_create', side_effect=RuntimeError('disk full')), \
+                self.assertRaises(RuntimeError):
+            propagate_supplier_quantities({self.products[2].id: 30})
+
+        row = MarketplaceInventory.objects.get(internal_sku='I-2')
+        self.assertEqual((row.available_quantity, row.sync_status), (12, 'synced'))
+
+    def test_supplier_update_queues_marketplace_sync(self):
+        """Test that supplier inventory writes reach the marketplace after commit."""
+        link_supplier_products()
+        Marketplace.objects.filter(pk=self.marketplace.pk).update(status='active')
+
+        with mock.patch('marketplaces.tasks.propagate_supplier_inventory.delay') as propagate, \
+                self.captureOnCommitCallbacks(execute=True):
+            apply_inventory_updates(self.supplier, [{'sku': 'I-2', 'quantity': 40}])
+
+        propagate.assert_called_once_with([[self.products[2].id, 40]])
+
+        with mock.patch('marketplaces.tasks.sync_marketplace_inventory.delay') as sync:
+            result = propagate_supplier_inventory.run(propagate.call_args.args[0])
+
+        self.assertEqual(result['rows_dirty'], 1)
+        sync.assert_called_once_with(self.marketplace.id)
+        self.assertEqual(MarketplaceInventory.objects.get(internal_sku='I-2').available_quantity, 40)
+
+
+class InventoryMovementTest(MarketplaceTestMixin, TestCase):
+    """Test cases for the inventory movement log."""
+
+    def setUp(self):
+        self.marketplace = self.create_marketplace()
+        [self.item] = self.create_inventory(self.marketplace, 1)
+
+    def test_history_is_appended_without_rewriting_inventory(self):
+        """Test that logging a change inserts a movement and leaves the inventory row alone."""
+        with self.assertNumQueries(2):
+            self.item.log_quantity_change(10, 8, 'order')
+            self.item.log_quantity_change(8, 5, 'order')
+
+        history = self.item.recent_quantity_changes(limit=1)
+        self.assertEqual(len(history), 1)
+        self.assertEqual(history[0]['new_quantity'], 5)
+
+    def test_purge_deletes_old_movements_in_batches(self):
+        """Test that retention removes only movements older than the cutoff."""
+        old = timezone.now() - timedelta(days=100)
+        InventoryMovement.objects.bulk_create([
+            InventoryMovement(inventory=self.item, old_quantity=i, new_quantity=i + 1, created_at=old)
+            for i in range(5)
+        ])
+        self.item.log_quantity_change(5, 6, 'recent')
+
+        result = purge_inventory_movements.run(retention_days=90, batch_size=2)
+
+        self.assertEqual(result['movements_deleted'], 5)
+        self.assertEqual(list(self.item.movements.values_list('reason', flat=True)), ['recent'])
+
+
+class OrderIngestionTest(MarketplaceTestMixin, TestCase):
+    """Test cases for bulk marketplace order ingestion."""
+
+    def setUp(self):
+        self.marketplace = self.create_marketplace()
+        self.marketplace.auto_acknowledge_orders = True
+        self.marketplace.status = 'active'
+        self.marketplace.save()
+
+    def order(self, order_id, **kwargs):
+        return {
+            'order_id': order_id,
+            'customer_name': 'Customer',
+            'total_amount': '20.00',
+            'ordered_at': '2026-01-01T00:00:00+00:00',
+            **kwargs
+        }
+
+    def test_creates_updates_and_skips_with_bulk_queries(self):
+        """Test one lookup, insert and update per chunk, skipping unchanged payloads."""
+        ingest_orders(self.marketplace, [self.order('A'), self.order('B')])
+
+        # Savepoint, marketplace lock, existence lookup, bulk insert, bulk
+        # update, counters update and refresh, release
+        with self.assertNumQueries(8):
+            stats, to_acknowledge = ingest_orders(self.marketplace, [
+                self.order('A'),
+                self.order('B', status='shipped', tracking_number='T-1'),
+                self.order('C'),
+                {'customer_name': 'No ID'},
+            ])
+
+        self.assertEqual(stats['orders_created'], 1)
+        self.assertEqual(stats['orders_updated'], 1)
+        self.assertEqual(stats['orders_unchanged'], 1)
+        self.assertEqual(stats['orders_errors'], 1)
+        self.assertEqual(to_acknowledge, ['C'])
+
+        shipped = MarketplaceOrder.objects.get(marketplace_order_id='B')
+        self.assertEqual(shipped.status, 'shipped')
+        self.assertEqual(shipped.tracking_number, 'T-1')
+        self.assertEqual(
+            MarketplaceOrder.objects.get(marketplace_order_id='C').internal_order_number,
+            'TEST-MARKET-C'
+        )
+
+    def test_task_queues_acknowledgements_after_ingestion(self):
+        """Test that acknowledgements are queued, then applied in bulk."""
+        with mock.patch.object(ExampleMarketplaceConnector, 'fetch_orders',
+                               return_value=[self.order('A'), self.order('B')]), \
+                mock.patch('marketplaces.tasks.acknowledge_marketplace_orders.delay') as acknowledge, \
+                self.captureOnCommitCallbacks(execute=True):
+            result = sync_marketplace_orders.run(self.marketplace.id)
+
+        self.assertEqual(result['orders_created'], 2)
+        acknowledge.assert_called_once_with(self.marketplace.id, ['A', 'B'])
+
+        connector = ExampleMarketplaceConnector(self.marketplace)
+        with mock.patch.object(connector, 'acknowledge_order', side_effect=lambda order_id: order_id == 'A'):
+            stats = acknowledge_orders(self.marketplace, ['A', 'B'], connector=connector)
+
+        self.assertEqual(stats, {'orders_acknowledged': 1, 'orders_failed': 1, 'api_calls': 1})
+        statuses = dict(MarketplaceOrder.objects.values_list('marketplace_order_id', 'status'))
+        self.assertEqual(statuses, {'A': 'acknowledged', 'B': 'pending'})
+
+    def test_reingest_keeps_local_acknowledgement(self):
+        """Test that a stale 'pending' payload does not undo an acknowledgement."""
+        ingest_orders(self.marketplace, [self.order('A', status='pending')])
+        MarketplaceOrder.objects.get(marketplace_order_id='A').acknowledge_order()
+
+        stats, _ = ingest_orders(self.marketplace, [self.order('A', status='pending', carrier='UPS')])
+
+        self.assertEqual(stats['orders_updated'], 1)
+        order = MarketplaceOrder.objects.get(marketplace_order_id='A')
+        self.assertEqual((order.status, order.carrier), ('acknowledged', 'UPS'))
+
+        # Later marketplace statuses still apply
+        ingest_orders(self.marketplace, [self.order('A', status='processing')])
+        order.refresh_from_db()
+        self.assertEqual(order.status, 'processing')
+
+
+class OverlappingOrderSyncTest(MarketplaceTestMixin, TransactionTestCase):
+    """Test order ingestion from two overlapping syncs of one marketplace."""
+
+    def test_overlapping_chunks_do_not_insert_the_same_order(self):
+        """Test that the second chunk waits, then updates instead of inserting."""
+        marketplace = self.create_marketplace()
+        order = {
+            'order_id': 'A',
+            'customer_name': 'Customer',
+            'total_amount': '20.00',
+            'ordered_at': '2026-01-01T00:00:00+00:00',
+        }
+        inserted = threading.Event()
+        release = threading.Event()
+        results = {}
+        build = build_order_lines
+
+        def slow_build(orders, replace=False):
+            # Hold the first chunk open after its insert, before it commits
+            if threading.current_thread().name == 'first':
+                inserted.set()
+                release.wait(5)
+            return build(orders, replace=replace)
+
+        def run(name, payload):
+            try:
+                results[name] = ingest_orders(marketplace, [payload])[0]
+            finally:
+                connection.close()
+
+        with mock.patch('marketplaces.sync.build_order_lines', slow_build):
+            first = threading.Thread(target=run, name='first', args=('first', order))
+            first.start()
+            self.assertTrue(inserted.wait(5))
+            second = threading.Thread(target=run, name='second',
+                                      args=('second', {**order, 'status': 'shipped'}))
+            second.start()
+            release.set()
+            first.join(10)
+            second.join(10)
+
+        self.assertEqual(results['first']['orders_created'], 1)
+        self.assertEqual(results['second']['orders_errors'], 0)
+        self.assertEqual(results['second']['orders_updated'], 1)
+        self.assertEqual(MarketplaceOrder.objects.get(marketplace_order_id='A').status, 'shipped')
+        marketplace.refresh_from_db()
+        self.assertEqual(marketplace.total_orders, 1)
+
+
+class OrderSyncCursorTest(MarketplaceTestMixin, TestCase):
+    """Test cases for cursor-based incremental order sync."""
+
+    def setUp(self):
+        self.marketplace = self.create_marketplace()
+        self.marketplace.status = 'active'
+        self.marketplace.save()
+        self.pages = {
+            None: ([{'order_id': 'A', 'customer_name': 'C', 'updated_at': '2026-01-01T10:00:00+00:00'}], 'p2'),
+            'p2': ([{'order_id': 'B', 'customer_name': 'C', 'updated_at': '2026-01-01T11:00:00+00:00'}], None),
+        }
+
+    def fetch_page(self, updated_after=None, page_token=None, page_size=None):
+        return self.pages[page_token]
+
+    def test_pages_advance_cursor_and_resume_after_failure(self):
+        """Test that a failed page resumes from its token and completion moves the cursor."""
+        calls = []
+
+        def failing_second_page(updated_after=None, page_token=None, page_size=None):
+            calls.append(page_token)
+            if page_token == 'p2':
+                raise ConnectionError('timeout')
+            return self.fetch_page(updated_after, page_token, page_size)
+
+        with mock.patch.object(ExampleMarketplaceConnector, 'fetch_order_page', side_effect=failing_second_page), \
+                self.assertRaises(Exception):
+            sync_marketplace_orders.run(self.marketplace.id)
+
+        state = MarketplaceOrderSyncState.objects.get(marketplace=self.marketplace)
+        self.assertEqual(state.status, 'failed')
+        self.assertEqual(state.page_token, 'p2')
+        self.assertTrue(MarketplaceOrder.objects.filter(marketplace_order_id='A').exists())
+
+        with mock.patch.object(ExampleMarketplaceConnector, 'fetch_order_page', side_effect=self.fetch_page) as fetch:
+            result = sync_marketplace_orders.run(self.marketplace.id)
+
+        self.assertEqual(fetch.call_args.kwargs['page_token'], 'p2')
+        self.assertEqual(result['orders_created'], 2)
+        state.refresh_from_db()
+        self.assertEqual(state.status, 'completed')
+        self.assertEqual(state.updated_after.isoformat(), '2026-01-01T11:00:00+00:00')
+
+    def test_incremental_runs_from_cursor_and_reconciles_when_due(self):
+        """Test that later syncs start near the cursor, with periodic reconciliation."""
+        state = MarketplaceOrderSyncState.objects.create(
+            marketplace=self.marketplace,
+            status='completed',
+            updated_after=timezone.now() - timedelta(hours=1),
+            last_reconciled_at=timezone.now()
+        )
+
+        with mock.patch.object(ExampleMarketplaceConnector, 'fetch_order_page', side_effect=self.fetch_page) as fetch:
+            result = sync_marketplace_orders.run(self.marketplace.id)
+            self.assertEqual(result['run_type'], 'incremental')
+            self.assertEqual(
+                fetch.call_args_list[0].kwargs['updated_after'],
+                state.updated_after - timedelta(seconds=300)
+            )
+
+            # Unchanged orders are neither rewritten nor recounted
+            MarketplaceOrderSyncState.objects.filter(pk=state.pk).update(
+                last_reconciled_at=timezone.now() - timedelta(days=2)
+            )
+            result = sync_marketplace_orders.run(self.marketplace.id)
+
+        self.assertEqual(result['run_type'], 'reconcile')
+        self.assertEqual(result['orders_unchanged'], 2)
+        state.refresh_from_db()
+        self.assertGreater(state.last_reconciled_at, timezone.now() - timedelta(minutes=1))
+
+
+@override_settings(RATE_LIMIT_REDIS_URL='', MARKETPLACE_RATE_LIMIT_MAX_WAIT_SECONDS=0)
+class MarketplaceRateLimitTest(MarketplaceTestMixin, TestCase):
+    """Test cases for the shared marketplace request budget."""
+
+    def setUp(self):
+        reset_rate_limiters()
+        self.addCleanup(reset_rate_limiters)
+        self.marketplace = self.create_marketplace()
+        self.marketplace.rate_limit_requests = 10
+        self.marketplace.rate_limit_window = 3600
+        self.marketplace.save()
+        self.connector = ExampleMarketplaceConnector(self.marketplace)
+
+    def test_response_headers_adjust_shared_limiter(self):
+        """Test that remaining quota caps the budget and Retry-After pauses it."""
+        response = mock.Mock(status_code=200, headers={'X-RateLimit-Remaining': '3'})
+        self.connector.handle_rate_limit(response)
+        self.assertEqual(self.connector.get_rate_limit_info()['requests_remaining'], 3)
+
+        # Another connector for the same marketplace shares the budget
+        other = ExampleMarketplaceConnector(self.marketplace)
+        response = mock.Mock(status_code=429, headers={'Retry-After': '120'})
+        with self.assertLogs('marketplaces.connectors.base', level='WARNING'):
+            self.connector.handle_rate_limit(response)
+        self.assertFalse(other.throttle(timeout=0))
+
+    def test_bulk_push_defers_when_budget_is_exhausted(self):
+        """Test that inventory pushes stop at the budget and leave the rest pending."""
+        self.create_inventory(self.marketplace, 3)
+        self.connector.rate_limiter.adjust(remaining=1)
+
+        stats = push_inventory(self.marketplace, connector=self.connector, batch_size=2)
+
+        self.assertTrue(stats['rate_limited'])
+        self.assertEqual(stats['api_calls'], 1)
+        self.assertEqual(stats['items_synced'], 2)
+        self.assertEqual(MarketplaceInventory.objects.filter(sync_status='pending').count(), 1)
+
+    def test_order_sync_requeues_when_budget_is_exhausted(self):
+        """Test that order sync pauses on its page and schedules its own resumption."""
+        self.marketplace.status = 'active'
+        self.marketplace.save()
+        self.connector.rate_limiter.adjust(remaining=0)
+
+        with mock.patch('marketplaces.tasks.create_connector', return_value=self.connector), \
+                mock.patch.object(sync_marketplace_orders, 'apply_async') as requeue, \
+                mock.patch.object(ExampleMarketplaceConnector, 'fetch_order_page') as fetch:
+            result = sync_marketplace_orders.run(self.marketplace.id)
+
+        self.assertTrue(result['rate_limited'])
+        fetch.assert_not_called()
+        requeue.assert_called_once_with((self.marketplace.id,), countdown=RATE_LIMIT_RETRY_SECONDS)
+        state = MarketplaceOrderSyncState.objects.get(marketplace=self.marketplace)
+        self.assertEqual(state.status, 'failed')
+        self.assertTrue(state.is_resumable)
+
+
+class MarketplaceSyncJobTest(MarketplaceTestMixin, TestCase):
+    """Test cases for background marketplace sync jobs."""
+
+    def setUp(self):
+        self.marketplace = self.create_marketplace()
+        self.marketplace.status = 'active'
+        self.marketplace.save()
+        self.create_inventory(self.marketplace, 2)
+        self.user = User.objects.create_user(username='syncer', password='secret')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_sync_endpoint_queues_job_without_calling_marketplace(self):
+        """Test that the sync action returns a queued job immediately."""
+        with mock.patch('marketplaces.tasks.run_marketplace_sync_job.apply_async') as run, \
+                mock.patch.object(ExampleMarketplaceConnector, 'bulk_update_inventory') as push, \
+                self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                f'/marketplaces/marketplaces/{self.marketplace.id}/sync/',
+                {'type': 'inventory'},
+                format='json'
+            )
+
+        self.assertEqual(response.status_code, 202)
+        job = MarketplaceSyncJob.objects.get(id=response.json()['job']['id'])
+        self.assertEqual(job.status, 'queued')
+        self.assertEqual(list(job.phases), ['inventory'])
+        run.assert_called_once_with((job.id,), task_id=job.task_id)
+        push.assert_not_called()
+
+        status = self.client.get(f'/marketplaces/sync-jobs/{job.id}/')
+        self.assertEqual(status.json()['progress_percentage'], 0.0)
+
+    def test_bulk_sync_reports_skipped_manual_overrides(self):
+        """Test that bulk sync queues items and counts manual overrides it leaves alone."""
+        items = MarketplaceInventory.objects.filter(marketplace=self.marketplace).order_by('id')
+        MarketplaceInventory.objects.filter(marketplace=self.marketplace).update(sync_status='synced')
+        items.filter(internal_sku='I-1').update(manual_override=True, override_quantity=3)
+
+        with mock.patch('marketplaces.tasks.run_marketplace_sync_job.apply_async'):
+            response = self.client.post(
+                '/marketplaces/inventory/bulk_sync/',
+                {'marketplace_id': self.marketplace.id},
+                format='json'
+            )
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()['marked_pending'], 1)
+        self.assertEqual(response.json()['skipped_manual_override'], 1)
+        self.assertEqual(dict(items.values_list('internal_sku', 'sync_status')),
+                         {'I-0': 'pending', 'I-1': 'synced'})
+
+    def test_job_records_each_phase(self):
+        """Test that phases run in order and a failed phase fails the job."""
+        job = MarketplaceSyncJob.objects.create(
+            marketplace=self.marketplace,
+            sync_type='all',
+            phases=MarketplaceSyncJob.initial_phases('all')
+        )
+
+        with mock.patch.object(ExampleMarketplaceConnector, 'fetch_order_page', return_value=([], None)), \
+                mock.patch.object(ExampleMarketplaceConnector, 'search_listings', side_effect=ConnectionError('down')):
+            result = run_marketplace_sync_job.run(job.id)
+
+        job.refresh_from_db()
+        self.assertFalse(result['success'])
+        self.assertEqual(job.status, 'failed')
+        self.assertEqual(job.progress_percentage, 100.0)
+        self.assertEqual(job.phases['orders']['status'], 'completed')
+        self.assertEqual(job.phases['listings']['status'], 'failed')
+        self.assertIn('down', job.phases['listings']['error'])
+        self.assertEqual(job.phases['inventory']['result']['items_synced'], 2)
+
+
+class MarketplaceStatisticsTest(MarketplaceTestMixin, TestCase):
+    """Test cases for marketplace statistics and counters."""
+
+    def setUp(self):
+        cache.clear()
+        self.marketplace = self.create_marketplace()
+        self.create_inventory(self.marketplace, 3)
+
+    def order(self, order_id, **kwargs):
+        return {
+            'order_id': order_id,
+            'customer_name': 'Customer',
+            'total_amount': '20.00',
+            'ordered_at': '2026-01-01T00:00:00+00:00',
+            **kwargs
+        }
+
+    def test_counters_follow_order_and_listing_changes(self):
+        """Test that counters are adjusted incrementally and match a recount."""
+        ingest_orders(self.marketplace, [self.order('A'), self.order('B', status='shipped')])
+        self.assertEqual(self.marketplace.total_orders, 2)
+        self.assertEqual(self.marketplace.total_revenue, Decimal('20.00'))
+
+        ingest_orders(self.marketplace, [self.order('B', status='cancelled')])
+        MarketplaceOrder.objects.get(marketplace_order_id='A').mark_as_shipped('T-1', 'UPS')
+        self.marketplace.refresh_from_db()
+        self.assertEqual(self.marketplace.total_orders, 2)
+        self.assertEqual(self.marketplace.total_revenue, Decimal('20.00'))
+
+        ingest_listings(self.marketplace, [
+            {'listing_id': 'L-0', 'status': 'active'},
+            {'listing_id': 'L-1', 'status': 'ended'},
+            {'listing_id': 'L-9', 'title': 'New', 'price': '5.00'},
+        ])
+        self.marketplace.refresh_from_db()
+        self.assertEqual(self.marketplace.total_listings, 2)
+
+        counters = (self.marketplace.total_listings, self.marketplace.total_orders,
+                    self.marketplace.total_revenue)
+        self.marketplace.recount_totals()
+        self.assertEqual(
+            (self.marketplace.total_listings, self.marketplace.total_orders,
+             self.marketplace.total_revenue),
+            counters
+        )
+
+    def test_statistics_use_one_query_per_table_and_cache(self):
+        """Test conditional aggregation and the max_age staleness bound."""
+        ingest_orders(self.marketplace, [self.order('A'), self.order('B', status='shipped')])
+
+        with self.assertNumQueries(3):
+            stats = get_marketplace_statistics(self.marketplace, max_age=0)
+        self.assertEqual(stats['listings']['pending'], 3)
+        self.assertEqual(stats['orders']['total'], 2)
+        self.assertEqual(stats['orders']['shipped'], 1)
+        self.assertEqual(stats['orders']['revenue'], Decimal('40.00'))
+        self.assertEqual(stats['inventory']['total_skus'], 3)
+
+        ingest_orders(self.marketplace, [self.order('C')])
+        with self.assertNumQueries(0):
+            cached = get_marketplace_statistics(self.marketplace)
+        self.assertEqual(cached['orders']['total'], 2)
+
+        user = User.objects.create_user(username='viewer', password='secret')
+        client = APIClient()
+        client.force_authenticate(user)
+        url = f'/marketplaces/marketplaces/{self.marketplace.id}/statistics/'
+        self.assertEqual(client.get(url, {'max_age': 0}).json()['orders']['total'], 3)
+        self.assertEqual(client.get(url, {'max_age': 'soon'}).status_code, 400)
+
+
+class OrderLineTest(MarketplaceTestMixin, TestCase):
+    """Test cases for normalized order lines."""
+
+    def setUp(self):
+        self.marketplace = self.create_marketplace()
+        self.items = self.create_inventory(self.marketplace, 2)
+        supplier = Supplier.objects.create(name='Test Supplier', code='test-supplier')
+        self.product = SupplierProduct.objects.create(
+            supplier=supplier, supplier_sku='I-0', supplier_name='Product 0'
+        )
+        MarketplaceInventory.objects.filter(pk=self.items[0].pk).update(supplier_product=self.product)
+
+    def order(self, order_id, items):
+        return {
+            'order_id': order_id,
+            'customer_name': 'Customer',
+            'total_amount': '40.00',
+            'ordered_at': '2026-01-01T00:00:00+00:00',
+            'items': items
+        }
+
+    def test_ingest_writes_linked_lines(self):
+        """Test that new orders get lines linked to listings and supplier products."""
+        ingest_orders(self.marketplace, [self.order('A', [
+            {'sku': 'M-0', 'title': 'Listing 0', 'quantity': 2, 'price': '15.00'},
+            {'sku': 'UNKNOWN', 'quantity': 1, 'price': '10.00'},
+            {'sku': 'M-1', 'quantity': 1, 'price': 'n/a'},
+        ])])
+
+        lines = list(MarketplaceOrderLine.objects.order_by('line_number'))
+        self.assertEqual([line.line_number for line in lines], [1, 2])
+        self.assertEqual(lines[0].listing_id, self.items[0].listing_id)
+        self.assertEqual(lines[0].supplier_product_id, self.product.id)
+        self.assertEqual(lines[0].total_price, Decimal('30.00'))
+        self.assertIsNone(lines[1].listing_id)
+        self.assertEqual(lines[0].ordered_at, lines[0].order.ordered_at)
+
+        # Re-ingesting an existing order does not duplicate its lines
+        ingest_orders(self.marketplace, [self.order('A', [{'sku': 'M-0'}])])
+        self.assertEqual(MarketplaceOrderLine.objects.count(), 2)
+
+    def test_backfill_command_populates_missing_lines(self):
+        """Test that the backfill writes lines only for orders without them."""
+        ingest_orders(self.marketplace, [
+            self.order('A', [{'sku': 'M-0', 'quantity': 1, 'price': '5.00'}]),
+            self.order('B', [{'sku': 'M-1', 'quantity': 3, 'price': '5.00'}]),
+        ])
+        MarketplaceOrderLine.objects.filter(order__marketplace_order_id='B').delete()
+
+        call_command('backfill_order_lines', batch_size=1, stdout=io.StringIO())
+        self.assertEqual(MarketplaceOrderLine.objects.count(), 2)
+        line = MarketplaceOrderLine.objects.get(order__marketplace_order_id='B')
+        self.assertEqual((line.sku, line.quantity, line.listing_id), ('M-1', 3, self.items[1].listing_id))
+
+        call_command('backfill_order_lines', rebuild=True, stdout=io.StringIO())
+        self.assertEqual(MarketplaceOrderLine.objects.count(), 2)
+
+
+@override_settings(RATE_LIMIT_REDIS_URL='')
+class ListingSyncTest(MarketplaceTestMixin, TestCase):
+    """Test cases for change-aware listing sync and push."""
+
+    def setUp(self):
+        reset_rate_limiters()
+        self.addCleanup(reset_rate_limiters)
+        self.marketplace = self.create_marketplace()
+        self.connector = ExampleMarketplaceConnector(self.marketplace)
+        self.payloads = [
+            {'listing_id': f'L-{index}', 'sku': f'M-{index}', 'title': f'Listing {index}',
+             'price': '10.00', 'quantity': 5, 'status': 'active'}
+            for index in range(3)
+        ]
+        ingest_listings(self.marketplace, self.payloads)
+
+    def test_unchanged_payloads_are_skipped(self):
+        """Test that only changed listings are upserted."""
+        first = MarketplaceListing.objects.get(marketplace_listing_id='L-0')
+
+        # Savepoint, existing listings lookup, release
+        with self.assertNumQueries(3):
+            stats = ingest_listings(self.marketplace, self.payloads)
+        self.assertEqual(stats['listings_unchanged'], 3)
+
+        self.payloads[1]['price'] = '12.50'
+        stats = ingest_listings(self.marketplace, self.payloads + [{'listing_id': 'L-9', 'price': 'bad'}])
+        self.assertEqual(
+            (stats['listings_created'], stats['listings_updated'],
+             stats['listings_unchanged'], stats['listings_errors']),
+            (0, 1, 2, 1)
+        )
+
+        changed = MarketplaceListing.objects.get(marketplace_listing_id='L-1')
+        self.assertEqual(changed.price, Decimal('12.50'))
+        self.assertGreater(changed.last_synced_at, first.last_synced_at)
+        unchanged = MarketplaceListing.objects.get(marketplace_listing_id='L-0')
+        self.assertEqual(unchanged.last_synced_at, first.last_synced_at)
+        self.assertEqual(MarketplaceListing.objects.count(), 3)
+
+        self.marketplace.refresh_from_db()
+        self.assertEqual(self.marketplace.total_listings, 3)
+
+    def test_push_sends_only_locally_changed_listings(self):
+        """Test that listings are pushed only when their content hash changed."""
+        with mock.patch.object(ExampleMarketplaceConnector, 'update_listing') as update:
+            update.return_value = {'success': True}
+            stats = push_listings(self.marketplace, connector=self.connector)
+            update.assert_not_called()
+            self.assertEqual(stats['listings_unchanged'], 3)
+
+            MarketplaceListing.objects.filter(marketplace_listing_id='L-2').update(price=Decimal('9.5'))
+            stats = push_listings(self.marketplace, connector=self.connector, batch_size=2)
+            update.assert_called_once()
+            self.assertEqual(update.call_args[0][0], 'L-2')
+            self.assertEqual(update.call_args[0][1]['price'], '9.50')
+            self.assertEqual(stats['listings_pushed'], 1)
+
+            update.reset_mock()
+            push_listings(self.marketplace, connector=self.connector)
+            update.assert_not_called()
+
+            MarketplaceListing.objects.filter(marketplace_listing_id='L-0').update(title='Renamed')
+            update.return_value = {'success': False, 'error': 'Rejected'}
+            stats = push_listings(self.marketplace, connector=self.connector)
+            self.assertEqual(stats['listings_failed'], 1)
+
+        failed = MarketplaceListing.objects.get(marketplace_listing_id='L-0')
+        self.assertEqual((failed.error_message, failed.error_count), ('Rejected', 1))
+        self.assertNotEqual(failed.pushed_hash, failed.compute_content_hash())
@@ -13,6 +13,7 @@ router.register(r'marketplaces', views.MarketplaceViewSet)
 router.register(r'listings', views.MarketplaceListingViewSet)
 router.register(r'orders', views.MarketplaceOrderViewSet)
 router.register(r'inventory', views.MarketplaceInventoryViewSet)
+router.register(r'sync-jobs', views.MarketplaceSyncJobViewSet)
 
 urlpatterns = [
     path('', include(router.urls)),
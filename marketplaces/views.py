@@ -8,12 +8,16 @@ from rest_framework.permissions import IsAuthenticated
 from django.db.models import Q, Count, Sum
 
 from .models import (
-    Marketplace, MarketplaceListing, MarketplaceOrder, MarketplaceInventory
+    Marketplace, MarketplaceListing, MarketplaceOrder, MarketplaceInventory,
+    MarketplaceSyncJob
 )
 from .serializers import (
     MarketplaceSerializer, MarketplaceListingSerializer,
-    MarketplaceOrderSerializer, MarketplaceInventorySerializer
+    MarketplaceOrderSerializer, MarketplaceInventorySerializer,
+    InventoryMovementSerializer, MarketplaceSyncJobSerializer
 )
+from .statistics import get_marketplace_statistics
+from .tasks import start_marketplace_sync_job
 
 
 class MarketplaceViewSet(viewsets.ModelViewSet):
@@ -54,73 +58,42 @@ class MarketplaceViewSet(viewsets.ModelViewSet):
     
     @action(detail=True, methods=['post'])
     def sync(self, request, pk=None):
-        """Trigger sync for a marketplace."""
+        """Queue a background sync for a marketplace and return its job."""
         marketplace = self.get_object()
         sync_type = request.data.get('type', 'all')  # all, orders, listings, inventory
         
-        try:
-            connector = marketplace.get_connector()
-            results = {
-                'status': 'success',
-                'synced': {}
-            }
-            
-            if sync_type in ['all', 'orders']:
-                orders = connector.fetch_orders()
-                results['synced']['orders'] = len(orders)
-            
-            if sync_type in ['all', 'listings']:
-                listings = connector.search_listings()
-                results['synced']['listings'] = len(listings)
-            
-            if sync_type in ['all', 'inventory']:
-                # Sync inventory items
-                inventory_count = 0
-                for item in marketplace.inventory_items.all():
-                    if item.sync_to_marketplace():
-                        inventory_count += 1
-                results['synced']['inventory'] = inventory_count
-            
-            marketplace.update_sync_status(True)
-            return Response(results)
-            
-        except Exception as e:
-            marketplace.update_sync_status(False, str(e))
+        if sync_type not in MarketplaceSyncJob.PHASES:
             return Response({
                 'status': 'error',
-                'message': str(e)
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+                'message': f"Invalid sync type: {sync_type}"
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        job = start_marketplace_sync_job(marketplace, sync_type, user=request.user)
+        return Response({
+            'status': 'queued',
+            'job': MarketplaceSyncJobSerializer(job).data
+        }, status=status.HTTP_202_ACCEPTED)
     
     @action(detail=True, methods=['get'])
     def statistics(self, request, pk=None):
-        """Get marketplace statistics."""
+        """
+        Get marketplace statistics.
+        
+        Served from a cache; pass max_age (seconds) to bound how old the
+        values may be, or max_age=0 to recompute them.
+        """
         marketplace = self.get_object()
         
-        stats = {
-            'listings': {
-                'total': marketplace.listings.count(),
-                'active': marketplace.listings.filter(status='active').count(),
-                'pending': marketplace.listings.filter(status='pending').count(),
-                'error': marketplace.listings.filter(status='error').count(),
-            },
-            'orders': {
-                'total': marketplace.orders.count(),
-                'pending': marketplace.orders.filter(status='pending').count(),
-                'processing': marketplace.orders.filter(status='processing').count(),
-                'shipped': marketplace.orders.filter(status='shipped').count(),
-                'revenue': marketplace.orders.aggregate(
-                    total=Sum('total_amount')
-                )['total'] or 0,
-            },
-            'inventory': {
-                'total_skus': marketplace.inventory_items.count(),
-                'synced': marketplace.inventory_items.filter(sync_status='synced').count(),
-                'pending': marketplace.inventory_items.filter(sync_status='pending').count(),
-                'error': marketplace.inventory_items.filter(sync_status='error').count(),
-            }
-        }
+        max_age = request.query_params.get('max_age')
+        try:
+            max_age = max(int(max_age), 0) if max_age is not None else None
+        except ValueError:
+            return Response({
+                'status': 'error',
+                'message': 'max_age must be an integer'
+            }, status=status.HTTP_400_BAD_REQUEST)
         
-        return Response(stats)
+        return Response(get_marketplace_statistics(marketplace, max_age=max_age))
 
 
 class MarketplaceListingViewSet(viewsets.ModelViewSet):
@@ -325,9 +298,30 @@ class MarketplaceInventoryViewSet(viewsets.ModelViewSet):
                 'message': str(e)
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
+    @action(detail=True, methods=['get'])
+    def history(self, request, pk=None):
+        """Get recent quantity changes for an inventory item, newest first."""
+        inventory = self.get_object()
+        
+        try:
+            limit = min(int(request.query_params.get('limit', 100)), 1000)
+        except ValueError:
+            return Response({
+                'status': 'error',
+                'message': 'limit must be an integer'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        movements = inventory.movements.order_by('-created_at', '-id')[:max(limit, 1)]
+        return Response(InventoryMovementSerializer(movements, many=True).data)
+    
     @action(detail=False, methods=['post'])
     def bulk_sync(self, request):
-        """Bulk sync inventory items."""
+        """
+        Bulk sync inventory items.
+        
+        Items under a manual override are not pushed by the inventory sync,
+        so they are not queued; their count is returned as skipped_manual_override.
+        """
         marketplace_id = request.data.get('marketplace_id')
         sku_list = request.data.get('skus', [])
         
@@ -337,22 +331,40 @@ class MarketplaceInventoryViewSet(viewsets.ModelViewSet):
                 'message': 'marketplace_id is required'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        queryset = self.get_queryset().filter(marketplace_id=marketplace_id)
+        try:
+            marketplace = Marketplace.objects.get(id=marketplace_id)
+        except (Marketplace.DoesNotExist, ValueError):
+            return Response({
+                'status': 'error',
+                'message': 'Marketplace not found'
+            }, status=status.HTTP_404_NOT_FOUND)
+        
+        queryset = self.get_queryset().filter(marketplace=marketplace)
         
         if sku_list:
             queryset = queryset.filter(internal_sku__in=sku_list)
         
-        success_count = 0
-        error_count = 0
+        skipped = queryset.filter(manual_override=True).count()
         
-        for item in queryset:
-            if item.sync_to_marketplace():
-                success_count += 1
-            else:
-                error_count += 1
+        # Mark the items for the next push and sync them in the background
+        queued = queryset.filter(manual_override=False).exclude(
+            sync_status='pending'
+        ).update(sync_status='pending')
+        job = start_marketplace_sync_job(marketplace, 'inventory', user=request.user)
         
         return Response({
-            'status': 'success',
-            'synced': success_count,
-            'errors': error_count
-        })
+            'status': 'queued',
+            'marked_pending': queued,
+            'skipped_manual_override': skipped,
+            'job': MarketplaceSyncJobSerializer(job).data
+        }, status=status.HTTP_202_ACCEPTED)
+
+
+class MarketplaceSyncJobViewSet(viewsets.ReadOnlyModelViewSet):
+    """ViewSet for polling background marketplace sync jobs."""
+    
+    queryset = MarketplaceSyncJob.objects.select_related('marketplace')
+    serializer_class = MarketplaceSyncJobSerializer
+    permission_classes = [IsAuthenticated]
+    filterset_fields = ['marketplace', 'status', 'sync_type']
+    ordering_fields = ['created_at']
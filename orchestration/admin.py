@@ -196,7 +196,9 @@ class WorkflowStepExecutionAdmin(admin.ModelAdmin):
         'workflow_execution__workflow__name'
     ]
     readonly_fields = [
-        'started_at', 'completed_at', 'duration_seconds', 'created_at', 'updated_at'
+        'started_at', 'completed_at', 'duration_seconds',
+        'progress_done', 'progress_total', 'progress_updated_at',
+        'created_at', 'updated_at'
     ]
     
     fieldsets = (
@@ -210,6 +212,9 @@ class WorkflowStepExecutionAdmin(admin.ModelAdmin):
         ('Timing', {
             'fields': ('started_at', 'completed_at', 'duration_seconds')
         }),
+        ('Progress', {
+            'fields': ('progress_done', 'progress_total', 'progress_updated_at')
+        }),
         ('Error Information', {
             'fields': ('error_message', 'error_details', 'retry_count'),
             'classes': ('collapse',)
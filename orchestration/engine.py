@@ -6,7 +6,7 @@ import asyncio
 import traceback
 from typing import Any, Dict, List, Optional, Type
 from datetime import timedelta
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import as_completed
 
 from django.db import transaction
 from django.utils import timezone
@@ -17,6 +17,8 @@ from .models import (
     WorkflowStepExecution, WorkflowSchedule
 )
 from .executors import get_step_executor
+from .pool import get_shared_pool
+from .progress import ProgressReporter
 
 
 logger = logging.getLogger(__name__)
@@ -28,15 +30,19 @@ class WorkflowEngine:
     Handles step execution, error handling, retries, and state management.
     """
     
-    def __init__(self, max_workers: int = 5):
+    def __init__(self, max_workers: Optional[int] = None):
         """
         Initialize the workflow engine.
         
+        Parallel steps run on a process-wide pool shared by all engine
+        instances, sized by the WORKFLOW_ENGINE_MAX_WORKERS setting.
+        
         Args:
-            max_workers: Maximum number of parallel workers
+            max_workers: Pool size override, only honoured if the shared
+                pool has not been created yet in this process
         """
-        self.max_workers = max_workers
-        self.executor_pool = ThreadPoolExecutor(max_workers=max_workers)
+        self.executor_pool = get_shared_pool(max_workers)
+        self.max_workers = self.executor_pool.max_workers
     
     def execute_workflow(self, workflow: Workflow, input_data: Dict[str, Any] = None,
                         triggered_by=None, trigger_type: str = 'manual') -> WorkflowExecution:
@@ -221,14 +227,18 @@ class WorkflowEngine:
                 # Get executor and execute
                 executor_class = step.get_executor_class()
                 executor = executor_class(step, context)
+                executor.progress = ProgressReporter(step_execution)
                 
                 # Prepare input data
                 input_data = self._prepare_step_input(step, context)
                 step_execution.input_data = input_data
                 step_execution.save(update_fields=['input_data'])
                 
-                # Execute step
-                output_data = executor.execute(input_data)
+                # Execute step, always recording the final reported progress
+                try:
+                    output_data = executor.execute(input_data)
+                finally:
+                    executor.progress.flush()
                 
                 # Store output in context
                 context['step_outputs'][step.id] = output_data
@@ -479,9 +489,19 @@ class WorkflowEngine:
             
             workflow.save()
     
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """Get saturation metrics for the shared executor pool."""
+        return self.executor_pool.get_stats()
+    
     def shutdown(self):
-        """Shutdown the workflow engine and cleanup resources."""
-        self.executor_pool.shutdown(wait=True)
+        """
+        Release the engine.
+        
+        The executor pool is shared with other engine instances, so it is
+        left running; use orchestration.pool.shutdown_shared_pool() on
+        process exit.
+        """
+        self.executor_pool = None
 
 
 class WorkflowScheduler:
@@ -6,13 +6,14 @@ import json
 import logging
 import requests
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Type
+from typing import Any, Dict, List, Optional, Type
 
 from django.db import connection
 from django.db.models import Q
 
 from source_data.models import SourceData
 from suppliers.models import Supplier, SupplierProduct
+from suppliers.sync import SupplierProductWriter, apply_inventory_updates, normalize_inventory_updates
 from marketplaces.models import Marketplace, MarketplaceListing
 
 
@@ -37,6 +38,7 @@ class BaseStepExecutor(ABC):
         self.context = context
         self.config = step.config or {}
         self.metrics = {}
+        self.progress = None
     
     @abstractmethod
     def execute(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
@@ -55,6 +57,20 @@ class BaseStepExecutor(ABC):
         """Get execution metrics."""
         return self.metrics
     
+    def report_progress(self, done: int, total: Optional[int] = None):
+        """
+        Report item-level progress.
+        
+        Updates are coalesced by the attached ProgressReporter, so this can
+        be called for every item processed. Without a reporter it is a no-op.
+        
+        Args:
+            done: Number of items processed so far
+            total: Total number of items, if known
+        """
+        if self.progress:
+            self.progress.report_progress(done, total)
+    
     def log_info(self, message: str):
         """Log info message with step context."""
         logger.info(f"[{self.step.name}] {message}")
@@ -102,34 +118,21 @@ class DataFetchExecutor(BaseStepExecutor):
                 self.log_info(f"Fetching products from supplier: {supplier.name}")
                 products = connector.fetch_products()
                 
-                # Update or create supplier products
-                created_count = 0
-                updated_count = 0
-                
-                for product_data in products:
-                    supplier_sku = product_data.get('sku')
-                    if not supplier_sku:
-                        continue
-                    
-                    product, created = SupplierProduct.objects.update_or_create(
-                        supplier=supplier,
-                        supplier_sku=supplier_sku,
-                        defaults={'supplier_data': product_data}
-                    )
-                    
-                    product.update_from_supplier_data(product_data)
-                    product.save()
-                    
-                    if created:
-                        created_count += 1
-                    else:
-                        updated_count += 1
+                # Bulk upsert supplier products in chunks
+                writer = SupplierProductWriter(
+                    supplier,
+                    on_progress=lambda done: self.report_progress(done, len(products))
+                )
+                stats = writer.write(products)
+                created_count = stats['products_created']
+                updated_count = stats['products_changed']
                 
                 # Update metrics
                 self.metrics = {
                     'total_products': len(products),
                     'created': created_count,
-                    'updated': updated_count
+                    'updated': updated_count,
+                    'unchanged': stats['products_unchanged']
                 }
                 
                 # Update supplier
@@ -143,7 +146,8 @@ class DataFetchExecutor(BaseStepExecutor):
                     'supplier_id': supplier.id,
                     'products_fetched': len(products),
                     'created': created_count,
-                    'updated': updated_count
+                    'updated': updated_count,
+                    'unchanged': stats['products_unchanged']
                 }
             
             elif fetch_type == 'inventory':
@@ -151,27 +155,29 @@ class DataFetchExecutor(BaseStepExecutor):
                 self.log_info(f"Fetching inventory from supplier: {supplier.name}")
                 inventory_data = connector.fetch_inventory()
                 
-                # Update inventory levels
-                updated_count = 0
-                for item in inventory_data:
-                    sku = item.get('sku')
-                    quantity = item.get('quantity', 0)
-                    
-                    updated = SupplierProduct.objects.filter(
-                        supplier=supplier,
-                        supplier_sku=sku
-                    ).update(quantity_available=quantity)
-                    
-                    updated_count += updated
+                # Update inventory levels in set-based chunks; changed
+                # quantities reach marketplace inventory through the
+                # supplier_quantities_changed signal, so only counts are returned
+                updates = normalize_inventory_updates(inventory_data)
+                stats = apply_inventory_updates(
+                    supplier,
+                    updates,
+                    on_progress=lambda done: self.report_progress(done, len(updates))
+                )
+                updated_count = stats['updates_changed']
                 
                 self.metrics = {
-                    'inventory_items': len(inventory_data),
-                    'updated': updated_count
+                    'inventory_items': len(updates),
+                    'updated': updated_count,
+                    'unchanged': stats['updates_unchanged'],
+                    'failed': stats['updates_failed']
                 }
                 
                 return {
                     'supplier_id': supplier.id,
-                    'inventory_updated': updated_count
+                    'inventory_updated': updated_count,
+                    'inventory_unchanged': stats['updates_unchanged'],
+                    'inventory_missing': stats['updates_missing']
                 }
             
         except Supplier.DoesNotExist:
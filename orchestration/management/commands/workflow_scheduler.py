@@ -7,6 +7,7 @@ import sys
 from django.core.management.base import BaseCommand
 
 from orchestration.engine import WorkflowEngine, WorkflowScheduler
+from orchestration.pool import shutdown_shared_pool
 
 
 class Command(BaseCommand):
@@ -21,8 +22,8 @@ class Command(BaseCommand):
         parser.add_argument(
             '--max-workers',
             type=int,
-            default=5,
-            help='Maximum number of parallel workers'
+            default=None,
+            help='Maximum number of parallel workers (defaults to WORKFLOW_ENGINE_MAX_WORKERS)'
         )
     
     def handle(self, *args, **options):
@@ -37,7 +38,7 @@ class Command(BaseCommand):
         signal.signal(signal.SIGTERM, self.signal_handler)
         
         self.stdout.write("Starting workflow scheduler...")
-        self.stdout.write(f"Max workers: {max_workers}")
+        self.stdout.write(f"Max workers: {self.engine.max_workers}")
         
         try:
             # Run scheduler
@@ -62,5 +63,6 @@ class Command(BaseCommand):
         
         if self.engine:
             self.engine.shutdown()
+            shutdown_shared_pool()
         
         self.stdout.write("Workflow scheduler stopped")
\ No newline at end of file
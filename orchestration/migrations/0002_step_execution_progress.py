@@ -0,0 +1,28 @@
+# Generated by Django 5.1.5 on 2026-10-18 21:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orchestration', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workflowstepexecution',
+            name='progress_done',
+            field=models.IntegerField(default=0, help_text='Items processed so far by the step executor'),
+        ),
+        migrations.AddField(
+            model_name='workflowstepexecution',
+            name='progress_total',
+            field=models.IntegerField(blank=True, help_text='Total items the step executor expects to process', null=True),
+        ),
+        migrations.AddField(
+            model_name='workflowstepexecution',
+            name='progress_updated_at',
+            field=models.DateTimeField(blank=True, help_text='When item-level progress was last written', null=True),
+        ),
+    ]
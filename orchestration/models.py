@@ -561,6 +561,22 @@ class WorkflowStepExecution(models.Model):
         help_text="Step-specific metrics (e.g., records processed)"
     )
     
+    # Item-level Progress (written by ProgressReporter)
+    progress_done = models.IntegerField(
+        default=0,
+        help_text="Items processed so far by the step executor"
+    )
+    progress_total = models.IntegerField(
+        null=True,
+        blank=True,
+        help_text="Total items the step executor expects to process"
+    )
+    progress_updated_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="When item-level progress was last written"
+    )
+    
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -578,6 +594,13 @@ class WorkflowStepExecution(models.Model):
     def __str__(self):
         return f"{self.workflow_execution.execution_id} - {self.workflow_step.name}"
     
+    @property
+    def progress_percentage(self) -> Optional[float]:
+        """Get item-level progress as a percentage, if the total is known."""
+        if self.progress_total:
+            return round(min(self.progress_done / self.progress_total, 1.0) * 100, 1)
+        return None
+    
     def start_step(self):
         """Mark step as started."""
         self.status = 'running'
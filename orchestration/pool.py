@@ -0,0 +1,177 @@
+"""
+Process-wide thread pool shared by all workflow engine instances.
+Tracks saturation metrics so worker concurrency can be sized correctly.
+"""
+import os
+import time
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from django.conf import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+class InstrumentedThreadPool:
+    """
+    Thread pool wrapper that records active, queued and completed task
+    counts along with the time tasks spend waiting for a free worker.
+    """
+
+    def __init__(self, max_workers: int, thread_name_prefix: str = 'workflow-engine'):
+        """
+        Initialize the pool.
+
+        Args:
+            max_workers: Maximum number of worker threads
+            thread_name_prefix: Prefix for worker thread names
+        """
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix=thread_name_prefix
+        )
+        self._lock = threading.Lock()
+        self._submitted = 0
+        self._started = 0
+        self._active = 0
+        self._completed = 0
+        self._failed = 0
+        self._cancelled = 0
+        self._total_wait_seconds = 0.0
+        self._max_wait_seconds = 0.0
+        self._last_wait_seconds = 0.0
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        """
+        Submit a callable to the pool.
+
+        Args:
+            fn: Callable to execute
+            *args: Positional arguments for the callable
+            **kwargs: Keyword arguments for the callable
+
+        Returns:
+            Future for the submitted callable
+        """
+        enqueued_at = time.monotonic()
+
+        def run():
+            wait_seconds = time.monotonic() - enqueued_at
+            with self._lock:
+                self._started += 1
+                self._active += 1
+                self._total_wait_seconds += wait_seconds
+                self._last_wait_seconds = wait_seconds
+                self._max_wait_seconds = max(self._max_wait_seconds, wait_seconds)
+
+            try:
+                return fn(*args, **kwargs)
+            except Exception:
+                with self._lock:
+                    self._failed += 1
+                raise
+            finally:
+                with self._lock:
+                    self._active -= 1
+                    self._completed += 1
+
+        with self._lock:
+            self._submitted += 1
+
+        future = self._executor.submit(run)
+        future.add_done_callback(self._on_done)
+        return future
+
+    def _on_done(self, future: Future) -> None:
+        """Count futures that were cancelled before they started."""
+        if future.cancelled():
+            with self._lock:
+                self._cancelled += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get current pool saturation metrics.
+
+        Returns:
+            Dictionary with worker counts and queue wait times
+        """
+        with self._lock:
+            queued = self._submitted - self._started - self._cancelled
+            avg_wait = (self._total_wait_seconds / self._started) if self._started else 0.0
+
+            return {
+                'max_workers': self.max_workers,
+                'active': self._active,
+                'queued': max(0, queued),
+                'submitted': self._submitted,
+                'completed': self._completed,
+                'failed': self._failed,
+                'cancelled': self._cancelled,
+                'saturation': round(self._active / self.max_workers, 2) if self.max_workers else 0,
+                'avg_queue_wait_seconds': round(avg_wait, 4),
+                'max_queue_wait_seconds': round(self._max_wait_seconds, 4),
+                'last_queue_wait_seconds': round(self._last_wait_seconds, 4),
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Shutdown the underlying executor."""
+        self._executor.shutdown(wait=wait)
+
+
+_shared_pool: Optional[InstrumentedThreadPool] = None
+_shared_pool_lock = threading.Lock()
+
+
+def get_shared_pool(max_workers: Optional[int] = None) -> InstrumentedThreadPool:
+    """
+    Get the process-wide workflow thread pool, creating it on first use.
+
+    Args:
+        max_workers: Pool size, only honoured when the pool is first created.
+            Defaults to the WORKFLOW_ENGINE_MAX_WORKERS setting.
+
+    Returns:
+        Shared InstrumentedThreadPool instance
+    """
+    global _shared_pool
+
+    if _shared_pool is None:
+        with _shared_pool_lock:
+            if _shared_pool is None:
+                size = max_workers or getattr(settings, 'WORKFLOW_ENGINE_MAX_WORKERS', 5)
+                _shared_pool = InstrumentedThreadPool(max_workers=size)
+                logger.info(f"Created shared workflow pool with {size} workers (pid {os.getpid()})")
+
+    return _shared_pool
+
+
+def get_pool_stats() -> Optional[Dict[str, Any]]:
+    """Get shared pool metrics, or None if the pool has not been created."""
+    pool = _shared_pool
+    return pool.get_stats() if pool else None
+
+
+def shutdown_shared_pool(wait: bool = True) -> None:
+    """Shutdown the shared pool. A new one is created on next use."""
+    global _shared_pool
+
+    with _shared_pool_lock:
+        pool, _shared_pool = _shared_pool, None
+
+    if pool:
+        pool.shutdown(wait=wait)
+
+
+def _reset_after_fork() -> None:
+    """Worker threads do not survive fork, so children start with a fresh pool."""
+    global _shared_pool, _shared_pool_lock
+    _shared_pool = None
+    _shared_pool_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
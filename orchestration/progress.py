@@ -0,0 +1,123 @@
+"""
+Throttled progress reporting for long-running step executors.
+Coalesces item-level progress updates so executors can report every item
+without issuing a database write per item.
+"""
+import time
+import logging
+import threading
+from typing import Callable, Optional
+
+from django.conf import settings
+from django.utils import timezone
+
+
+logger = logging.getLogger(__name__)
+
+
+class ProgressReporter:
+    """
+    Coalesces progress reports for a WorkflowStepExecution.
+
+    A report is written when at least `min_interval_seconds` have passed
+    since the last write, or when progress moved by `min_delta_percent`
+    or more. Reaching the total, or calling flush(), always writes the
+    latest state.
+    """
+
+    def __init__(self, step_execution, min_interval_seconds: Optional[float] = None,
+                 min_delta_percent: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize the reporter.
+
+        Args:
+            step_execution: WorkflowStepExecution to record progress on
+            min_interval_seconds: Minimum seconds between writes
+            min_delta_percent: Progress change (in percent) that forces a write
+            clock: Monotonic clock, injectable for tests
+        """
+        self.step_execution = step_execution
+        self.min_interval_seconds = (
+            min_interval_seconds if min_interval_seconds is not None
+            else getattr(settings, 'WORKFLOW_PROGRESS_MIN_INTERVAL_SECONDS', 2.0)
+        )
+        self.min_delta_percent = (
+            min_delta_percent if min_delta_percent is not None
+            else getattr(settings, 'WORKFLOW_PROGRESS_MIN_DELTA_PERCENT', 5.0)
+        )
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._done = 0
+        self._total: Optional[int] = None
+        self._dirty = False
+        self._last_write_at: Optional[float] = None
+        self._last_written_percent = 0.0
+        self.writes = 0
+
+    def report_progress(self, done: int, total: Optional[int] = None) -> None:
+        """
+        Record progress, writing it to the database only when throttling allows.
+
+        Args:
+            done: Number of items processed so far
+            total: Total number of items, if known
+        """
+        with self._lock:
+            self._done = done
+            if total is not None:
+                self._total = total
+            self._dirty = True
+
+            if self._should_write():
+                self._write()
+
+    def flush(self) -> None:
+        """Write the latest reported state if it has not been written yet."""
+        with self._lock:
+            if self._dirty:
+                self._write()
+
+    def _percent(self) -> float:
+        if not self._total:
+            return 0.0
+        return min(self._done / self._total, 1.0) * 100
+
+    def _should_write(self) -> bool:
+        if self._last_write_at is None:
+            return True
+
+        if self._total is not None and self._done >= self._total:
+            return True
+
+        if self._clock() - self._last_write_at >= self.min_interval_seconds:
+            return True
+
+        if self._total:
+            return abs(self._percent() - self._last_written_percent) >= self.min_delta_percent
+
+        return False
+
+    def _write(self) -> None:
+        from .models import WorkflowStepExecution
+
+        now = timezone.now()
+        try:
+            WorkflowStepExecution.objects.filter(pk=self.step_execution.pk).update(
+                progress_done=self._done,
+                progress_total=self._total,
+                progress_updated_at=now
+            )
+        except Exception as e:
+            # Progress is advisory; never fail the step because of it
+            logger.warning(f"Failed to record progress for step execution {self.step_execution.pk}: {e}")
+            return
+
+        self.step_execution.progress_done = self._done
+        self.step_execution.progress_total = self._total
+        self.step_execution.progress_updated_at = now
+
+        self._dirty = False
+        self._last_write_at = self._clock()
+        self._last_written_percent = self._percent()
+        self.writes += 1
@@ -62,13 +62,15 @@ class WorkflowStepExecutionSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'workflow_step', 'step_name', 'step_type', 'status',
             'execution_order', 'input_data', 'output_data', 'metrics',
-            'started_at', 'completed_at', 'duration_seconds',
+            'progress_done', 'progress_total', 'progress_percentage',
+            'progress_updated_at', 'started_at', 'completed_at', 'duration_seconds',
             'error_message', 'error_details', 'retry_count',
             'created_at', 'updated_at'
         ]
         read_only_fields = [
-            'id', 'step_name', 'step_type', 'started_at', 'completed_at',
-            'duration_seconds', 'created_at', 'updated_at'
+            'id', 'step_name', 'step_type', 'progress_done', 'progress_total',
+            'progress_percentage', 'progress_updated_at', 'started_at',
+            'completed_at', 'duration_seconds', 'created_at', 'updated_at'
         ]
 
 
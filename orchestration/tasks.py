@@ -62,8 +62,8 @@ def execute_workflow(self, workflow_id: int, input_data: Dict[str, Any] = None,
         # Start execution
         execution.start_execution()
         
-        # Initialize workflow engine
-        engine = WorkflowEngine(execution)
+        # Initialize workflow engine (backed by the shared worker pool)
+        engine = WorkflowEngine()
         
         try:
             # Execute workflow
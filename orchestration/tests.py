@@ -1,3 +1,125 @@
-from django.test import TestCase
+"""
+Tests for orchestration engine components.
+"""
+import threading
 
-# Create your tests here.
+from django.test import SimpleTestCase, TestCase
+
+from .models import Workflow, WorkflowStep, WorkflowExecution, WorkflowStepExecution
+from .pool import InstrumentedThreadPool
+from .progress import ProgressReporter
+
+
+class InstrumentedThreadPoolTest(SimpleTestCase):
+    """Test cases for the shared workflow thread pool."""
+
+    def setUp(self):
+        self.pool = InstrumentedThreadPool(max_workers=1)
+
+    def tearDown(self):
+        self.pool.shutdown(wait=True)
+
+    def test_tracks_active_queued_and_completed(self):
+        """Test saturation counters while a task blocks the only worker."""
+        release = threading.Event()
+        started = threading.Event()
+
+        def blocking():
+            started.set()
+            release.wait(5)
+
+        first = self.pool.submit(blocking)
+        started.wait(5)
+        second = self.pool.submit(lambda: 42)
+
+        stats = self.pool.get_stats()
+        self.assertEqual(stats['active'], 1)
+        self.assertEqual(stats['queued'], 1)
+        self.assertEqual(stats['saturation'], 1.0)
+
+        release.set()
+        first.result(5)
+        self.assertEqual(second.result(5), 42)
+
+        stats = self.pool.get_stats()
+        self.assertEqual(stats['active'], 0)
+        self.assertEqual(stats['queued'], 0)
+        self.assertEqual(stats['completed'], 2)
+        self.assertGreater(stats['max_queue_wait_seconds'], 0)
+
+    def test_counts_failures(self):
+        """Test that failing tasks are counted and re-raised."""
+        def failing():
+            raise ValueError('boom')
+
+        future = self.pool.submit(failing)
+        with self.assertRaises(ValueError):
+            future.result(5)
+
+        stats = self.pool.get_stats()
+        self.assertEqual(stats['failed'], 1)
+        self.assertEqual(stats['completed'], 1)
+
+
+class ProgressReporterTest(TestCase):
+    """Test cases for throttled step progress reporting."""
+
+    def setUp(self):
+        workflow = Workflow.objects.create(
+            name='Progress Workflow',
+            code='progress-workflow',
+            workflow_type='custom'
+        )
+        step = WorkflowStep.objects.create(
+            workflow=workflow,
+            name='Fetch',
+            step_type='data_fetch',
+            order=1
+        )
+        execution = WorkflowExecution.objects.create(
+            workflow=workflow,
+            trigger_type='manual'
+        )
+        self.step_execution = WorkflowStepExecution.objects.create(
+            workflow_execution=execution,
+            workflow_step=step,
+            execution_order=1
+        )
+        self.now = 0.0
+
+    def _reporter(self, **kwargs):
+        return ProgressReporter(self.step_execution, clock=lambda: self.now, **kwargs)
+
+    def test_coalesces_item_level_updates(self):
+        """Test that thousands of reports produce a bounded number of writes."""
+        reporter = self._reporter(min_interval_seconds=60, min_delta_percent=10)
+
+        for done in range(1, 10001):
+            reporter.report_progress(done, 10000)
+
+        # First report, one write per 10% step and the final state
+        self.assertLessEqual(reporter.writes, 12)
+
+        self.step_execution.refresh_from_db()
+        self.assertEqual(self.step_execution.progress_done, 10000)
+        self.assertEqual(self.step_execution.progress_total, 10000)
+        self.assertEqual(self.step_execution.progress_percentage, 100.0)
+
+    def test_time_based_write_and_final_flush(self):
+        """Test interval-triggered writes and that flush() persists the latest state."""
+        reporter = self._reporter(min_interval_seconds=5, min_delta_percent=50)
+
+        reporter.report_progress(1, 100)
+        reporter.report_progress(2, 100)
+        self.assertEqual(reporter.writes, 1)
+
+        self.now = 6.0
+        reporter.report_progress(3, 100)
+        self.assertEqual(reporter.writes, 2)
+
+        reporter.report_progress(4, 100)
+        reporter.flush()
+        self.assertEqual(reporter.writes, 3)
+
+        self.step_execution.refresh_from_db()
+        self.assertEqual(self.step_execution.progress_done, 4)
@@ -24,6 +24,7 @@ from .serializers import (
     WorkflowScheduleSerializer
 )
 from .engine import WorkflowEngine
+from .pool import get_pool_stats
 from .workflows import WORKFLOW_TEMPLATES, create_workflow_from_template
 
 
@@ -289,7 +290,8 @@ def workflow_stats(request):
             'failed_executions': failed_executions,
             'success_rate': round(success_rate, 2),
             'workflow_types': workflow_types,
-            'recent_executions': recent_data
+            'recent_executions': recent_data,
+            'executor_pool': get_pool_stats()
         })
     
     except Exception as e:
@@ -308,6 +310,7 @@ def health_check(request):
         return Response({
             'status': 'healthy',
             'workflows_count': workflow_count,
+            'executor_pool': get_pool_stats(),
             'timestamp': timezone.now().isoformat()
         })
     
@@ -6,7 +6,7 @@ from django.utils.html import format_html
 from django.urls import reverse
 from django.utils import timezone
 
-from .models import Supplier, SupplierProduct
+from .models import Supplier, SupplierProduct, SupplierSyncState
 
 
 @admin.register(Supplier)
@@ -236,3 +236,35 @@ class SupplierProductAdmin(admin.ModelAdmin):
     def get_queryset(self, request):
         """Optimize queryset with select_related."""
         return super().get_queryset(request).select_related('supplier')
+
+
+@admin.register(SupplierSyncState)
+class SupplierSyncStateAdmin(admin.ModelAdmin):
+    """Admin interface for SupplierSyncState model."""
+    
+    list_display = [
+        'supplier', 'status', 'cursor_page', 'pages_committed',
+        'products_processed', 'high_water_mark', 'updated_at'
+    ]
+    list_filter = ['status']
+    search_fields = ['supplier__name', 'supplier__code']
+    readonly_fields = [
+        'supplier', 'run_since', 'run_high_water_mark', 'cursor_page',
+        'pages_committed', 'products_processed', 'products_created',
+        'products_changed', 'products_unchanged', 'products_errors',
+        'run_started_at', 'run_completed_at', 'last_error',
+        'created_at', 'updated_at'
+    ]
+    
+    actions = ['reset_cursor']
+    
+    def reset_cursor(self, request, queryset):
+        """Discard interrupted runs so the next sync starts from page 1."""
+        updated = queryset.update(status='idle', cursor_page=1)
+        self.message_user(request, f'{updated} sync states reset.')
+    
+    reset_cursor.short_description = 'Reset sync cursor'
+    
+    def get_queryset(self, request):
+        """Optimize queryset with select_related."""
+        return super().get_queryset(request).select_related('supplier')
@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class SuppliersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'suppliers'
+    
+    def ready(self):
+        from django.conf import settings
+        
+        # Replay connector for load tests and local development
+        if getattr(settings, 'SUPPLIER_ENABLE_REPLAY_CONNECTOR', False):
+            from .connectors.factory import register_connector
+            from .connectors.replay import ReplayConnector
+            register_connector('replay', ReplayConnector)
@@ -2,16 +2,102 @@
 1688 (Alibaba) API 커넥터
 중국 알리바바 1688 플랫폼 연동을 위한 커넥터
 """
-import json
 import time
 import hashlib
 import hmac
 from datetime import datetime
 from typing import Dict, List, Optional, Any, Tuple
-import requests
+from concurrent.futures import ThreadPoolExecutor
 
+from django.conf import settings
+
+from core.utils.response_cache import get_response_cache
 from .base import SupplierConnectorBase
-from ..models import SupplierProduct
+from .normalization import Const, compile_spec, raw_product
+from ..sync import SupplierProductWriter, upsert_supplier_products
+
+
+def _now(product: Dict[str, Any]) -> datetime:
+    return datetime.now()
+
+
+# 제품 검색 결과 → 표준 제품 형식 추출 스펙
+PRODUCT_SPEC = {
+    'supplier_product_id': ('productId', '', str),
+    'supplier_sku': ('productId', ''),
+    'name': ('subject', ''),
+    'description': ('description', ''),
+    'category': ('categoryName', ''),
+    'brand': ('brandName', ''),
+    'images': ('images', []),
+    'price': {
+        'amount': ('priceRange.startPrice', 0),
+        'currency': Const('CNY'),
+        'min_order_quantity': ('minOrderQuantity', 1)
+    },
+    'supplier_info': {
+        'company_name': ('company.name', ''),
+        'location': ('company.province', ''),
+        'rating': ('company.creditLevel', 0)
+    },
+    'attributes': ('attributes', {}),
+    'last_updated': _now,
+    'raw_data': raw_product
+}
+
+# 제품 상세 조회 결과 → 표준 제품 형식 추출 스펙
+PRODUCT_DETAILS_SPEC = {
+    'supplier_product_id': ('productId', '', str),
+    'supplier_sku': ('productId', ''),
+    'name': ('subject', ''),
+    'description': ('description', ''),
+    'detailed_description': ('detailDesc', ''),
+    'category': ('categoryName', ''),
+    'brand': ('brandName', ''),
+    'images': ('images', []),
+    'videos': ('videos', []),
+    'specifications': ('productSpec', []),
+    'features': ('productFeatures', []),
+    'packaging_info': {
+        'weight': ('weight', 0),
+        'dimensions': ('dimensions', {}),
+        'package_weight': ('packageWeight', 0),
+        'package_dimensions': ('packageDimensions', {})
+    },
+    'shipping_info': {
+        'shipping_methods': ('shippingMethods', []),
+        'shipping_fee': ('shippingFee', 0),
+        'delivery_time': ('deliveryTime', '')
+    },
+    'quality_info': {
+        'quality_level': ('qualityLevel', ''),
+        'certifications': ('certifications', []),
+        'quality_assurance': ('qualityAssurance', '')
+    },
+    'supplier_info': {
+        'company_id': ('company.companyId', ''),
+        'company_name': ('company.name', ''),
+        'location': ('company.province', ''),
+        'address': ('company.address', ''),
+        'rating': ('company.creditLevel', 0),
+        'years_in_business': ('company.establishYear', 0),
+        'contact_info': ('company.contactInfo', {})
+    },
+    'attributes': ('attributes', {}),
+    'last_updated': _now,
+    'raw_data': raw_product
+}
+
+# 동기화용 제품 스펙: 조회 시각/원본 payload처럼 매번 달라지는 값을 제외하여
+# 내용이 같으면 content hash가 유지되고 supplier_data가 JSON으로 저장되도록 함
+PRODUCT_SYNC_SPEC = {
+    key: value for key, value in PRODUCT_SPEC.items()
+    if key not in ('last_updated', 'raw_data')
+}
+
+extract_product = compile_spec(PRODUCT_SPEC, 'extract_1688_product')
+extract_sync_product = compile_spec(PRODUCT_SYNC_SPEC, 'extract_1688_sync_product')
+extract_product_details = compile_spec(PRODUCT_DETAILS_SPEC, 'extract_1688_product_details')
 
 
 class Alibaba1688Connector(SupplierConnectorBase):
@@ -36,6 +122,8 @@ class Alibaba1688Connector(SupplierConnectorBase):
     ]
     
     BASE_URL = "https://gw.open.1688.com/openapi"
+    default_page_size: int = 20
+    separate_normalization: bool = True
     
     def __init__(self, supplier):
         super().__init__(supplier)
@@ -113,43 +201,86 @@ class Alibaba1688Connector(SupplierConnectorBase):
     def fetch_products(self, **kwargs) -> List[Dict[str, Any]]:
         """제품 목록 조회"""
         try:
-            search_text = kwargs.get('search_text', '')
-            category_id = kwargs.get('category_id', '')
-            page_size = kwargs.get('page_size', 20)
-            page_index = kwargs.get('page_index', 1)
-            
-            # 1688 제품 검색 API 호출
-            params = {
-                'q': search_text,
-                'categoryId': category_id,
-                'pageSize': page_size,
-                'pageIndex': page_index,
-                'orderBy': 'default',  # default, priceAsc, priceDesc, creditAsc, creditDesc
-            }
-            
-            result = self._make_request(
-                'param2/1/com.alibaba.product/alibaba.product.search',
-                params
+            return self._search_products(
+                page_index=kwargs.get('page_index', 1),
+                page_size=kwargs.get('page_size', self.default_page_size),
+                search_text=kwargs.get('search_text', ''),
+                category_id=kwargs.get('category_id', '')
             )
-            
-            if result.get('success', False):
-                products = result.get('result', {}).get('products', [])
-                return [self._normalize_product_data(product) for product in products]
-            else:
-                self.logger.error(f"Product fetch failed: {result.get('errorMessage')}")
-                return []
                 
         except Exception as e:
             self.logger.error(f"Error fetching products: {e}")
             return []
     
+    def fetch_product_page(self, page: int, page_size: int,
+                           since: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """
+        제품 목록 페이지 조회 (iter_product_pages 용)
+        
+        fetch_products와 달리 오류를 삼키지 않고 예외를 발생시켜, 실패한
+        페이지가 목록의 끝으로 처리되지 않도록 합니다. 1688 검색 API는
+        수정일 필터를 지원하지 않으므로 since는 무시됩니다.
+        검색어/카테고리는 공급업체 connection_settings에서 읽습니다.
+        """
+        return self.normalize_products(self.fetch_raw_product_page(page, page_size, since))
+    
+    def fetch_raw_product_page(self, page: int, page_size: int,
+                               since: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """정규화 전 원본 제품 목록 페이지 조회 (정규화는 워커 풀에서 수행)"""
+        search_settings = self.supplier.connection_settings or {}
+        return self._search_raw_products(
+            page_index=page,
+            page_size=page_size,
+            search_text=search_settings.get('search_text', ''),
+            category_id=search_settings.get('category_id', '')
+        )
+    
+    def normalize_products(self, raw_products: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        원본 제품 목록을 SupplierProductWriter용 payload로 일괄 정규화
+        
+        조회 시각과 원본 데이터는 제외합니다 (PRODUCT_SYNC_SPEC).
+        """
+        return [extract_sync_product(product) for product in raw_products]
+    
+    def _search_products(self, page_index: int, page_size: int,
+                         search_text: str = '', category_id: str = '') -> List[Dict[str, Any]]:
+        """제품 검색 API 호출 (실패 시 예외 발생)"""
+        return [
+            extract_product(product)
+            for product in self._search_raw_products(page_index, page_size, search_text, category_id)
+        ]
+    
+    def _search_raw_products(self, page_index: int, page_size: int,
+                             search_text: str = '', category_id: str = '') -> List[Dict[str, Any]]:
+        """제품 검색 API 호출, 원본 제품 목록 반환 (실패 시 예외 발생)"""
+        # 1688 제품 검색 API 호출
+        params = {
+            'q': search_text,
+            'categoryId': category_id,
+            'pageSize': page_size,
+            'pageIndex': page_index,
+            'orderBy': 'default',  # default, priceAsc, priceDesc, creditAsc, creditDesc
+        }
+        
+        result = self._make_request(
+            'param2/1/com.alibaba.product/alibaba.product.search',
+            params
+        )
+        
+        if not result.get('success', False):
+            self.logger.error(f"Product fetch failed: {result.get('errorMessage')}")
+            raise ValueError(f"Product fetch failed: {result.get('errorMessage')}")
+        
+        return result.get('result', {}).get('products', [])
+    
     def get_product_details(self, product_id: str) -> Optional[Dict[str, Any]]:
         """제품 상세정보 조회"""
         try:
             # 제품 상세정보 API 호출
             params = {'productId': product_id}
             
-            result = self._make_request(
+            result = self._cached_request(
                 'param2/1/com.alibaba.product/alibaba.product.get',
                 params
             )
@@ -174,7 +305,7 @@ class Alibaba1688Connector(SupplierConnectorBase):
                 'quantity': quantity
             }
             
-            result = self._make_request(
+            result = self._cached_request(
                 'param2/1/com.alibaba.product/alibaba.product.price.get',
                 params
             )
@@ -244,8 +375,6 @@ class Alibaba1688Connector(SupplierConnectorBase):
                 inventory = self.get_inventory(product_id)
                 if inventory:
                     inventory_data[product_id] = inventory
-                # Rate limiting
-                time.sleep(0.2)
             except Exception as e:
                 self.logger.error(f"Error fetching inventory for {product_id}: {e}")
                 inventory_data[product_id] = {'error': str(e)}
@@ -264,19 +393,26 @@ class Alibaba1688Connector(SupplierConnectorBase):
                 price = self.get_product_price(product_id)
                 if price:
                     pricing_data[product_id] = price
-                # Rate limiting
-                time.sleep(0.2)
             except Exception as e:
                 self.logger.error(f"Error fetching price for {product_id}: {e}")
                 pricing_data[product_id] = {'error': str(e)}
         
         return pricing_data
     
+    def rate_limit_key(self) -> str:
+        """1688 요청 한도는 app key 단위이므로 app key 기준으로 버킷을 공유"""
+        if not self.app_key:
+            return super().rate_limit_key()
+        return '1688-' + hashlib.sha256(self.app_key.encode('utf-8')).hexdigest()[:32]
+    
     def _make_request(self, namespace: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """1688 API 요청 실행"""
         if params is None:
             params = {}
         
+        # 고정 sleep 대신 app key 단위 토큰 버킷에서 토큰 획득 (워커 간 공유)
+        self.rate_limiter.acquire()
+        
         # API 서명 생성
         timestamp = str(int(time.time() * 1000))
         
@@ -297,7 +433,7 @@ class Alibaba1688Connector(SupplierConnectorBase):
         # API 호출
         url = f"{self.BASE_URL}/{namespace}"
         
-        response = requests.post(
+        response = self.session.post(
             url,
             data=api_params,
             timeout=30,
@@ -310,6 +446,34 @@ class Alibaba1688Connector(SupplierConnectorBase):
         response.raise_for_status()
         return response.json()
     
+    def _cached_request(self, namespace: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        읽기 전용 API 응답 캐시 적용 요청
+        
+        엔드포인트별 TTL(SUPPLIER_1688_RESPONSE_CACHE_TTLS) 동안은 로컬 캐시에서 응답하고,
+        만료 후 stale 구간에서는 기존 응답을 반환하면서 백그라운드로 갱신합니다.
+        동일 요청이 동시에 들어오면 한 번만 호출합니다. 캐시가 비활성화되었거나
+        TTL이 없는 엔드포인트는 바로 _make_request를 호출합니다.
+        """
+        cache = get_response_cache()
+        endpoint = namespace.rsplit('/', 1)[-1]
+        ttls = getattr(settings, 'SUPPLIER_1688_RESPONSE_CACHE_TTLS', {})
+        ttl = ttls.get(endpoint, 0)
+        
+        if cache is None or ttl <= 0:
+            return self._make_request(namespace, params)
+        
+        return cache.get_or_fetch(
+            namespace,
+            params,
+            lambda: self._make_request(namespace, params),
+            ttl=ttl,
+            stale_ttl=getattr(settings, 'SUPPLIER_1688_RESPONSE_CACHE_STALE_SECONDS', 3600),
+            scope=self.rate_limit_key(),
+            # 실패 응답은 캐시하지 않음
+            cacheable=lambda result: bool(result.get('success', False))
+        )
+    
     def _generate_signature(self, params: Dict[str, Any], namespace: str) -> str:
         """API 서명 생성"""
         # 파라미터 정렬
@@ -333,150 +497,163 @@ class Alibaba1688Connector(SupplierConnectorBase):
     
     def _normalize_product_data(self, product: Dict[str, Any]) -> Dict[str, Any]:
         """제품 데이터 정규화"""
-        return {
-            'supplier_product_id': str(product.get('productId', '')),
-            'supplier_sku': product.get('productId', ''),
-            'name': product.get('subject', ''),
-            'description': product.get('description', ''),
-            'category': product.get('categoryName', ''),
-            'brand': product.get('brandName', ''),
-            'images': product.get('images', []),
-            'price': {
-                'amount': product.get('priceRange', {}).get('startPrice', 0),
-                'currency': 'CNY',
-                'min_order_quantity': product.get('minOrderQuantity', 1)
-            },
-            'supplier_info': {
-                'company_name': product.get('company', {}).get('name', ''),
-                'location': product.get('company', {}).get('province', ''),
-                'rating': product.get('company', {}).get('creditLevel', 0)
-            },
-            'attributes': product.get('attributes', {}),
-            'last_updated': datetime.now(),
-            'raw_data': product
-        }
+        return extract_product(product)
     
     def _normalize_product_details(self, product: Dict[str, Any]) -> Dict[str, Any]:
         """제품 상세정보 정규화"""
-        return {
-            'supplier_product_id': str(product.get('productId', '')),
-            'supplier_sku': product.get('productId', ''),
-            'name': product.get('subject', ''),
-            'description': product.get('description', ''),
-            'detailed_description': product.get('detailDesc', ''),
-            'category': product.get('categoryName', ''),
-            'brand': product.get('brandName', ''),
-            'images': product.get('images', []),
-            'videos': product.get('videos', []),
-            'specifications': product.get('productSpec', []),
-            'features': product.get('productFeatures', []),
-            'packaging_info': {
-                'weight': product.get('weight', 0),
-                'dimensions': product.get('dimensions', {}),
-                'package_weight': product.get('packageWeight', 0),
-                'package_dimensions': product.get('packageDimensions', {})
-            },
-            'shipping_info': {
-                'shipping_methods': product.get('shippingMethods', []),
-                'shipping_fee': product.get('shippingFee', 0),
-                'delivery_time': product.get('deliveryTime', '')
-            },
-            'quality_info': {
-                'quality_level': product.get('qualityLevel', ''),
-                'certifications': product.get('certifications', []),
-                'quality_assurance': product.get('qualityAssurance', '')
-            },
-            'supplier_info': {
-                'company_id': product.get('company', {}).get('companyId', ''),
-                'company_name': product.get('company', {}).get('name', ''),
-                'location': product.get('company', {}).get('province', ''),
-                'address': product.get('company', {}).get('address', ''),
-                'rating': product.get('company', {}).get('creditLevel', 0),
-                'years_in_business': product.get('company', {}).get('establishYear', 0),
-                'contact_info': product.get('company', {}).get('contactInfo', {})
-            },
-            'attributes': product.get('attributes', {}),
-            'last_updated': datetime.now(),
-            'raw_data': product
-        }
+        return extract_product_details(product)
     
     def sync_product_data(self, product_id: str) -> bool:
         """제품 데이터 동기화"""
         try:
-            # 제품 상세정보 조회
+            # 상세정보, 가격, 재고 조회
             product_details = self.get_product_details(product_id)
             if not product_details:
                 return False
             
-            # 가격 정보 조회
-            price_info = self.get_product_price(product_id)
-            if price_info:
-                product_details['pricing'] = price_info
-            
-            # 재고 정보 조회
-            inventory_info = self.get_inventory(product_id)
-            if inventory_info:
-                product_details['inventory'] = inventory_info
+            payload = self._build_sync_payload(
+                product_id,
+                product_details,
+                self.get_product_price(product_id),
+                self.get_inventory(product_id)
+            )
             
             # 데이터베이스에 저장/업데이트
-            _, created = SupplierProduct.objects.update_or_create(
-                supplier=self.supplier,
-                supplier_product_id=product_id,
-                defaults={
-                    'supplier_sku': product_details.get('supplier_sku', ''),
-                    'name': product_details.get('name', ''),
-                    'description': product_details.get('description', ''),
-                    'category': product_details.get('category', ''),
-                    'brand': product_details.get('brand', ''),
-                    'cost_price': product_details.get('pricing', {}).get('unit_price', 0),
-                    'currency': product_details.get('pricing', {}).get('currency', 'CNY'),
-                    'min_order_quantity': product_details.get('pricing', {}).get('min_order_quantity', 1),
-                    'available_quantity': product_details.get('inventory', {}).get('available_quantity', 0),
-                    'weight': product_details.get('packaging_info', {}).get('weight', 0),
-                    'dimensions': json.dumps(product_details.get('packaging_info', {}).get('dimensions', {})),
-                    'images': json.dumps(product_details.get('images', [])),
-                    'attributes': json.dumps(product_details.get('attributes', {})),
-                    'raw_data': json.dumps(product_details.get('raw_data', {})),
-                    'status': 'active' if product_details.get('inventory', {}).get('available_quantity', 0) > 0 else 'out_of_stock',
-                    'last_sync_at': datetime.now()
-                }
-            )
+            stats = upsert_supplier_products(self.supplier, [payload])
+            if stats['products_errors']:
+                return False
             
-            self.logger.info(f"Product {product_id} {'created' if created else 'updated'} successfully")
+            self.logger.info(f"Product {product_id} {'created' if stats['products_created'] else 'updated'} successfully")
             return True
             
         except Exception as e:
             self.logger.error(f"Error syncing product {product_id}: {e}")
             return False
     
-    def bulk_sync_products(self, product_ids: List[str], batch_size: int = 10) -> Dict[str, Any]:
-        """여러 제품 일괄 동기화"""
+    def bulk_sync_products(self, product_ids: List[str], batch_size: int = 100,
+                           max_workers: Optional[int] = None) -> Dict[str, Any]:
+        """
+        여러 제품 일괄 동기화
+        
+        배치 내 모든 제품의 상세/가격/재고 조회(제품당 3회)를 스레드 풀에서
+        동시에 실행합니다. 처리량은 _make_request의 토큰 버킷이 제한하므로
+        API 한도를 최대한 활용하고, 배치마다 한 번의 bulk upsert로 저장합니다.
+        
+        Args:
+            product_ids: 동기화할 1688 제품 ID 목록
+            batch_size: 한 번에 조회/저장할 제품 수
+            max_workers: 동시 API 호출 수 (기본값: SUPPLIER_1688_SYNC_CONCURRENCY)
+        """
         results: Dict[str, Any] = {
             'success_count': 0,
             'error_count': 0,
             'errors': []
         }
         
-        for i in range(0, len(product_ids), batch_size):
-            batch = product_ids[i:i + batch_size]
-            
-            for product_id in batch:
-                try:
-                    if self.sync_product_data(product_id):
-                        results['success_count'] += 1
-                    else:
-                        results['error_count'] += 1
-                        results['errors'].append(f"Failed to sync product {product_id}")
-                        
-                except Exception as e:
-                    results['error_count'] += 1
-                    results['errors'].append(f"Error syncing product {product_id}: {str(e)}")
+        max_workers = max_workers or getattr(settings, 'SUPPLIER_1688_SYNC_CONCURRENCY', 8)
+        writer = SupplierProductWriter(self.supplier, chunk_size=batch_size)
+        
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='1688-sync') as executor:
+            for i in range(0, len(product_ids), batch_size):
+                batch = product_ids[i:i + batch_size]
+                payloads = self._fetch_batch(executor, batch, results)
                 
-                # Rate limiting - 1688 API는 초당 요청 제한이 있음
-                time.sleep(0.5)
+                if not payloads:
+                    continue
+                
+                errors_before = writer.stats['products_errors']
+                writer.write(payloads)
+                failed = writer.stats['products_errors'] - errors_before
+                
+                results['success_count'] += len(payloads) - failed
+                if failed:
+                    results['error_count'] += failed
+                    results['errors'].append(f"Failed to save {failed} products in batch starting at {i}")
         
+        results.update({
+            'created': writer.stats['products_created'],
+            'changed': writer.stats['products_changed'],
+            'unchanged': writer.stats['products_unchanged']
+        })
         return results
     
+    def _fetch_batch(self, executor: ThreadPoolExecutor, batch: List[str],
+                     results: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """배치 내 제품별 상세/가격/재고 조회를 모두 동시에 실행하고 저장용 payload 생성"""
+        futures = {
+            product_id: (
+                executor.submit(self.get_product_details, product_id),
+                executor.submit(self.get_product_price, product_id),
+                executor.submit(self.get_inventory, product_id)
+            )
+            for product_id in batch
+        }
+        
+        payloads = []
+        for product_id, (details_future, price_future, inventory_future) in futures.items():
+            try:
+                product_details = details_future.result()
+                if not product_details:
+                    results['error_count'] += 1
+                    results['errors'].append(f"Failed to sync product {product_id}")
+                    continue
+                
+                payloads.append(self._build_sync_payload(
+                    product_id,
+                    product_details,
+                    price_future.result(),
+                    inventory_future.result()
+                ))
+                
+            except Exception as e:
+                results['error_count'] += 1
+                results['errors'].append(f"Error syncing product {product_id}: {str(e)}")
+        
+        return payloads
+    
+    def _build_sync_payload(self, product_id: str, product_details: Dict[str, Any],
+                            price_info: Optional[Dict[str, Any]],
+                            inventory_info: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        상세/가격/재고 응답을 SupplierProductWriter 표준 payload로 변환
+        
+        조회 시각 같은 값은 제외하여 내용이 같으면 content hash가 유지되도록 합니다.
+        """
+        price_info = price_info or {}
+        inventory_info = inventory_info or {}
+        packaging_info = product_details.get('packaging_info', {})
+        available_quantity = inventory_info.get('available_quantity', 0)
+        
+        payload = {
+            'sku': str(product_details.get('supplier_sku') or product_id),
+            'name': product_details.get('name', ''),
+            'description': product_details.get('description', ''),
+            'category': product_details.get('category', ''),
+            'brand': product_details.get('brand', ''),
+            'images': product_details.get('images', []),
+            'attributes': product_details.get('attributes', {}),
+            'weight': packaging_info.get('weight'),
+            'dimensions': packaging_info.get('dimensions', {}),
+            'supplier_info': product_details.get('supplier_info', {}),
+            'shipping_info': product_details.get('shipping_info', {}),
+        }
+        
+        if price_info:
+            payload.update({
+                'price': price_info.get('unit_price'),
+                'currency': price_info.get('currency', 'CNY'),
+                'min_order_qty': price_info.get('min_order_quantity', 1),
+                'price_ranges': price_info.get('price_ranges', []),
+            })
+        
+        if inventory_info:
+            payload.update({
+                'quantity': available_quantity,
+                'available': available_quantity > 0,
+            })
+        
+        return payload
+    
     def search_suppliers(self, **kwargs) -> List[Dict[str, Any]]:
         """공급업체 검색"""
         try:
@@ -490,7 +667,7 @@ class Alibaba1688Connector(SupplierConnectorBase):
                 'pageIndex': kwargs.get('page_index', 1)
             }
             
-            result = self._make_request(
+            result = self._cached_request(
                 'param2/1/com.alibaba.company/alibaba.company.search',
                 params
             )
@@ -3,17 +3,35 @@ Base connector class for all supplier integrations.
 Provides a standardized interface for interacting with different supplier APIs.
 """
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
 from datetime import datetime
+import os
+import json
+import queue
+import hashlib
 import logging
+import threading
 
+import requests
+from django.conf import settings
 from django.core.exceptions import ValidationError
+from requests.adapters import HTTPAdapter
 from tenacity import retry, stop_after_attempt, wait_exponential
+from urllib3.util.retry import Retry
+
+from core.utils.rate_limit import RateLimiter, get_rate_limiter
+from .normalization import get_normalization_pool
 
 
 logger = logging.getLogger(__name__)
 
 
+class ProductPage(NamedTuple):
+    """One page of standardized products returned by iter_product_pages()."""
+    number: int
+    products: List[Dict[str, Any]]
+
+
 class SupplierConnectorBase(ABC):
     """
     Abstract base class for supplier connectors.
@@ -24,6 +42,10 @@ class SupplierConnectorBase(ABC):
     connector_name: str = "Base Connector"
     connector_version: str = "1.0.0"
     supported_operations: List[str] = []
+    default_page_size: int = 100
+    # Connectors that implement fetch_raw_product_page() set this so pages
+    # are normalized on the normalization pool, overlapping with fetching
+    separate_normalization: bool = False
     
     def __init__(self, supplier):
         """
@@ -35,6 +57,9 @@ class SupplierConnectorBase(ABC):
         self.supplier = supplier
         self._credentials = None
         self._connection = None
+        self._rate_limiter = None
+        self._session_lock = threading.Lock()
+        self._recording_path = None
         self._last_sync = None
         self.logger = logging.getLogger(f"{self.__class__.__module__}.{self.__class__.__name__}")
     
@@ -45,6 +70,76 @@ class SupplierConnectorBase(ABC):
             self._credentials = self.supplier.get_decrypted_credentials()
         return self._credentials
     
+    @property
+    def session(self) -> Any:
+        """
+        Pooled keep-alive HTTP client, created on first use.
+        
+        Stored as the connector's connection so it is reused for every
+        call and released by close().
+        """
+        if self._connection is None:
+            with self._session_lock:
+                if self._connection is None:
+                    self._connection = self.create_http_session()
+        return self._connection
+    
+    def create_http_session(self) -> Any:
+        """
+        Create the HTTP client used by this connector.
+        
+        The default is a requests.Session with a connection pool sized by
+        SUPPLIER_HTTP_POOL_SIZE and retries with backoff on connection
+        errors and 429/5xx responses. Override to use a different client.
+        
+        Returns:
+            HTTP client instance
+        """
+        pool_size = getattr(settings, 'SUPPLIER_HTTP_POOL_SIZE', 10)
+        retries = Retry(
+            total=getattr(settings, 'SUPPLIER_HTTP_MAX_RETRIES', 3),
+            backoff_factor=0.5,
+            status_forcelist=[429, 500, 502, 503, 504],
+            # Supplier APIs such as 1688 use POST for reads
+            allowed_methods=frozenset(['GET', 'POST']),
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+            max_retries=retries
+        )
+        
+        session = requests.Session()
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+    
+    @property
+    def rate_limiter(self) -> RateLimiter:
+        """Token-bucket limiter shared by every connector using the same credential."""
+        if self._rate_limiter is None:
+            self._rate_limiter = get_rate_limiter(
+                f"supplier:{self.rate_limit_key()}",
+                self.supplier.rate_limit_requests,
+                self.supplier.rate_limit_window
+            )
+        return self._rate_limiter
+    
+    def rate_limit_key(self) -> str:
+        """
+        Identify the API quota this connector draws from.
+        
+        Defaults to a hash of the supplier credentials, so suppliers sharing
+        credentials share a bucket. Override when the quota is tied to a
+        single credential field such as an app key.
+        """
+        if not self.credentials:
+            return f"id-{self.supplier.pk}"
+        canonical = json.dumps(self.credentials, sort_keys=True, default=str)
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:32]
+    
     @abstractmethod
     def validate_credentials(self) -> Tuple[bool, Optional[str]]:
         """
@@ -117,6 +212,222 @@ class SupplierConnectorBase(ABC):
         """
         pass
     
+    def fetch_product_page(self, page: int, page_size: int,
+                           since: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """
+        Fetch a single page of standardized products.
+        
+        Connectors with paginated APIs should override this. The default
+        treats fetch_products() as unpaginated and returns everything on
+        the first page.
+        
+        Args:
+            page: 1-based page number
+            page_size: Number of products per page
+            since: Only return products updated after this time, if supported
+            
+        Returns:
+            List of product dictionaries; fewer than page_size ends iteration
+        """
+        if page > 1:
+            return []
+        
+        kwargs = {'since': since} if since else {}
+        return self.fetch_products(**kwargs)
+    
+    def fetch_raw_product_page(self, page: int, page_size: int,
+                               since: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """
+        Fetch a single page of products in the supplier's raw format.
+        
+        Implemented by connectors that set separate_normalization; the page
+        is turned into standard products by normalize_products().
+        
+        Args:
+            page: 1-based page number
+            page_size: Number of products per page
+            since: Only return products updated after this time, if supported
+            
+        Returns:
+            List of raw product dictionaries
+        """
+        raise NotImplementedError("Connectors with separate_normalization must implement fetch_raw_product_page")
+    
+    def normalize_products(self, raw_products: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Convert a batch of raw products to the standard product format.
+        
+        Must be thread-safe, since pages are normalized on a worker pool.
+        
+        Args:
+            raw_products: Raw product dictionaries from the supplier API
+            
+        Returns:
+            List of standardized product dictionaries
+        """
+        return [self.transform_product_data(product) for product in raw_products]
+    
+    def iter_product_pages(self, since: Optional[datetime] = None,
+                           page_size: Optional[int] = None, start_page: int = 1,
+                           prefetch_pages: Optional[int] = None,
+                           end_page: Optional[int] = None) -> Iterator[ProductPage]:
+        """
+        Iterate over all product pages, prefetching ahead on a background thread.
+        
+        While the caller processes one page, up to `prefetch_pages` further
+        pages are fetched, overlapping network time with database time
+        while keeping memory bounded. For connectors with
+        separate_normalization, the fetch thread only downloads raw pages
+        and hands each one to the normalization pool, so normalizing a
+        page overlaps with fetching the next. Errors raised while fetching
+        or normalizing are re-raised in the caller.
+        
+        Args:
+            since: Only return products updated after this time, if supported
+            page_size: Products per page (defaults to default_page_size)
+            start_page: Page to start from, e.g. to resume an interrupted sync
+            prefetch_pages: Pages fetched ahead (defaults to
+                SUPPLIER_SYNC_PREFETCH_PAGES; 0 disables the background thread)
+            end_page: Last page to fetch, e.g. for a shard of a large catalogue
+            
+        Yields:
+            ProductPage tuples of (page number, products)
+        """
+        page_size = page_size or self.default_page_size
+        if prefetch_pages is None:
+            prefetch_pages = getattr(settings, 'SUPPLIER_SYNC_PREFETCH_PAGES', 2)
+        
+        recording_path = self.recording_path()
+        pages = self._iter_prefetched_pages(since, page_size, start_page, end_page, prefetch_pages)
+        try:
+            for product_page in pages:
+                if recording_path:
+                    self._record_page(recording_path, product_page.number, page_size, since,
+                                      product_page.products)
+                yield product_page
+        finally:
+            pages.close()
+    
+    def _iter_prefetched_pages(self, since: Optional[datetime], page_size: int, start_page: int,
+                               end_page: Optional[int], prefetch_pages: int) -> Iterator[ProductPage]:
+        """Run the fetch (and normalization) stages ahead of the consumer."""
+        pool = get_normalization_pool() if self.separate_normalization else None
+        pages = self._iter_pages(since, page_size, start_page, end_page, raw=pool is not None)
+        if prefetch_pages <= 0:
+            for product_page in pages:
+                if pool is not None:
+                    product_page = ProductPage(product_page.number, self.normalize_products(product_page.products))
+                yield product_page
+            return
+        
+        buffer: queue.Queue = queue.Queue(maxsize=prefetch_pages)
+        stop = threading.Event()
+        
+        def put(item) -> bool:
+            # Wait for room in the buffer unless the consumer has gone away
+            while not stop.is_set():
+                try:
+                    buffer.put(item, timeout=0.5)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        
+        def produce():
+            try:
+                for product_page in pages:
+                    if pool is not None:
+                        # Queue the pending normalization in page order
+                        item = ('pending', (product_page.number,
+                                            pool.submit(self.normalize_products, product_page.products)))
+                    else:
+                        item = ('page', product_page)
+                    if not put(item):
+                        return
+                put(('done', None))
+            except BaseException as e:
+                put(('error', e))
+        
+        worker = threading.Thread(
+            target=produce,
+            name=f"supplier-prefetch-{self.supplier.pk}",
+            daemon=True
+        )
+        worker.start()
+        
+        try:
+            while True:
+                kind, payload = buffer.get()
+                if kind == 'page':
+                    yield payload
+                elif kind == 'pending':
+                    number, normalized = payload
+                    yield ProductPage(number, normalized.result())
+                elif kind == 'error':
+                    raise payload
+                else:
+                    return
+        finally:
+            stop.set()
+    
+    def _iter_pages(self, since: Optional[datetime], page_size: int,
+                    start_page: int, end_page: Optional[int] = None,
+                    raw: bool = False) -> Iterator[ProductPage]:
+        """Fetch pages sequentially until a short or empty page, or end_page, is reached."""
+        fetch_page = self.fetch_raw_product_page if raw else self.fetch_product_page
+        page = start_page
+        while end_page is None or page <= end_page:
+            products = fetch_page(page, page_size, since=since)
+            if products:
+                yield ProductPage(page, products)
+            if len(products) < page_size:
+                return
+            page += 1
+    
+    def start_recording(self, path: str) -> None:
+        """
+        Record every product page fetched by iter_product_pages().
+        
+        Pages are appended to a JSON-lines file that the replay connector
+        can serve back, so syncs can be load-tested without the real API.
+        
+        Args:
+            path: File to append recorded pages to
+        """
+        self._recording_path = path
+    
+    def stop_recording(self) -> None:
+        """Stop recording fetched product pages."""
+        self._recording_path = None
+    
+    def recording_path(self) -> Optional[str]:
+        """
+        File fetched pages are recorded to, if recording is enabled.
+        
+        Set explicitly with start_recording(), or for every connector
+        through SUPPLIER_CONNECTOR_RECORD_DIR.
+        """
+        if self._recording_path:
+            return self._recording_path
+        record_dir = getattr(settings, 'SUPPLIER_CONNECTOR_RECORD_DIR', '')
+        if record_dir:
+            return os.path.join(record_dir, f"{self.supplier.code}.jsonl")
+        return None
+    
+    def _record_page(self, path: str, page: int, page_size: int,
+                     since: Optional[datetime], products: List[Dict[str, Any]]) -> None:
+        """Append one fetched page to a recording file."""
+        line = json.dumps({
+            'page': page,
+            'page_size': page_size,
+            'since': since.isoformat() if since else None,
+            'products': products
+        }, default=str)
+        
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'a', encoding='utf-8') as recording:
+            recording.write(line + '\n')
+    
     # Common utility methods
     
     @retry(
@@ -194,17 +505,17 @@ class SupplierConnectorBase(ABC):
         Get current rate limit information for the API.
         
         Returns:
-            Dictionary with rate limit details
+            Dictionary with live token-bucket state; reset_time is the
+            number of seconds until the bucket is full again
         """
-        return {
-            'requests_remaining': None,
-            'reset_time': None,
-            'limit': None
-        }
+        return self.rate_limiter.get_state()
     
     def close(self) -> None:
         """Clean up any open connections or resources."""
         if self._connection:
             # Close connection if applicable
+            if hasattr(self._connection, 'close'):
+                self._connection.close()
             self._connection = None
-        self._credentials = None
\ No newline at end of file
+        self._credentials = None
+        self._rate_limiter = None
\ No newline at end of file
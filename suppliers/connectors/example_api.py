@@ -3,10 +3,41 @@ Example API connector implementation.
 This serves as a template for creating new supplier connectors.
 """
 import httpx
+from datetime import datetime
 from typing import Any, Dict, List, Optional, Tuple
+from django.conf import settings
 from django.core.exceptions import ValidationError
 
 from .base import SupplierConnectorBase
+from .normalization import Const, compile_spec, raw_product
+
+
+# Maps the example API's product format to our standard fields
+PRODUCT_SPEC = {
+    'supplier_sku': ('id', ''),
+    'name': ('title', ''),
+    'description': ('description', ''),
+    'category': ('category', ''),
+    'subcategory': ('subcategory', ''),
+    'brand': ('brand', ''),
+    'price': ('price', 0, float),
+    'msrp': ('msrp', 0, float),
+    'quantity': ('stock', 0, int),
+    'min_order_qty': ('min_order_quantity', 1, int),
+    'weight': ('weight', 0, float),
+    'dimensions': {
+        'length': 'length',
+        'width': 'width',
+        'height': 'height',
+        'unit': Const('cm')
+    },
+    'images': ('images', []),
+    'attributes': ('attributes', {}),
+    'updated_at': 'updated_at',  # Supplier-side modification time
+    'raw_data': raw_product  # Keep original data for reference
+}
+
+extract_product = compile_spec(PRODUCT_SPEC, 'extract_example_product')
 
 
 class ExampleAPIConnector(SupplierConnectorBase):
@@ -23,12 +54,27 @@ class ExampleAPIConnector(SupplierConnectorBase):
         'fetch_pricing',
         'test_connection'
     ]
+    separate_normalization = True
     
     def __init__(self, supplier):
         super().__init__(supplier)
         self.base_url = supplier.api_base_url or "https://api.example.com"
         self.timeout = supplier.connection_settings.get('timeout', 30)
     
+    def create_http_session(self) -> httpx.Client:
+        """Create a pooled httpx client reused across calls."""
+        pool_size = getattr(settings, 'SUPPLIER_HTTP_POOL_SIZE', 10)
+        return httpx.Client(
+            limits=httpx.Limits(
+                max_connections=pool_size,
+                max_keepalive_connections=pool_size
+            ),
+            # httpx retries connection failures only
+            transport=httpx.HTTPTransport(
+                retries=getattr(settings, 'SUPPLIER_HTTP_MAX_RETRIES', 3)
+            )
+        )
+    
     def _get_headers(self) -> Dict[str, str]:
         """Get request headers including authentication."""
         headers = {
@@ -71,21 +117,21 @@ class ExampleAPIConnector(SupplierConnectorBase):
         
         try:
             # Make a simple API call to test connectivity
-            with httpx.Client() as client:
-                response = client.get(
-                    f"{self.base_url}/health",  # Or whatever endpoint tests connectivity
-                    headers=self._get_headers(),
-                    timeout=self.timeout
-                )
+            client = self.session
+            response = client.get(
+                f"{self.base_url}/health",  # Or whatever endpoint tests connectivity
+                headers=self._get_headers(),
+                timeout=self.timeout
+            )
+                
+            if response.status_code == 200:
+                self.log_activity('test_connection', {'status': 'success'})
+                return True, None
+            else:
+                error = f"API returned status code: {response.status_code}"
+                self.log_activity('test_connection', {'error': error}, success=False)
+                return False, error
                 
-                if response.status_code == 200:
-                    self.log_activity('test_connection', {'status': 'success'})
-                    return True, None
-                else:
-                    error = f"API returned status code: {response.status_code}"
-                    self.log_activity('test_connection', {'error': error}, success=False)
-                    return False, error
-                    
         except httpx.TimeoutException:
             error = "Connection timeout"
             self.log_activity('test_connection', {'error': error}, success=False)
@@ -107,6 +153,10 @@ class ExampleAPIConnector(SupplierConnectorBase):
         Returns:
             List of product dictionaries
         """
+        return self.normalize_products(self._fetch_raw_products(page, per_page, **kwargs))
+    
+    def _fetch_raw_products(self, page: int, per_page: int, **kwargs) -> List[Dict[str, Any]]:
+        """Fetch one page of products in the API's own format."""
         endpoint = f"{self.base_url}/products"
         params = {
             'page': page,
@@ -115,30 +165,24 @@ class ExampleAPIConnector(SupplierConnectorBase):
         }
         
         try:
-            with httpx.Client() as client:
-                response = client.get(
-                    endpoint,
-                    headers=self._get_headers(),
-                    params=params,
-                    timeout=self.timeout
-                )
-                response.raise_for_status()
-                
-                data = response.json()
-                products = data.get('products', [])
+            client = self.session
+            response = client.get(
+                endpoint,
+                headers=self._get_headers(),
+                params=params,
+                timeout=self.timeout
+            )
+            response.raise_for_status()
                 
-                # Transform each product to our standard format
-                transformed_products = [
-                    self.transform_product_data(product) 
-                    for product in products
-                ]
+            data = response.json()
+            products = data.get('products', [])
                 
-                self.log_activity(
-                    'fetch_products', 
-                    {'count': len(transformed_products), 'page': page}
-                )
+            self.log_activity(
+                'fetch_products', 
+                {'count': len(products), 'page': page}
+            )
                 
-                return transformed_products
+            return products
                 
         except Exception as e:
             self.log_activity(
@@ -148,25 +192,40 @@ class ExampleAPIConnector(SupplierConnectorBase):
             )
             raise
     
+    def fetch_product_page(self, page: int, page_size: int,
+                           since: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """Fetch one page of products, optionally only those updated since a time."""
+        return self.normalize_products(self.fetch_raw_product_page(page, page_size, since))
+    
+    def fetch_raw_product_page(self, page: int, page_size: int,
+                               since: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """Fetch one page of raw products; normalization runs on the worker pool."""
+        filters = {'updated_since': since.isoformat()} if since else {}
+        return self._fetch_raw_products(page, page_size, **filters)
+    
+    def normalize_products(self, raw_products: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Transform a page of raw products with the compiled field spec."""
+        return [extract_product(product) for product in raw_products]
+    
     def fetch_product_details(self, product_id: str) -> Optional[Dict[str, Any]]:
         """Fetch detailed information for a specific product."""
         endpoint = f"{self.base_url}/products/{product_id}"
         
         try:
-            with httpx.Client() as client:
-                response = client.get(
-                    endpoint,
-                    headers=self._get_headers(),
-                    timeout=self.timeout
-                )
+            client = self.session
+            response = client.get(
+                endpoint,
+                headers=self._get_headers(),
+                timeout=self.timeout
+            )
                 
-                if response.status_code == 404:
-                    return None
+            if response.status_code == 404:
+                return None
                 
-                response.raise_for_status()
-                product_data = response.json()
+            response.raise_for_status()
+            product_data = response.json()
                 
-                return self.transform_product_data(product_data)
+            return self.transform_product_data(product_data)
                 
         except Exception as e:
             self.log_activity(
@@ -185,33 +244,33 @@ class ExampleAPIConnector(SupplierConnectorBase):
             if product_ids:
                 params['product_ids'] = ','.join(product_ids)
             
-            with httpx.Client() as client:
-                response = client.get(
-                    endpoint,
-                    headers=self._get_headers(),
-                    params=params,
-                    timeout=self.timeout
-                )
-                response.raise_for_status()
+            client = self.session
+            response = client.get(
+                endpoint,
+                headers=self._get_headers(),
+                params=params,
+                timeout=self.timeout
+            )
+            response.raise_for_status()
                 
-                inventory_data = response.json()
+            inventory_data = response.json()
                 
-                # Transform to standard format: {product_id: {quantity: X, ...}}
-                inventory_map = {}
-                for item in inventory_data.get('inventory', []):
-                    inventory_map[item['product_id']] = {
-                        'quantity': item.get('quantity', 0),
-                        'available': item.get('available', 0),
-                        'reserved': item.get('reserved', 0),
-                        'warehouse': item.get('warehouse', 'default')
-                    }
+            # Transform to standard format: {product_id: {quantity: X, ...}}
+            inventory_map = {}
+            for item in inventory_data.get('inventory', []):
+                inventory_map[item['product_id']] = {
+                    'quantity': item.get('quantity', 0),
+                    'available': item.get('available', 0),
+                    'reserved': item.get('reserved', 0),
+                    'warehouse': item.get('warehouse', 'default')
+                }
                 
-                self.log_activity(
-                    'fetch_inventory', 
-                    {'product_count': len(inventory_map)}
-                )
+            self.log_activity(
+                'fetch_inventory', 
+                {'product_count': len(inventory_map)}
+            )
                 
-                return inventory_map
+            return inventory_map
                 
         except Exception as e:
             self.log_activity(
@@ -230,34 +289,34 @@ class ExampleAPIConnector(SupplierConnectorBase):
             if product_ids:
                 params['product_ids'] = ','.join(product_ids)
             
-            with httpx.Client() as client:
-                response = client.get(
-                    endpoint,
-                    headers=self._get_headers(),
-                    params=params,
-                    timeout=self.timeout
-                )
-                response.raise_for_status()
+            client = self.session
+            response = client.get(
+                endpoint,
+                headers=self._get_headers(),
+                params=params,
+                timeout=self.timeout
+            )
+            response.raise_for_status()
                 
-                pricing_data = response.json()
+            pricing_data = response.json()
                 
-                # Transform to standard format: {product_id: {price: X, ...}}
-                pricing_map = {}
-                for item in pricing_data.get('prices', []):
-                    pricing_map[item['product_id']] = {
-                        'cost_price': item.get('cost', 0),
-                        'msrp': item.get('msrp', 0),
-                        'map': item.get('map'),  # Minimum advertised price
-                        'currency': item.get('currency', 'USD'),
-                        'tier_pricing': item.get('tier_pricing', [])
-                    }
+            # Transform to standard format: {product_id: {price: X, ...}}
+            pricing_map = {}
+            for item in pricing_data.get('prices', []):
+                pricing_map[item['product_id']] = {
+                    'cost_price': item.get('cost', 0),
+                    'msrp': item.get('msrp', 0),
+                    'map': item.get('map'),  # Minimum advertised price
+                    'currency': item.get('currency', 'USD'),
+                    'tier_pricing': item.get('tier_pricing', [])
+                }
                 
-                self.log_activity(
-                    'fetch_pricing', 
-                    {'product_count': len(pricing_map)}
-                )
+            self.log_activity(
+                'fetch_pricing', 
+                {'product_count': len(pricing_map)}
+            )
                 
-                return pricing_map
+            return pricing_map
                 
         except Exception as e:
             self.log_activity(
@@ -271,27 +330,7 @@ class ExampleAPIConnector(SupplierConnectorBase):
         """
         Transform raw product data from supplier format to standard format.
         
-        This method maps supplier-specific field names to our standard fields.
+        This method maps supplier-specific field names to our standard fields,
+        as described by PRODUCT_SPEC.
         """
-        return {
-            'supplier_sku': raw_product.get('id', ''),
-            'name': raw_product.get('title', ''),
-            'description': raw_product.get('description', ''),
-            'category': raw_product.get('category', ''),
-            'subcategory': raw_product.get('subcategory', ''),
-            'brand': raw_product.get('brand', ''),
-            'price': float(raw_product.get('price', 0)),
-            'msrp': float(raw_product.get('msrp', 0)),
-            'quantity': int(raw_product.get('stock', 0)),
-            'min_order_qty': int(raw_product.get('min_order_quantity', 1)),
-            'weight': float(raw_product.get('weight', 0)),
-            'dimensions': {
-                'length': raw_product.get('length'),
-                'width': raw_product.get('width'),
-                'height': raw_product.get('height'),
-                'unit': 'cm'
-            },
-            'images': raw_product.get('images', []),
-            'attributes': raw_product.get('attributes', {}),
-            'raw_data': raw_product  # Keep original data for reference
-        }
\ No newline at end of file
+        return extract_product(raw_product)
\ No newline at end of file
@@ -1,8 +1,15 @@
 """
 Factory for creating supplier connector instances.
 """
-from typing import Dict, Type, Optional
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from typing import Dict, Type, Optional, Tuple
 
+from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured
 
 from .base import SupplierConnectorBase
@@ -10,6 +17,9 @@ from .example_api import ExampleAPIConnector
 from .alibaba_1688 import Alibaba1688Connector
 
 
+logger = logging.getLogger(__name__)
+
+
 # Registry of available connectors
 CONNECTOR_REGISTRY: Dict[str, Type[SupplierConnectorBase]] = {
     'example_api': ExampleAPIConnector,
@@ -61,6 +71,116 @@ def create_connector(supplier) -> SupplierConnectorBase:
     return connector_class(supplier)
 
 
+# Per-process connector cache: supplier id -> (config version, connector, last used)
+_connector_cache: Dict[int, Tuple[str, SupplierConnectorBase, float]] = {}
+_connector_cache_lock = threading.Lock()
+
+
+def _connector_version(supplier) -> str:
+    """
+    Fingerprint the supplier fields a connector is built from.
+    
+    Credentials are hashed in their encrypted form, so a change of
+    credentials or connection settings yields a new connector without
+    decrypting anything.
+    """
+    config = json.dumps([
+        _determine_connector_type(supplier),
+        supplier.encrypted_credentials,
+        supplier.connection_settings,
+        supplier.api_base_url,
+        supplier.rate_limit_requests,
+        supplier.rate_limit_window,
+    ], sort_keys=True, default=str)
+    return hashlib.sha256(config.encode('utf-8')).hexdigest()
+
+
+def get_cached_connector(supplier) -> SupplierConnectorBase:
+    """
+    Get a reusable connector for a supplier from the per-process cache.
+    
+    Cached connectors keep their decrypted credentials and keep-alive HTTP
+    session between tasks. An entry is replaced when the supplier's
+    credentials or connection settings change, and closed after being idle
+    for SUPPLIER_CONNECTOR_IDLE_SECONDS. Callers must not close() the
+    returned connector.
+    
+    Args:
+        supplier: Supplier model instance
+        
+    Returns:
+        Configured connector instance
+    """
+    version = _connector_version(supplier)
+    now = time.monotonic()
+    stale = []
+    
+    with _connector_cache_lock:
+        stale.extend(_evict_idle(now))
+        
+        entry = _connector_cache.get(supplier.pk)
+        if entry and entry[0] == version:
+            connector = entry[1]
+            # Refresh the instance so non-config fields are current
+            connector.supplier = supplier
+        else:
+            if entry:
+                stale.append(entry[1])
+            connector = create_connector(supplier)
+        
+        _connector_cache[supplier.pk] = (version, connector, now)
+    
+    for old in stale:
+        _close_quietly(old)
+    
+    return connector
+
+
+def _evict_idle(now: float) -> list:
+    """Remove idle cache entries; the caller closes them outside the lock."""
+    idle_seconds = getattr(settings, 'SUPPLIER_CONNECTOR_IDLE_SECONDS', 300)
+    expired = [
+        supplier_id for supplier_id, (_, _, last_used) in _connector_cache.items()
+        if now - last_used > idle_seconds
+    ]
+    return [_connector_cache.pop(supplier_id)[1] for supplier_id in expired]
+
+
+def _close_quietly(connector: SupplierConnectorBase) -> None:
+    try:
+        connector.close()
+    except Exception as e:
+        logger.warning(f"Error closing connector {connector.connector_name}: {e}")
+
+
+def close_cached_connectors() -> int:
+    """
+    Close and forget every cached connector, e.g. on worker shutdown.
+    
+    Returns:
+        Number of connectors closed
+    """
+    with _connector_cache_lock:
+        connectors = [connector for _, connector, _ in _connector_cache.values()]
+        _connector_cache.clear()
+    
+    for connector in connectors:
+        _close_quietly(connector)
+    
+    return len(connectors)
+
+
+def _reset_after_fork() -> None:
+    """HTTP sessions must not be shared with a forked child."""
+    global _connector_cache_lock
+    _connector_cache.clear()
+    _connector_cache_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
 def _determine_connector_type(supplier) -> str:
     """
     Determine the connector type for a supplier.
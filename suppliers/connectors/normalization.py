@@ -0,0 +1,174 @@
+"""
+Compiled field extraction and pooled normalization for supplier payloads.
+Connectors describe how raw API products map to the standard product
+format with a declarative spec. compile_spec() turns a spec into one
+generated function, so normalizing a product is a flat run of dict
+lookups instead of nested .get() chains, and normalization of a page can
+run on a worker pool while the next page is fetched.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from django.conf import settings
+
+
+class Const(NamedTuple):
+    """Spec value emitted as-is for every product."""
+    value: Any
+
+
+def raw_product(product: Dict[str, Any]) -> Dict[str, Any]:
+    """Spec callable that embeds the raw payload, e.g. as raw_data."""
+    return product
+
+
+def compile_spec(spec: Dict[str, Any], name: str = 'extract') -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Compile a field-extraction spec into a normalization function.
+
+    Spec values:
+        'a.b'                       value at a nested path, or None
+        ('a.b', default)            value at the path, or default when missing
+        ('a.b', default, convert)   convert() applied to the extracted value
+        Const(value)                the same value for every product
+        callable                    called with the raw product
+        dict                        nested spec producing a nested dict
+
+    Intermediate objects of nested paths are looked up once per product
+    and shared by every field below them. Missing or non-dict
+    intermediates yield the field's default.
+
+    Args:
+        spec: Mapping of output field to spec value
+        name: Name of the generated function, for tracebacks
+
+    Returns:
+        Function mapping a raw product to its normalized dictionary
+    """
+    compiler = _SpecCompiler()
+    body = compiler.build(spec)
+    source = f"def {name}(p):\n" + ''.join(
+        f"    {line}\n" for line in compiler.lines
+    ) + f"    return {body}\n"
+
+    namespace = {'_empty': _EMPTY, **compiler.constants}
+    exec(compile(source, f'<spec {name}>', 'exec'), namespace)
+    extract = namespace[name]
+    extract.source = source
+    return extract
+
+
+# Stands in for missing or non-dict intermediates, so lookups below them yield defaults
+_EMPTY = MappingProxyType({})
+
+
+class _SpecCompiler:
+    """Generates the source of a compiled spec."""
+
+    _literal_types = (type(None), bool, int, float, str)
+
+    def __init__(self):
+        self.lines: List[str] = []
+        self.constants: Dict[str, Any] = {}
+        self._parents: Dict[Tuple[str, ...], str] = {}
+
+    def build(self, spec: Dict[str, Any]) -> str:
+        items = ', '.join(f"{key!r}: {self._value(value)}" for key, value in spec.items())
+        return '{' + items + '}'
+
+    def _value(self, value: Any) -> str:
+        if isinstance(value, dict):
+            return self.build(value)
+        if isinstance(value, Const):
+            return self._literal(value.value)
+        if isinstance(value, str):
+            return self._path(value, None)
+        if isinstance(value, tuple):
+            path, default, *convert = value
+            expression = self._path(path, default)
+            if convert:
+                expression = f"{self._constant(convert[0])}({expression})"
+            return expression
+        if value is raw_product:
+            return 'p'
+        if callable(value):
+            return f"{self._constant(value)}(p)"
+        raise ValueError(f"Unsupported spec value: {value!r}")
+
+    def _path(self, path: str, default: Any) -> str:
+        keys = tuple(path.split('.'))
+        default_expression = self._literal(default)
+        if len(keys) == 1:
+            return f"p.get({keys[0]!r}, {default_expression})"
+
+        return f"{self._parent(keys[:-1])}.get({keys[-1]!r}, {default_expression})"
+
+    def _parent(self, keys: Tuple[str, ...]) -> str:
+        """
+        Local variable holding the dict at a path prefix, assigned once.
+
+        Missing or non-dict values are replaced by an empty mapping.
+        """
+        if keys in self._parents:
+            return self._parents[keys]
+
+        container = 'p' if len(keys) == 1 else self._parent(keys[:-1])
+        variable = f"_n{len(self._parents)}"
+        self._parents[keys] = variable
+        self.lines.append(f"{variable} = {container}.get({keys[-1]!r})")
+        self.lines.append(f"if not isinstance({variable}, dict): {variable} = _empty")
+        return variable
+
+    def _literal(self, value: Any) -> str:
+        # Empty containers are emitted as literals so every product gets its own
+        if isinstance(value, self._literal_types) or (type(value) in (list, dict) and not value):
+            return repr(value)
+        return self._constant(value)
+
+    def _constant(self, value: Any) -> str:
+        name = f"_c{len(self.constants)}"
+        self.constants[name] = value
+        return name
+
+
+_normalization_pool: Optional[ThreadPoolExecutor] = None
+_normalization_pool_lock = threading.Lock()
+
+
+def get_normalization_pool() -> Optional[ThreadPoolExecutor]:
+    """
+    Get the process-wide pool that normalizes product pages.
+
+    Sized by SUPPLIER_NORMALIZE_WORKERS; 0 disables pooled normalization.
+
+    Returns:
+        Shared executor, or None if disabled
+    """
+    global _normalization_pool
+
+    workers = getattr(settings, 'SUPPLIER_NORMALIZE_WORKERS', 2)
+    if workers <= 0:
+        return None
+
+    if _normalization_pool is None:
+        with _normalization_pool_lock:
+            if _normalization_pool is None:
+                _normalization_pool = ThreadPoolExecutor(
+                    max_workers=workers,
+                    thread_name_prefix='supplier-normalize'
+                )
+    return _normalization_pool
+
+
+def _reset_after_fork() -> None:
+    """Forked children must not reuse the parent's pool threads."""
+    global _normalization_pool, _normalization_pool_lock
+    _normalization_pool = None
+    _normalization_pool_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
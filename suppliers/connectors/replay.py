@@ -0,0 +1,205 @@
+"""
+Replay connector for load-testing supplier syncs without a real API.
+Serves either a catalogue recorded with SupplierConnectorBase.start_recording()
+or a synthetic catalogue generated on the fly, with configurable latency,
+error rate and page size.
+"""
+import json
+import time
+import random
+import threading
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from .base import SupplierConnectorBase
+from ..sync import get_payload_updated_at, get_product_sku
+
+
+# updated_at of the first synthetic product; product i is one second later
+SYNTHETIC_EPOCH = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+
+
+class ReplayConnector(SupplierConnectorBase):
+    """
+    Connector that replays recorded or synthetic product pages.
+
+    Configured through the supplier's connection_settings:
+        replay_file: Recording (JSON lines) to serve; products are
+            de-duplicated by SKU and re-paged with page_size
+        synthetic_products: Size of the generated catalogue when no
+            replay_file is given
+        catalog_version: Bump to change every synthetic product's price,
+            quantity and updated_at, simulating a full catalogue update
+        page_size: Products per page (default 100)
+        latency_ms: Delay per page request
+        latency_jitter_ms: Extra random delay per page request, up to this value
+        error_rate: Probability (0-1) that a page request fails
+        seed: Random seed for jitter and errors
+    """
+
+    connector_name = "Replay Connector"
+    connector_version = "1.0.0"
+    supported_operations = [
+        'fetch_products',
+        'fetch_product_details',
+        'fetch_inventory',
+        'fetch_pricing',
+        'test_connection'
+    ]
+
+    def __init__(self, supplier):
+        super().__init__(supplier)
+        config = supplier.connection_settings or {}
+        self.replay_file = config.get('replay_file', '')
+        self.synthetic_products = int(config.get('synthetic_products', 0))
+        self.catalog_version = int(config.get('catalog_version', 0))
+        self.default_page_size = int(config.get('page_size', self.default_page_size))
+        self.latency = float(config.get('latency_ms', 0)) / 1000
+        self.latency_jitter = float(config.get('latency_jitter_ms', 0)) / 1000
+        self.error_rate = float(config.get('error_rate', 0))
+        self._random = random.Random(config.get('seed', 0))
+        self._random_lock = threading.Lock()
+        self._recorded: Optional[List[Dict[str, Any]]] = None
+        self.requests_served = 0
+
+    def validate_credentials(self) -> Tuple[bool, Optional[str]]:
+        """Replay needs no credentials, only a catalogue source."""
+        if not self.replay_file and not self.synthetic_products:
+            return False, "Configure replay_file or synthetic_products"
+        return True, None
+
+    def test_connection(self) -> Tuple[bool, Optional[str]]:
+        """Check that the recording can be loaded."""
+        try:
+            self.catalog_size()
+            return True, None
+        except (OSError, ValueError) as e:
+            return False, str(e)
+
+    def fetch_products(self, **kwargs) -> List[Dict[str, Any]]:
+        """Return the whole catalogue, or products updated after `since`."""
+        products = []
+        for page in self._iter_pages(kwargs.get('since'), self.default_page_size, 1):
+            products.extend(page.products)
+        return products
+
+    def fetch_product_page(self, page: int, page_size: int,
+                           since: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """Serve one page after the configured latency, failing at the configured rate."""
+        self._simulate_request(page)
+
+        start = (page - 1) * page_size
+        if self.replay_file:
+            return self._recorded_products(since)[start:start + page_size]
+
+        first = self._first_synthetic_index(since) + start
+        last = min(first + page_size, self.synthetic_products)
+        return [self._synthetic_product(index) for index in range(first, last)]
+
+    def fetch_product_details(self, product_id: str) -> Optional[Dict[str, Any]]:
+        """Look up one product by SKU."""
+        if self.replay_file:
+            for product in self._recorded_products(None):
+                if get_product_sku(product) == product_id:
+                    return product
+            return None
+
+        index = self._synthetic_index(product_id)
+        return self._synthetic_product(index) if index is not None else None
+
+    def fetch_inventory(self, product_ids: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Return quantities for the given products."""
+        return {
+            product_id: {'quantity': product.get('quantity', 0)}
+            for product_id, product in self._products_by_id(product_ids).items()
+        }
+
+    def fetch_pricing(self, product_ids: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Return prices for the given products."""
+        return {
+            product_id: {'price': product.get('price'), 'currency': product.get('currency', 'USD')}
+            for product_id, product in self._products_by_id(product_ids).items()
+        }
+
+    def catalog_size(self) -> int:
+        """Number of products in the replayed catalogue."""
+        if self.replay_file:
+            return len(self._recorded_products(None))
+        return self.synthetic_products
+
+    def _simulate_request(self, page: int) -> None:
+        """Apply latency and random failures to one API call."""
+        with self._random_lock:
+            self.requests_served += 1
+            jitter = self._random.uniform(0, self.latency_jitter) if self.latency_jitter else 0
+            failed = self.error_rate > 0 and self._random.random() < self.error_rate
+
+        if self.latency or jitter:
+            time.sleep(self.latency + jitter)
+        if failed:
+            raise ConnectionError(f"Replayed API error on page {page}")
+
+    def _products_by_id(self, product_ids: Optional[List[str]]) -> Dict[str, Dict[str, Any]]:
+        """Resolve product IDs to products, skipping unknown IDs."""
+        products = {}
+        for product_id in product_ids or []:
+            product = self.fetch_product_details(product_id)
+            if product:
+                products[product_id] = product
+        return products
+
+    def _recorded_products(self, since: Optional[datetime]) -> List[Dict[str, Any]]:
+        """Load the recording once, keeping the last version of each SKU."""
+        if self._recorded is None:
+            by_sku: Dict[str, Dict[str, Any]] = {}
+            with open(self.replay_file, encoding='utf-8') as recording:
+                for line in recording:
+                    if line.strip():
+                        for product in json.loads(line).get('products', []):
+                            by_sku[get_product_sku(product) or str(len(by_sku))] = product
+            self._recorded = list(by_sku.values())
+
+        if since is None:
+            return self._recorded
+        return [
+            product for product in self._recorded
+            if (get_payload_updated_at(product) or since) > since
+        ]
+
+    def _synthetic_epoch(self) -> datetime:
+        return SYNTHETIC_EPOCH + timedelta(days=365 * self.catalog_version)
+
+    def _first_synthetic_index(self, since: Optional[datetime]) -> int:
+        """Index of the first synthetic product updated after `since`."""
+        if since is None:
+            return 0
+        elapsed = (since - self._synthetic_epoch()).total_seconds()
+        return max(0, int(elapsed) + 1)
+
+    def _synthetic_index(self, product_id: str) -> Optional[int]:
+        """Parse a synthetic SKU back to its index."""
+        try:
+            index = int(str(product_id).rsplit('-', 1)[-1])
+        except ValueError:
+            return None
+        return index if 0 <= index < self.synthetic_products else None
+
+    def _synthetic_product(self, index: int) -> Dict[str, Any]:
+        """Generate product `index` of the synthetic catalogue."""
+        version = self.catalog_version
+        return {
+            'sku': f"SYN-{index:07d}",
+            'name': f"Synthetic product {index}",
+            'description': f"Generated product {index} for sync benchmarks",
+            'category': f"category-{index % 50}",
+            'brand': f"brand-{index % 20}",
+            'price': f"{1 + (index % 1000) / 10 + version:.2f}",
+            'currency': 'USD',
+            'quantity': (index * 7 + version) % 500,
+            'min_order_qty': 1 + index % 5,
+            'weight': f"{(index % 100) / 10:.1f}",
+            'images': [f"https://example.com/images/{index}.jpg"],
+            'attributes': {'color': ('red', 'green', 'blue')[index % 3], 'size': index % 10},
+            'available': index % 17 != 0,
+            'updated_at': (self._synthetic_epoch() + timedelta(seconds=index)).isoformat()
+        }
@@ -0,0 +1,126 @@
+"""
+Management command to benchmark supplier product sync throughput.
+Drives sync_supplier_products against the replay connector, so no real
+supplier API is called.
+"""
+import time
+import resource
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from suppliers.connectors.factory import close_cached_connectors, register_connector
+from suppliers.connectors.replay import ReplayConnector
+from suppliers.models import Supplier, SupplierProduct, SupplierSyncState
+from suppliers.tasks import sync_supplier_products
+
+
+class Command(BaseCommand):
+    help = 'Benchmark supplier product sync throughput with a replayed catalogue'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            nargs='+',
+            type=int,
+            default=[10000, 100000, 1000000],
+            help='Synthetic catalogue sizes to sync (default: 10k, 100k and 1M products)'
+        )
+        parser.add_argument(
+            '--replay-file',
+            help='Replay a recorded catalogue instead of synthetic ones (ignores --sizes)'
+        )
+        parser.add_argument('--page-size', type=int, default=100, help='Products per page')
+        parser.add_argument('--latency-ms', type=float, default=0, help='Delay per page request')
+        parser.add_argument('--jitter-ms', type=float, default=0, help='Random extra delay per page request')
+        parser.add_argument('--error-rate', type=float, default=0, help='Probability a page request fails')
+        parser.add_argument(
+            '--passes',
+            type=int,
+            default=1,
+            help='Syncs per catalogue; passes after the first measure unchanged re-syncs'
+        )
+        parser.add_argument(
+            '--keep',
+            action='store_true',
+            help='Keep the benchmark suppliers and products afterwards'
+        )
+
+    def handle(self, *args, **options):
+        register_connector('replay', ReplayConnector)
+
+        if options['replay_file']:
+            catalogues = [('recording', {'replay_file': options['replay_file']})]
+        else:
+            catalogues = [(str(size), {'synthetic_products': size}) for size in options['sizes']]
+
+        self.stdout.write(
+            f"{'catalogue':>12} {'pass':>4} {'rows':>9} {'seconds':>9} "
+            f"{'rows/sec':>10} {'queries/row':>11} {'peak RSS MB':>11}"
+        )
+
+        for label, source in catalogues:
+            supplier = self._create_supplier(label, source, options)
+            try:
+                for run in range(1, options['passes'] + 1):
+                    self._run_pass(supplier, label, run)
+            finally:
+                close_cached_connectors()
+                if not options['keep']:
+                    SupplierProduct.objects.filter(supplier=supplier).delete()
+                    supplier.delete()
+
+    def _create_supplier(self, label, source, options):
+        """Create a throwaway supplier served by the replay connector."""
+        code = f'benchmark-replay-{label}'
+        if Supplier.objects.filter(code=code).exists():
+            raise CommandError(f"Supplier '{code}' already exists; remove it or rerun without --keep")
+
+        return Supplier.objects.create(
+            name=f'Benchmark replay ({label})',
+            code=code,
+            status='active',
+            is_auto_sync_enabled=False,
+            rate_limit_requests=1000000,
+            rate_limit_window=1,
+            connection_settings={
+                'connector_type': 'replay',
+                'page_size': options['page_size'],
+                'latency_ms': options['latency_ms'],
+                'latency_jitter_ms': options['jitter_ms'],
+                'error_rate': options['error_rate'],
+                **source
+            }
+        )
+
+    def _run_pass(self, supplier, label, run):
+        """Run one full sync and report its throughput."""
+        queries = [0]
+
+        def count_queries(execute, sql, params, many, context):
+            queries[0] += 1
+            return execute(sql, params, many, context)
+
+        started = time.perf_counter()
+        with connection.execute_wrapper(count_queries):
+            sync_supplier_products.apply(
+                args=[supplier.id],
+                kwargs={'force_full_sync': True}
+            )
+        elapsed = time.perf_counter() - started
+
+        state = SupplierSyncState.objects.get(supplier=supplier)
+        if state.status != 'completed':
+            self.stdout.write(self.style.ERROR(
+                f"{label:>12} {run:>4} sync {state.status}: {state.last_error}"
+            ))
+            return
+
+        rows = state.products_processed
+        # ru_maxrss is the process high-water mark, in kilobytes on Linux
+        peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        self.stdout.write(
+            f"{label:>12} {run:>4} {rows:>9} {elapsed:>9.2f} "
+            f"{rows / elapsed if elapsed else 0:>10.0f} "
+            f"{queries[0] / rows if rows else 0:>11.3f} {peak_rss_mb:>11.1f}"
+        )
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.5 on 2026-10-18 21:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('suppliers', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='supplierproduct',
+            name='content_hash',
+            field=models.CharField(blank=True, help_text='Fingerprint of the last supplier payload, used to skip unchanged products', max_length=64),
+        ),
+    ]
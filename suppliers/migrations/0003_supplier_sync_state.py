@@ -0,0 +1,42 @@
+# Generated by Django 5.1.5 on 2026-10-18 21:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('suppliers', '0002_supplier_product_content_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SupplierSyncState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('idle', 'Idle'), ('running', 'Running'), ('failed', 'Failed'), ('completed', 'Completed')], default='idle', max_length=20)),
+                ('high_water_mark', models.DateTimeField(blank=True, help_text='Latest supplier-side update time covered by a completed sync', null=True)),
+                ('run_since', models.DateTimeField(blank=True, help_text='Watermark the current run fetches from', null=True)),
+                ('run_high_water_mark', models.DateTimeField(blank=True, help_text='Latest supplier-side update time committed in the current run', null=True)),
+                ('cursor_page', models.IntegerField(default=1, help_text='Next page to fetch in the current run')),
+                ('pages_committed', models.IntegerField(default=0)),
+                ('products_processed', models.IntegerField(default=0)),
+                ('products_created', models.IntegerField(default=0)),
+                ('products_changed', models.IntegerField(default=0)),
+                ('products_unchanged', models.IntegerField(default=0)),
+                ('products_errors', models.IntegerField(default=0)),
+                ('run_started_at', models.DateTimeField(blank=True, null=True)),
+                ('run_completed_at', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('supplier', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='sync_state', to='suppliers.supplier')),
+            ],
+            options={
+                'verbose_name': 'Supplier Sync State',
+                'verbose_name_plural': 'Supplier Sync States',
+                'db_table': 'supplier_sync_states',
+            },
+        ),
+    ]
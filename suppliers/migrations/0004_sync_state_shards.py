@@ -0,0 +1,23 @@
+# Generated by Django 5.1.5 on 2026-10-18 21:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('suppliers', '0003_supplier_sync_state'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='suppliersyncstate',
+            name='shards_completed',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='suppliersyncstate',
+            name='shards_total',
+            field=models.IntegerField(default=0),
+        ),
+    ]
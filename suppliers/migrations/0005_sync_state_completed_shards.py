@@ -0,0 +1,18 @@
+# Generated by Django 5.1.5 on 2026-10-18 22:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('suppliers', '0004_sync_state_shards'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='suppliersyncstate',
+            name='completed_shards',
+            field=models.JSONField(blank=True, default=list, help_text='[start_page, end_page] of the shards recorded in the current run'),
+        ),
+    ]
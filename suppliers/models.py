@@ -2,6 +2,7 @@
 Supplier models for managing supplier integrations and product data.
 """
 import json
+import hashlib
 from typing import Any, Dict, Optional
 
 from django.db import models
@@ -164,6 +165,8 @@ class Supplier(models.Model):
         if not isinstance(credentials, dict):
             raise ValidationError("Credentials must be a dictionary")
         
+        # Drop the cached plaintext for the credentials being replaced
+        credential_encryption.invalidate(self.encrypted_credentials)
         self.encrypted_credentials = credential_encryption.encrypt_credentials(credentials)
     
     def get_decrypted_credentials(self) -> Optional[Dict[str, Any]]:
@@ -195,11 +198,14 @@ class Supplier(models.Model):
         """
         Get the appropriate connector instance for this supplier.
         
+        The connector is shared through the per-process connector cache,
+        so callers should not close it.
+        
         Returns:
             Connector instance
         """
-        from .connectors.factory import create_connector
-        return create_connector(self)
+        from .connectors.factory import get_cached_connector
+        return get_cached_connector(self)
     
     @property
     def is_sync_due(self) -> bool:
@@ -328,6 +334,11 @@ class SupplierProduct(models.Model):
         blank=True,
         help_text="Last time data was updated from supplier"
     )
+    content_hash = models.CharField(
+        max_length=64,
+        blank=True,
+        help_text="Fingerprint of the last supplier payload, used to skip unchanged products"
+    )
     
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
@@ -374,8 +385,23 @@ class SupplierProduct(models.Model):
         
         # Store the complete data
         self.supplier_data = data
+        self.content_hash = self.compute_content_hash(data)
         self.last_updated_from_supplier = timezone.now()
     
+    @staticmethod
+    def compute_content_hash(data: Dict[str, Any]) -> str:
+        """
+        Compute a stable fingerprint of a supplier payload.
+        
+        Args:
+            data: Dictionary of product data from supplier
+            
+        Returns:
+            SHA-256 hex digest of the canonical JSON form
+        """
+        canonical = json.dumps(data, sort_keys=True, separators=(',', ':'), default=str)
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+    
     @property
     def is_in_stock(self) -> bool:
         """Check if product is in stock."""
@@ -387,3 +413,236 @@ class SupplierProduct(models.Model):
         if self.image_urls and isinstance(self.image_urls, list) and len(self.image_urls) > 0:
             return self.image_urls[0]
         return None
+
+
+class SupplierSyncState(models.Model):
+    """
+    Persisted progress of a supplier's incremental product sync.
+    
+    The page cursor and counters are saved in the same transaction as each
+    page of products, so an interrupted sync resumes after the last
+    committed page. The high-water mark only advances when a run completes.
+    """
+    
+    # Status choices
+    STATUS_CHOICES = [
+        ('idle', 'Idle'),
+        ('running', 'Running'),
+        ('failed', 'Failed'),
+        ('completed', 'Completed'),
+    ]
+    
+    supplier = models.OneToOneField(
+        Supplier,
+        on_delete=models.CASCADE,
+        related_name='sync_state'
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='idle'
+    )
+    
+    # Watermarks
+    high_water_mark = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Latest supplier-side update time covered by a completed sync"
+    )
+    run_since = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Watermark the current run fetches from"
+    )
+    run_high_water_mark = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Latest supplier-side update time committed in the current run"
+    )
+    
+    # Cursor
+    cursor_page = models.IntegerField(
+        default=1,
+        help_text="Next page to fetch in the current run"
+    )
+    pages_committed = models.IntegerField(default=0)
+    
+    # Sharded runs: page ranges synced in parallel, completed by the last shard
+    shards_total = models.IntegerField(default=0)
+    shards_completed = models.IntegerField(default=0)
+    completed_shards = models.JSONField(
+        default=list,
+        blank=True,
+        help_text="[start_page, end_page] of the shards recorded in the current run"
+    )
+    
+    # Progress counters for the current run
+    products_processed = models.IntegerField(default=0)
+    products_created = models.IntegerField(default=0)
+    products_changed = models.IntegerField(default=0)
+    products_unchanged = models.IntegerField(default=0)
+    products_errors = models.IntegerField(default=0)
+    
+    run_started_at = models.DateTimeField(null=True, blank=True)
+    run_completed_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    
+    # Timestamps
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    COUNTER_FIELDS = [
+        'products_processed', 'products_created', 'products_changed',
+        'products_unchanged', 'products_errors'
+    ]
+    
+    class Meta:
+        db_table = 'supplier_sync_states'
+        verbose_name = 'Supplier Sync State'
+        verbose_name_plural = 'Supplier Sync States'
+    
+    def __str__(self):
+        return f"{self.supplier.name} sync ({self.status}, page {self.cursor_page})"
+    
+    @property
+    def is_resumable(self) -> bool:
+        """
+        Whether an earlier run stopped before committing every page.
+        
+        Sharded runs are never resumed: shards do not advance the cursor,
+        so an interrupted sharded run is started again instead.
+        """
+        return self.status in ('running', 'failed') and not self.shards_total
+    
+    def start_run(self, full_sync: bool = False, shards: int = 0) -> None:
+        """
+        Begin a new run from the first page.
+        
+        Args:
+            full_sync: Ignore the high-water mark and fetch everything
+            shards: Number of page-range shards the run is split into
+        """
+        self.status = 'running'
+        self.run_since = None if full_sync else self.high_water_mark
+        self.run_high_water_mark = None
+        self.cursor_page = 1
+        self.pages_committed = 0
+        self.shards_total = shards
+        self.shards_completed = 0
+        self.completed_shards = []
+        for field in self.COUNTER_FIELDS:
+            setattr(self, field, 0)
+        self.run_started_at = timezone.now()
+        self.run_completed_at = None
+        self.last_error = ''
+        self.save()
+    
+    def record_page(self, page_number: int, stats: Dict[str, int],
+                    page_high_water_mark=None) -> None:
+        """
+        Advance the cursor past a committed page.
+        
+        Call inside the transaction that wrote the page's products.
+        
+        Args:
+            page_number: Page that was written
+            stats: Writer counters for this page only
+            page_high_water_mark: Latest supplier-side update time on the page
+        """
+        self.cursor_page = page_number + 1
+        self.pages_committed += 1
+        for field in self.COUNTER_FIELDS:
+            setattr(self, field, getattr(self, field) + stats.get(field, 0))
+        
+        if page_high_water_mark and (
+            self.run_high_water_mark is None or page_high_water_mark > self.run_high_water_mark
+        ):
+            self.run_high_water_mark = page_high_water_mark
+        
+        self.save(update_fields=[
+            'cursor_page', 'pages_committed', 'run_high_water_mark',
+            *self.COUNTER_FIELDS, 'updated_at'
+        ])
+    
+    def complete_run(self) -> None:
+        """
+        Mark the run complete and advance the high-water mark.
+        
+        Uses the latest supplier-side update time seen, or the run start
+        time when the supplier does not report update times.
+        """
+        new_mark = self.run_high_water_mark or self.run_started_at
+        if new_mark and (self.high_water_mark is None or new_mark > self.high_water_mark):
+            self.high_water_mark = new_mark
+        
+        self.status = 'completed'
+        self.run_completed_at = timezone.now()
+        self.cursor_page = 1
+        self.shards_total = 0
+        self.shards_completed = 0
+        self.last_error = ''
+        self.save()
+    
+    def touch(self) -> None:
+        """
+        Mark the run as alive without saving any other field.
+        
+        Shards call this per committed page, so a long shard does not make
+        its run look stale while other shards update the same row.
+        """
+        self.updated_at = timezone.now()
+        type(self).objects.filter(pk=self.pk).update(updated_at=self.updated_at)
+    
+    def record_shard(self, start_page: int, end_page: Optional[int],
+                     stats: Dict[str, int], pages: int,
+                     shard_high_water_mark=None) -> bool:
+        """
+        Add a finished shard's results; the last shard completes the run.
+        
+        Call on a row locked with select_for_update(). A shard that was
+        already recorded, e.g. by a retried task, is not counted again.
+        
+        Args:
+            start_page: First page of the shard
+            end_page: Last page of the shard, or None if open-ended
+            stats: Writer counters for the shard
+            pages: Number of pages the shard committed
+            shard_high_water_mark: Latest supplier-side update time in the shard
+            
+        Returns:
+            True if the run is complete
+        """
+        shard = [start_page, end_page]
+        if shard in self.completed_shards:
+            return self.status == 'completed'
+        
+        self.completed_shards.append(shard)
+        self.shards_completed += 1
+        self.pages_committed += pages
+        for field in self.COUNTER_FIELDS:
+            setattr(self, field, getattr(self, field) + stats.get(field, 0))
+        
+        if shard_high_water_mark and (
+            self.run_high_water_mark is None or shard_high_water_mark > self.run_high_water_mark
+        ):
+            self.run_high_water_mark = shard_high_water_mark
+        
+        if self.shards_completed >= self.shards_total:
+            self.complete_run()
+            return True
+        
+        self.save()
+        return False
+    
+    @property
+    def last_run_seconds(self) -> Optional[float]:
+        """Duration of the last completed run, if known."""
+        if self.status != 'completed' or not (self.run_started_at and self.run_completed_at):
+            return None
+        return (self.run_completed_at - self.run_started_at).total_seconds()
+    
+    def fail_run(self, error_message: str) -> None:
+        """Record a failure, keeping the cursor so the next run resumes."""
+        self.status = 'failed'
+        self.last_error = error_message
+        self.save(update_fields=['status', 'last_error', 'updated_at'])
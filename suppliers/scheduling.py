@@ -0,0 +1,157 @@
+"""
+Fair scheduling for periodic supplier syncs.
+Estimates each due supplier's sync cost from its previous runs, splits
+large suppliers into page-range shards, and packs the resulting work
+units into a bounded number of sequential lanes per connector type.
+"""
+import math
+import logging
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from django.conf import settings
+from django.utils import timezone
+
+from .connectors.factory import _determine_connector_type, get_connector_class
+from .models import Supplier, SupplierSyncState
+
+logger = logging.getLogger(__name__)
+
+
+class SyncUnit(NamedTuple):
+    """One schedulable piece of work: a whole supplier sync or a page-range shard."""
+    supplier_id: int
+    connector_type: str
+    estimated_seconds: float
+    start_page: Optional[int] = None
+    end_page: Optional[int] = None
+
+    @property
+    def is_shard(self) -> bool:
+        return self.start_page is not None
+
+    def to_dict(self) -> Dict:
+        """Serialize for passing between Celery tasks."""
+        return self._asdict()
+
+
+def get_connector_concurrency(connector_type: str) -> int:
+    """Maximum concurrent syncs for a connector type."""
+    limits = getattr(settings, 'SUPPLIER_SYNC_CONNECTOR_CONCURRENCY', {})
+    return max(1, limits.get(connector_type, limits.get('default', 2)))
+
+
+def estimate_sync_cost(supplier: Supplier, state: Optional[SupplierSyncState],
+                       page_size: int) -> Tuple[int, float]:
+    """
+    Estimate how many pages a supplier's next sync fetches and how long it takes.
+
+    Uses the last completed run when there is one, since it reflects the
+    supplier's real incremental volume and API latency. Otherwise the
+    page count comes from the supplier's product count.
+
+    Args:
+        supplier: Supplier to estimate
+        state: Supplier's sync state, if any
+        page_size: Products per page for the supplier's connector
+
+    Returns:
+        Tuple of (estimated pages, estimated seconds)
+    """
+    default_seconds_per_page = getattr(settings, 'SUPPLIER_SYNC_DEFAULT_SECONDS_PER_PAGE', 2.0)
+
+    last_seconds = state.last_run_seconds if state else None
+    if last_seconds is not None and state.pages_committed:
+        pages = state.pages_committed
+        seconds_per_page = last_seconds / pages
+    else:
+        pages = max(1, math.ceil((supplier.total_products or 0) / page_size))
+        seconds_per_page = default_seconds_per_page
+
+    return pages, pages * seconds_per_page
+
+
+def plan_supplier_units(supplier: Supplier, state: Optional[SupplierSyncState]) -> List[SyncUnit]:
+    """
+    Split a supplier's sync into work units.
+
+    Suppliers estimated above SUPPLIER_SYNC_SHARD_PAGES pages are split
+    into page-range shards (at most SUPPLIER_SYNC_MAX_SHARDS); the last
+    shard is open-ended so catalogue growth is still covered. Interrupted
+    runs are resumed as a single unit from their cursor.
+
+    Args:
+        supplier: Supplier to plan
+        state: Supplier's sync state, if any
+
+    Returns:
+        List of SyncUnit
+    """
+    connector_type = _determine_connector_type(supplier)
+    connector_class = get_connector_class(connector_type)
+    page_size = connector_class.default_page_size if connector_class else 100
+
+    pages, seconds = estimate_sync_cost(supplier, state, page_size)
+
+    shard_pages = getattr(settings, 'SUPPLIER_SYNC_SHARD_PAGES', 50)
+    max_shards = getattr(settings, 'SUPPLIER_SYNC_MAX_SHARDS', 8)
+    shard_count = min(max_shards, math.ceil(pages / shard_pages))
+
+    if (state and state.is_resumable) or shard_count <= 1:
+        return [SyncUnit(supplier.id, connector_type, seconds)]
+
+    pages_per_shard = math.ceil(pages / shard_count)
+    units = []
+    for index in range(shard_count):
+        start_page = index * pages_per_shard + 1
+        end_page = None if index == shard_count - 1 else start_page + pages_per_shard - 1
+        units.append(SyncUnit(
+            supplier.id, connector_type, seconds / shard_count, start_page, end_page
+        ))
+
+    return units
+
+
+def build_lanes(units: Iterable[SyncUnit]) -> Dict[str, List[List[SyncUnit]]]:
+    """
+    Pack work units into sequential lanes, one set of lanes per connector type.
+
+    The number of lanes per type caps that type's concurrent syncs. Units
+    are assigned longest-first to the least-loaded lane to balance total
+    lane time. Each lane then runs shortest-first, so small suppliers are
+    not queued behind a large one, and shards of one supplier spread
+    across lanes and run in parallel.
+
+    Args:
+        units: Work units to schedule
+
+    Returns:
+        Mapping of connector type to its lanes
+    """
+    by_type: Dict[str, List[SyncUnit]] = {}
+    for unit in units:
+        by_type.setdefault(unit.connector_type, []).append(unit)
+
+    lanes_by_type = {}
+    for connector_type, type_units in by_type.items():
+        lane_count = min(get_connector_concurrency(connector_type), len(type_units))
+        lanes: List[List[SyncUnit]] = [[] for _ in range(lane_count)]
+        loads = [0.0] * lane_count
+
+        for unit in sorted(type_units, key=lambda u: u.estimated_seconds, reverse=True):
+            lane = loads.index(min(loads))
+            lanes[lane].append(unit)
+            loads[lane] += unit.estimated_seconds
+
+        lanes_by_type[connector_type] = [
+            sorted(lane, key=lambda u: u.estimated_seconds) for lane in lanes
+        ]
+
+    return lanes_by_type
+
+
+def is_sync_in_progress(state: Optional[SupplierSyncState]) -> bool:
+    """Whether a run is still active and should not be scheduled again."""
+    if not state or state.status != 'running':
+        return False
+    stale_after = getattr(settings, 'SUPPLIER_SYNC_STALE_SECONDS', 3600)
+    return (timezone.now() - state.updated_at).total_seconds() < stale_after
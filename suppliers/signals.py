@@ -0,0 +1,13 @@
+"""
+Signals sent by the supplier sync pipelines.
+"""
+from django.dispatch import Signal
+
+
+# Sent after supplier product quantities change, once per written chunk.
+# Arguments:
+#     supplier: Supplier whose products changed
+#     quantities: Mapping of SupplierProduct id to its new quantity_available
+# Receivers run inside the writing transaction; defer side effects with
+# transaction.on_commit().
+supplier_quantities_changed = Signal()
@@ -0,0 +1,576 @@
+"""
+Batched write pipeline for supplier product synchronization.
+Resolves existing SKUs once per sync and writes products in chunks,
+committing each chunk in its own transaction. Products whose payload
+fingerprint is unchanged are skipped without touching the database.
+Inventory-only feeds are applied with set-based quantity updates.
+"""
+import logging
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Supplier, SupplierProduct
+from .signals import supplier_quantities_changed
+
+logger = logging.getLogger(__name__)
+
+
+# Standard product payload keys mapped to SupplierProduct fields
+PRODUCT_FIELD_MAPPING = {
+    'name': 'supplier_name',
+    'description': 'description',
+    'category': 'category',
+    'subcategory': 'subcategory',
+    'brand': 'brand',
+    'price': 'cost_price',
+    'msrp': 'msrp',
+    'currency': 'currency',
+    'quantity': 'quantity_available',
+    'min_order_qty': 'min_order_quantity',
+    'weight': 'weight',
+    'lead_time': 'lead_time_days',
+    'dimensions': 'dimensions',
+    'attributes': 'attributes',
+    'images': 'image_urls',
+}
+
+DECIMAL_FIELDS = {'cost_price', 'msrp', 'weight'}
+INTEGER_FIELDS = {'quantity_available', 'min_order_quantity', 'lead_time_days'}
+TEXT_FIELDS = {'supplier_name', 'description', 'category', 'subcategory', 'brand', 'currency'}
+
+
+def _safe_decimal(value: Any) -> Optional[Decimal]:
+    """Safely convert value to Decimal."""
+    if value is None:
+        return None
+    try:
+        return Decimal(str(value))
+    except:
+        return None
+
+
+def _safe_int(value: Any, default: Optional[int] = 0) -> Optional[int]:
+    """Safely convert value to int."""
+    if value is None or value == '':
+        return default
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def get_product_sku(product_data: Dict[str, Any]) -> Optional[str]:
+    """
+    Get the supplier SKU from a product payload.
+
+    Connectors differ in which key they use, so the standard keys are
+    checked in order.
+    """
+    sku = (
+        product_data.get('sku')
+        or product_data.get('supplier_sku')
+        or product_data.get('id')
+    )
+    return str(sku) if sku not in (None, '') else None
+
+
+def get_payload_updated_at(product_data: Dict[str, Any]) -> Optional[datetime]:
+    """
+    Get the supplier-side last modification time from a product payload.
+
+    Returns:
+        Aware datetime, or None if the payload carries no parseable time
+    """
+    value = product_data.get('updated_at')
+    if isinstance(value, str):
+        value = parse_datetime(value)
+    if not isinstance(value, datetime):
+        return None
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value, dt_timezone.utc)
+    return value
+
+
+def get_page_high_water_mark(products: Iterable[Dict[str, Any]]) -> Optional[datetime]:
+    """Get the latest supplier-side update time in a page of payloads."""
+    times = [t for t in (get_payload_updated_at(p) for p in products) if t]
+    return max(times) if times else None
+
+
+def build_product_fields(product_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Map a standard product payload to SupplierProduct field values.
+
+    Only keys present in the payload are mapped, so a partial payload
+    never blanks out fields it does not carry.
+
+    Args:
+        product_data: Standardized product dictionary from a connector
+
+    Returns:
+        Dictionary of model field values
+    """
+    fields = {}
+
+    for api_field, model_field in PRODUCT_FIELD_MAPPING.items():
+        if api_field not in product_data:
+            continue
+
+        value = product_data[api_field]
+
+        if model_field in DECIMAL_FIELDS:
+            # Some connectors nest the amount, e.g. {'amount': 1.5, 'currency': 'CNY'}
+            if isinstance(value, dict):
+                value = value.get('amount')
+            value = _safe_decimal(value)
+        elif model_field in INTEGER_FIELDS:
+            value = _safe_int(value, None if model_field == 'lead_time_days' else 0)
+            if model_field == 'min_order_quantity' and not value:
+                value = 1
+        elif model_field in TEXT_FIELDS:
+            value = '' if value is None else str(value)
+
+        fields[model_field] = value
+
+    if 'available' in product_data:
+        fields['status'] = 'active' if product_data['available'] else 'inactive'
+
+    fields['supplier_data'] = product_data
+    fields['content_hash'] = SupplierProduct.compute_content_hash(product_data)
+    return fields
+
+
+class SupplierProductWriter:
+    """
+    Writes supplier product payloads with bulk queries.
+
+    Existing SKUs and their content hashes are loaded in one query on
+    first use. Products whose hash matches are counted as unchanged and
+    not written. For changed products only the differing fields are
+    updated, grouped into one bulk_update per distinct field set. Each
+    chunk is written in its own atomic block, so no transaction is held
+    for the length of the whole sync.
+    
+    When the caller already holds a transaction, as the product sync task
+    does around each page, chunk blocks become savepoints and the caller's
+    transaction is the only commit boundary: a failed chunk is rolled back
+    alone, but nothing is durable until the caller commits. The SKU map is
+    updated as chunks succeed, so a caller that rolls back its transaction
+    must discard the writer.
+    """
+
+    def __init__(self, supplier: Supplier, chunk_size: Optional[int] = None,
+                 on_progress: Optional[Callable[[int], None]] = None):
+        """
+        Initialize the writer.
+
+        Args:
+            supplier: Supplier whose products are being written
+            chunk_size: Products per transaction (defaults to SUPPLIER_SYNC_CHUNK_SIZE)
+            on_progress: Optional callback receiving the processed product count
+        """
+        self.supplier = supplier
+        self.chunk_size = chunk_size or getattr(settings, 'SUPPLIER_SYNC_CHUNK_SIZE', 1000)
+        self.on_progress = on_progress
+        self._existing: Optional[Dict[str, Tuple[int, str]]] = None
+        self._quantity_changes: Dict[int, int] = {}
+        self.failed_chunks = 0
+        self.stats = {
+            'products_processed': 0,
+            'products_created': 0,
+            'products_changed': 0,
+            'products_unchanged': 0,
+            'products_errors': 0
+        }
+
+    @property
+    def existing(self) -> Dict[str, Tuple[int, str]]:
+        """Map of supplier_sku to (product id, content hash), loaded once per writer."""
+        if self._existing is None:
+            self._existing = {
+                supplier_sku: (product_id, content_hash)
+                for supplier_sku, product_id, content_hash in
+                SupplierProduct.objects.filter(supplier=self.supplier)
+                .order_by()
+                .values_list('supplier_sku', 'id', 'content_hash')
+            }
+        return self._existing
+
+    def write(self, products_data: Iterable[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        Write a batch of product payloads.
+
+        Can be called repeatedly with successive batches; statistics
+        accumulate across calls.
+
+        Args:
+            products_data: Iterable of standardized product dictionaries
+
+        Returns:
+            Cumulative statistics
+        """
+        chunk = []
+        for product_data in products_data:
+            chunk.append(product_data)
+            if len(chunk) >= self.chunk_size:
+                self._write_chunk(chunk)
+                chunk = []
+
+        if chunk:
+            self._write_chunk(chunk)
+
+        return self.stats
+
+    def _prepare_chunk(self, chunk: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """Resolve SKUs and map payloads to field values, keeping the last payload per SKU."""
+        prepared = {}
+
+        for product_data in chunk:
+            self.stats['products_processed'] += 1
+
+            try:
+                supplier_sku = get_product_sku(product_data)
+                if not supplier_sku:
+                    logger.warning(f"Product missing SKU/ID: {product_data}")
+                    self.stats['products_errors'] += 1
+                    continue
+
+                prepared[supplier_sku] = build_product_fields(product_data)
+
+            except Exception as e:
+                logger.error(f"Error processing product {product_data}: {e}")
+                self.stats['products_errors'] += 1
+
+        return prepared
+
+    def _write_chunk(self, chunk: List[Dict[str, Any]]) -> None:
+        """Write one chunk of products atomically, in a savepoint under a caller's transaction."""
+        prepared = self._prepare_chunk(chunk)
+
+        to_create: Dict[str, Dict[str, Any]] = {}
+        changed: Dict[int, Tuple[str, Dict[str, Any]]] = {}
+        unchanged = 0
+
+        for supplier_sku, fields in prepared.items():
+            known = self.existing.get(supplier_sku)
+
+            if known is None:
+                to_create[supplier_sku] = fields
+            elif known[1] == fields['content_hash']:
+                unchanged += 1
+            else:
+                changed[known[0]] = (supplier_sku, fields)
+
+        self.stats['products_unchanged'] += unchanged
+
+        if not to_create and not changed:
+            self._notify_progress()
+            return
+
+        now = timezone.now()
+        self._quantity_changes = {}
+        created: List[SupplierProduct] = []
+
+        try:
+            with transaction.atomic():
+                to_update = self._diff_changed(changed, to_create, now)
+
+                if to_create:
+                    created = self._bulk_create([
+                        SupplierProduct(
+                            supplier=self.supplier,
+                            supplier_sku=supplier_sku,
+                            last_updated_from_supplier=now,
+                            **fields
+                        )
+                        for supplier_sku, fields in to_create.items()
+                    ])
+
+                for field_names, products in to_update.items():
+                    SupplierProduct.objects.bulk_update(products, list(field_names))
+
+                # Sent inside the chunk transaction, as the signal documents
+                if self._quantity_changes:
+                    supplier_quantities_changed.send(
+                        sender=SupplierProduct, supplier=self.supplier, quantities=self._quantity_changes
+                    )
+
+        except Exception as e:
+            logger.error(f"Error writing product chunk for supplier {self.supplier.name}: {e}")
+            self.failed_chunks += 1
+            self.stats['products_errors'] += len(to_create) + len(changed)
+            self._notify_progress()
+            return
+
+        # Only record ids once the chunk has committed, so a rolled back
+        # chunk leaves no ids of rows that were never written
+        for product_id, (supplier_sku, fields) in changed.items():
+            self.existing[supplier_sku] = (product_id, fields['content_hash'])
+        for supplier_sku in to_create:
+            self.existing.pop(supplier_sku, None)
+        for product in created:
+            if product.pk:
+                self.existing[product.supplier_sku] = (product.pk, product.content_hash)
+
+        self.stats['products_created'] += len(to_create)
+        self.stats['products_changed'] += len(changed)
+        self._notify_progress()
+
+    def _diff_changed(self, changed: Dict[int, Tuple[str, Dict[str, Any]]],
+                      to_create: Dict[str, Dict[str, Any]],
+                      now) -> Dict[Tuple[str, ...], List[SupplierProduct]]:
+        """
+        Compare changed payloads with stored values and keep only differing fields.
+
+        Args:
+            changed: Map of product id to (supplier_sku, new field values)
+            to_create: New products; rows deleted since the preload are moved here
+            now: Timestamp for the update
+
+        Returns:
+            Products to update, grouped by the tuple of fields they change
+        """
+        to_update: Dict[Tuple[str, ...], List[SupplierProduct]] = {}
+        if not changed:
+            return to_update
+
+        compared = sorted({name for _, fields in changed.values() for name in fields})
+        current = {
+            row['id']: row
+            for row in SupplierProduct.objects.filter(id__in=list(changed))
+            .order_by()
+            .values('id', *compared)
+        }
+
+        for product_id, (supplier_sku, fields) in list(changed.items()):
+            row = current.get(product_id)
+            if row is None:
+                del changed[product_id]
+                to_create[supplier_sku] = fields
+                continue
+
+            diff = {name: value for name, value in fields.items() if row[name] != value}
+            if 'quantity_available' in diff:
+                self._quantity_changes[product_id] = diff['quantity_available']
+            diff['last_updated_from_supplier'] = now
+            diff['updated_at'] = now
+
+            # Payloads of one connector normally change the same fields,
+            # so this usually yields few bulk_update calls per chunk
+            field_names = tuple(sorted(diff))
+            to_update.setdefault(field_names, []).append(
+                SupplierProduct(id=product_id, **diff)
+            )
+
+        return to_update
+
+    def _bulk_create(self, products: List[SupplierProduct]) -> List[SupplierProduct]:
+        """Insert new products, updating instead if a concurrent sync created them first."""
+        update_fields = list(PRODUCT_FIELD_MAPPING.values()) + [
+            'status', 'supplier_data', 'content_hash',
+            'last_updated_from_supplier', 'updated_at'
+        ]
+
+        return SupplierProduct.objects.bulk_create(
+            products,
+            update_conflicts=True,
+            unique_fields=['supplier', 'supplier_sku'],
+            update_fields=update_fields
+        )
+
+    def _notify_progress(self) -> None:
+        if self.on_progress:
+            self.on_progress(self.stats['products_processed'])
+
+
+def upsert_supplier_products(supplier: Supplier, products_data: Iterable[Dict[str, Any]],
+                             chunk_size: Optional[int] = None) -> Dict[str, int]:
+    """
+    Create or update supplier products from connector payloads in chunks.
+
+    Args:
+        supplier: Supplier instance
+        products_data: Iterable of standardized product dictionaries
+        chunk_size: Products per transaction
+
+    Returns:
+        Statistics about processed products
+    """
+    writer = SupplierProductWriter(supplier, chunk_size=chunk_size)
+    return writer.write(products_data)
+
+
+def normalize_inventory_updates(inventory_data: Any) -> List[Dict[str, Any]]:
+    """
+    Convert connector inventory data to a list of {'sku', 'quantity'} updates.
+
+    Accepts either a list of update dictionaries or the mapping of product
+    ID to inventory data returned by fetch_inventory().
+    """
+    if isinstance(inventory_data, dict):
+        updates = []
+        for sku, item in inventory_data.items():
+            if not isinstance(item, dict) or 'error' in item:
+                continue
+            quantity = item.get('quantity', item.get('available_quantity', 0))
+            updates.append({'sku': sku, 'quantity': quantity})
+        return updates
+
+    return list(inventory_data or [])
+
+
+def apply_inventory_updates(supplier: Supplier, inventory_updates: Iterable[Dict[str, Any]],
+                            chunk_size: Optional[int] = None,
+                            on_progress: Optional[Callable[[int], None]] = None) -> Dict[str, int]:
+    """
+    Apply inventory quantities for many SKUs with set-based queries.
+
+    Each chunk locks and reads its SKUs in one query, then writes every
+    changed quantity in one UPDATE ... FROM (VALUES ...) statement, in a
+    single transaction. Rows whose quantity is unchanged are not written.
+    Changed quantities are not returned: each chunk sends them with
+    supplier_quantities_changed, so the result stays small on large
+    catalogues.
+
+    Args:
+        supplier: Supplier instance
+        inventory_updates: Iterable of {'sku': ..., 'quantity': ...} dictionaries
+        chunk_size: SKUs per transaction (defaults to SUPPLIER_SYNC_CHUNK_SIZE)
+        on_progress: Optional callback receiving the processed update count
+            after each chunk
+
+    Returns:
+        Statistics about processed updates
+    """
+    chunk_size = chunk_size or getattr(settings, 'SUPPLIER_SYNC_CHUNK_SIZE', 1000)
+    stats = {
+        'updates_processed': 0,
+        'updates_successful': 0,
+        'updates_changed': 0,
+        'updates_unchanged': 0,
+        'updates_missing': 0,
+        'updates_failed': 0
+    }
+
+    chunk: Dict[str, int] = {}
+    for update in inventory_updates:
+        stats['updates_processed'] += 1
+
+        supplier_sku = update.get('sku') or update.get('supplier_sku')
+        quantity = _safe_int(update.get('quantity', 0), None)
+        if not supplier_sku or quantity is None:
+            logger.warning(f"Invalid inventory update: {update}")
+            stats['updates_failed'] += 1
+            continue
+
+        chunk[str(supplier_sku)] = quantity
+        if len(chunk) >= chunk_size:
+            _apply_inventory_chunk(supplier, chunk, stats)
+            chunk = {}
+            if on_progress:
+                on_progress(stats['updates_processed'])
+
+    if chunk:
+        _apply_inventory_chunk(supplier, chunk, stats)
+    if on_progress:
+        on_progress(stats['updates_processed'])
+
+    return stats
+
+
+def _apply_inventory_chunk(supplier: Supplier, chunk: Dict[str, int],
+                           stats: Dict[str, int]) -> None:
+    """Resolve and update one chunk of SKU quantities in a single transaction."""
+    try:
+        with transaction.atomic():
+            current = {
+                supplier_sku: (product_id, quantity)
+                for supplier_sku, product_id, quantity in
+                SupplierProduct.objects.select_for_update()
+                .filter(supplier=supplier, supplier_sku__in=list(chunk))
+                .order_by()
+                .values_list('supplier_sku', 'id', 'quantity_available')
+            }
+
+            changes = []
+            for supplier_sku, new_quantity in chunk.items():
+                if supplier_sku not in current:
+                    logger.warning(f"Product not found for SKU: {supplier_sku}")
+                    stats['updates_missing'] += 1
+                    stats['updates_failed'] += 1
+                    continue
+
+                product_id, old_quantity = current[supplier_sku]
+                stats['updates_successful'] += 1
+                if old_quantity == new_quantity:
+                    stats['updates_unchanged'] += 1
+                    continue
+
+                changes.append((product_id, new_quantity))
+
+            if changes:
+                _bulk_set_quantities(changes)
+                supplier_quantities_changed.send(
+                    sender=SupplierProduct, supplier=supplier, quantities=dict(changes)
+                )
+            stats['updates_changed'] += len(changes)
+
+    except Exception as e:
+        logger.error(f"Error applying inventory chunk for supplier {supplier.name}: {e}")
+        stats['updates_failed'] += len(chunk)
+
+
+def _bulk_set_quantities(changes: List[Tuple[int, int]]) -> None:
+    """
+    Write (product_id, quantity) pairs with one UPDATE ... FROM (VALUES ...).
+
+    The content hash is cleared as well: the stored quantity no longer
+    matches the last product payload, so the next product feed must be
+    written even if it repeats that payload.
+    """
+    now = timezone.now()
+
+    if connection.vendor != 'postgresql':
+        SupplierProduct.objects.bulk_update(
+            [
+                SupplierProduct(
+                    id=product_id,
+                    quantity_available=quantity,
+                    content_hash='',
+                    last_updated_from_supplier=now,
+                    updated_at=now
+                )
+                for product_id, quantity in changes
+            ],
+            ['quantity_available', 'content_hash', 'last_updated_from_supplier', 'updated_at']
+        )
+        return
+
+    opts = SupplierProduct._meta
+    table = connection.ops.quote_name(opts.db_table)
+    pk = connection.ops.quote_name(opts.pk.column)
+    quantity_col = connection.ops.quote_name(opts.get_field('quantity_available').column)
+    hash_col = connection.ops.quote_name(opts.get_field('content_hash').column)
+    synced_col = connection.ops.quote_name(opts.get_field('last_updated_from_supplier').column)
+    updated_col = connection.ops.quote_name(opts.get_field('updated_at').column)
+
+    values = ', '.join(['(%s::bigint, %s::integer)'] * len(changes))
+    params: List[Any] = [now, now]
+    for product_id, quantity in changes:
+        params.extend([product_id, quantity])
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {table} AS p "
+            f"SET {quantity_col} = v.quantity, {hash_col} = '', "
+            f"{synced_col} = %s, {updated_col} = %s "
+            f"FROM (VALUES {values}) AS v(id, quantity) "
+            f"WHERE p.{pk} = v.id",
+            params
+        )
@@ -4,7 +4,6 @@ Celery tasks for supplier data synchronization and management.
 import logging
 from typing import Dict, List, Optional, Any
 from datetime import datetime, timedelta
-from decimal import Decimal
 
 from celery import shared_task
 from django.utils import timezone
@@ -12,8 +11,10 @@ from django.db import transaction
 from django.core.mail import send_mail
 from django.conf import settings
 
-from .models import Supplier, SupplierProduct
-from .connectors.factory import create_connector
+from .models import Supplier, SupplierProduct, SupplierSyncState
+from .connectors.factory import get_cached_connector
+from .scheduling import build_lanes, is_sync_in_progress, plan_supplier_units
+from .sync import SupplierProductWriter, apply_inventory_updates, get_page_high_water_mark
 
 logger = logging.getLogger(__name__)
 
@@ -44,7 +45,7 @@ def sync_supplier_products(self, supplier_id: int, force_full_sync: bool = False
             }
         
         # Get connector for the supplier
-        connector = create_connector(supplier)
+        connector = get_cached_connector(supplier)
         if not connector:
             error_msg = f"No connector available for supplier {supplier.name}"
             logger.error(error_msg)
@@ -55,31 +56,52 @@ def sync_supplier_products(self, supplier_id: int, force_full_sync: bool = False
                 'supplier_id': supplier_id
             }
         
-        # Determine sync parameters
-        last_sync = supplier.last_sync_at
-        if force_full_sync or not last_sync:
-            since = None
-        else:
-            # Only sync products updated since last sync
-            since = last_sync
-        
-        # Fetch products from supplier
-        logger.info(f"Fetching products from {supplier.name} since {since}")
-        products_data = connector.get_products(since=since)
-        
-        if not products_data:
-            logger.warning(f"No products returned from {supplier.name}")
-            supplier.update_sync_status(True, "")
+        # Resume an interrupted run from its cursor, otherwise start a new
+        # run from the high-water mark. Celery retries always resume.
+        state, _ = SupplierSyncState.objects.get_or_create(supplier=supplier)
+        if state.shards_total and is_sync_in_progress(state):
+            # Restarting would reset the bookkeeping of shards still writing
+            logger.warning(f"Sharded sync of {supplier.name} is in progress, skipping sync")
             return {
-                'success': True,
-                'products_processed': 0,
-                'products_created': 0,
-                'products_updated': 0,
+                'success': False,
+                'error': 'Sharded sync in progress',
                 'supplier_id': supplier_id
             }
+        if state.is_resumable and (not force_full_sync or self.request.retries):
+            logger.info(f"Resuming sync for {supplier.name} at page {state.cursor_page}")
+        else:
+            state.start_run(full_sync=force_full_sync)
+        
+        # Stream product pages from the supplier straight into the writer;
+        # the connector prefetches the next pages while this one is written.
+        # The page transaction is the only commit boundary: the writer's
+        # chunks become savepoints, so a page commits together with the
+        # cursor that moves past it, and a failed chunk rolls back the whole
+        # page for the retry to rewrite. The retry uses a new writer.
+        logger.info(f"Fetching products from {supplier.name} since {state.run_since}")
+        writer = SupplierProductWriter(supplier)
+        
+        for page in connector.iter_product_pages(since=state.run_since, start_page=state.cursor_page):
+            before = dict(writer.stats)
+            failed_chunks = writer.failed_chunks
+            with transaction.atomic():
+                writer.write(page.products)
+                if writer.failed_chunks > failed_chunks:
+                    # Leave the cursor on this page so the retry rewrites it
+                    raise RuntimeError(f"Failed to write page {page.number} for {supplier.name}")
+                state.record_page(
+                    page.number,
+                    {key: value - before[key] for key, value in writer.stats.items()},
+                    get_page_high_water_mark(page.products)
+                )
         
-        # Process products
-        stats = _process_supplier_products(supplier, products_data)
+        state.complete_run()
+        stats = {
+            field: getattr(state, field) for field in SupplierSyncState.COUNTER_FIELDS
+        }
+        stats['pages_fetched'] = state.pages_committed
+        if not stats['products_processed']:
+            logger.warning(f"No products returned from {supplier.name}")
         
         # Update supplier sync status
         supplier.update_sync_status(True, "")
@@ -111,10 +133,17 @@ def sync_supplier_products(self, supplier_id: int, force_full_sync: bool = False
         error_msg = f"Error syncing supplier {supplier_id}: {str(e)}"
         logger.error(error_msg, exc_info=True)
         
-        # Update supplier with error status
+        # Update supplier with error status; the sync state keeps its
+        # cursor so the retry resumes after the last committed page
         try:
             supplier = Supplier.objects.get(id=supplier_id)
             supplier.update_sync_status(False, error_msg)
+            state = SupplierSyncState.objects.filter(
+                supplier_id=supplier_id,
+                status='running'
+            ).first()
+            if state:
+                state.fail_run(error_msg)
         except:
             pass
             
@@ -122,88 +151,15 @@ def sync_supplier_products(self, supplier_id: int, force_full_sync: bool = False
         raise self.retry(exc=e, countdown=60)
 
 
-def _process_supplier_products(supplier: Supplier, products_data: List[Dict]) -> Dict[str, int]:
-    """
-    Process and save supplier products data.
-    
-    Args:
-        supplier: Supplier instance
-        products_data: List of product data dictionaries
-        
-    Returns:
-        Statistics about processed products
-    """
-    stats = {
-        'products_processed': 0,
-        'products_created': 0,
-        'products_updated': 0,
-        'products_errors': 0
-    }
-    
-    with transaction.atomic():
-        for product_data in products_data:
-            try:
-                stats['products_processed'] += 1
-                
-                # Get or create product
-                supplier_sku = product_data.get('sku') or product_data.get('id')
-                if not supplier_sku:
-                    logger.warning(f"Product missing SKU/ID: {product_data}")
-                    stats['products_errors'] += 1
-                    continue
-                
-                product, created = SupplierProduct.objects.get_or_create(
-                    supplier=supplier,
-                    supplier_sku=supplier_sku,
-                    defaults={
-                        'supplier_name': product_data.get('name', ''),
-                        'description': product_data.get('description', ''),
-                        'category': product_data.get('category', ''),
-                        'brand': product_data.get('brand', ''),
-                        'cost_price': _safe_decimal(product_data.get('price')),
-                        'msrp': _safe_decimal(product_data.get('msrp')),
-                        'quantity_available': product_data.get('quantity', 0),
-                        'min_order_quantity': product_data.get('min_order_qty', 1),
-                        'weight': _safe_decimal(product_data.get('weight')),
-                        'currency': product_data.get('currency', 'USD'),
-                        'status': 'active' if product_data.get('available', True) else 'inactive'
-                    }
-                )
-                
-                if created:
-                    stats['products_created'] += 1
-                    logger.debug(f"Created new product: {supplier_sku}")
-                else:
-                    stats['products_updated'] += 1
-                    logger.debug(f"Updated existing product: {supplier_sku}")
-                
-                # Update product data from supplier
-                product.update_from_supplier_data(product_data)
-                product.save()
-                
-            except Exception as e:
-                logger.error(f"Error processing product {product_data}: {e}")
-                stats['products_errors'] += 1
-                continue
-    
-    return stats
-
-
-def _safe_decimal(value: Any) -> Optional[Decimal]:
-    """Safely convert value to Decimal."""
-    if value is None:
-        return None
-    try:
-        return Decimal(str(value))
-    except:
-        return None
-
-
 @shared_task(bind=True)
 def sync_all_suppliers(self) -> Dict[str, Any]:
     """
     Sync all active suppliers that are due for synchronization.
     
+    Work is scheduled fairly rather than enqueued all at once: large
+    suppliers are split into page-range shards, and each connector type
+    gets a capped number of sequential lanes (see suppliers.scheduling).
+    
     Returns:
         Dictionary with overall sync results
     """
@@ -213,13 +169,14 @@ def sync_all_suppliers(self) -> Dict[str, Any]:
     suppliers_to_sync = Supplier.objects.filter(
         status='active',
         is_auto_sync_enabled=True
-    )
+    ).select_related('sync_state')
     
-    # Filter to only those due for sync
+    # Filter to only those due for sync and not already running
     due_suppliers = []
     for supplier in suppliers_to_sync:
-        if supplier.is_sync_due:
-            due_suppliers.append(supplier)
+        state = getattr(supplier, 'sync_state', None)
+        if supplier.is_sync_due and not is_sync_in_progress(state):
+            due_suppliers.append((supplier, state))
     
     if not due_suppliers:
         logger.info("No suppliers due for sync")
@@ -230,28 +187,200 @@ def sync_all_suppliers(self) -> Dict[str, Any]:
             'message': 'No suppliers due for sync'
         }
     
-    # Start sync tasks for each supplier
+    # Plan work units; sharded runs are started here so every shard
+    # shares one watermark and the last shard can complete the run
+    units = []
     sync_results = []
-    for supplier in due_suppliers:
+    for supplier, state in due_suppliers:
         try:
-            result = sync_supplier_products.delay(supplier.id)
+            supplier_units = plan_supplier_units(supplier, state)
+            if supplier_units[0].is_shard:
+                if state is None:
+                    state = SupplierSyncState.objects.create(supplier=supplier)
+                state.start_run(shards=len(supplier_units))
+            
+            units.extend(supplier_units)
             sync_results.append({
                 'supplier_id': supplier.id,
                 'supplier_name': supplier.name,
-                'task_id': result.id
+                'shards': len(supplier_units) if supplier_units[0].is_shard else 0,
+                'estimated_seconds': round(sum(u.estimated_seconds for u in supplier_units), 1)
             })
-            logger.info(f"Started sync task for supplier {supplier.name}: {result.id}")
         except Exception as e:
-            logger.error(f"Failed to start sync task for supplier {supplier.name}: {e}")
+            logger.error(f"Failed to plan sync for supplier {supplier.name}: {e}")
+    
+    # Start one chain of work units per lane
+    lanes = build_lanes(units)
+    lane_count = 0
+    for connector_type, type_lanes in lanes.items():
+        for lane in type_lanes:
+            try:
+                run_sync_lane.delay([unit.to_dict() for unit in lane])
+                lane_count += 1
+            except Exception as e:
+                logger.error(f"Failed to start {connector_type} sync lane: {e}")
+        logger.info(f"Scheduled {sum(len(l) for l in type_lanes)} {connector_type} sync units in {len(type_lanes)} lanes")
     
     return {
         'success': True,
         'suppliers_total': len(due_suppliers),
         'suppliers_synced': len(sync_results),
+        'lanes': lane_count,
         'sync_tasks': sync_results
     }
 
 
+@shared_task(bind=True)
+def run_sync_lane(self, units: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Start the first work unit of a lane and chain the rest behind it.
+    
+    The rest of the lane is attached as both the success and the error
+    callback, so a failing supplier does not stall the suppliers queued
+    after it. bind=True makes Celery call the error callback as a task,
+    which the immutable signature ignores the arguments of.
+    
+    Args:
+        units: Serialized SyncUnit dictionaries, in run order
+        
+    Returns:
+        Dictionary with the started unit
+    """
+    if not units:
+        return {'success': True, 'remaining': 0}
+    
+    unit, rest = units[0], units[1:]
+    if unit.get('start_page') is not None:
+        signature = sync_supplier_shard.si(unit['supplier_id'], unit['start_page'], unit['end_page'])
+    else:
+        signature = sync_supplier_products.si(unit['supplier_id'])
+    
+    options = {}
+    if rest:
+        options = {'link': run_sync_lane.si(rest), 'link_error': run_sync_lane.si(rest)}
+    
+    result = signature.apply_async(**options)
+    
+    return {
+        'success': True,
+        'supplier_id': unit['supplier_id'],
+        'task_id': result.id,
+        'remaining': len(rest)
+    }
+
+
+@shared_task(bind=True, max_retries=3)
+def sync_supplier_shard(self, supplier_id: int, start_page: int,
+                        end_page: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Sync one page range of a sharded supplier run.
+    
+    The shard's results are added to the supplier's sync state; the last
+    shard to finish completes the run and advances the watermark. A
+    retried shard rewrites its whole range, which content hashes make cheap,
+    and is only counted once. Each committed page refreshes the run's
+    heartbeat; a shard that runs out of retries fails the run, so the next
+    scheduling pass starts it again.
+    
+    Args:
+        supplier_id: ID of the supplier to sync
+        start_page: First page of the shard
+        end_page: Last page of the shard, or None for the rest of the catalogue
+        
+    Returns:
+        Dictionary with shard results
+    """
+    try:
+        supplier = Supplier.objects.get(id=supplier_id)
+        state = SupplierSyncState.objects.get(supplier=supplier)
+        if state.status != 'running' or not state.shards_total:
+            logger.warning(f"Sharded run of {supplier.name} is no longer active, skipping shard")
+            return {
+                'success': False,
+                'error': 'Sharded run is no longer active',
+                'supplier_id': supplier_id
+            }
+        
+        run_started_at = state.run_started_at
+        connector = get_cached_connector(supplier)
+        
+        logger.info(f"Syncing {supplier.name} pages {start_page}-{end_page or 'end'}")
+        writer = SupplierProductWriter(supplier)
+        pages = 0
+        high_water_mark = None
+        
+        for page in connector.iter_product_pages(
+            since=state.run_since, start_page=start_page, end_page=end_page
+        ):
+            writer.write(page.products)
+            if writer.failed_chunks:
+                raise RuntimeError(f"Failed to write page {page.number} for {supplier.name}")
+            
+            state.touch()
+            pages += 1
+            page_mark = get_page_high_water_mark(page.products)
+            if page_mark and (high_water_mark is None or page_mark > high_water_mark):
+                high_water_mark = page_mark
+        
+        with transaction.atomic():
+            state = SupplierSyncState.objects.select_for_update().get(pk=state.pk)
+            if state.run_started_at != run_started_at or state.status == 'failed':
+                # The run failed or was restarted while this shard ran
+                logger.warning(f"Sharded run of {supplier.name} ended, not recording pages {start_page}-{end_page or 'end'}")
+                completed = False
+            else:
+                completed = state.record_shard(start_page, end_page, writer.stats, pages, high_water_mark)
+        
+        if completed:
+            supplier.update_sync_status(True, "")
+            supplier.total_products = SupplierProduct.objects.filter(
+                supplier=supplier,
+                status='active'
+            ).count()
+            supplier.save(update_fields=['total_products'])
+            logger.info(f"Completed sharded sync for {supplier.name}")
+        
+        return {
+            'success': True,
+            'supplier_id': supplier_id,
+            'start_page': start_page,
+            'end_page': end_page,
+            'pages_fetched': pages,
+            'run_completed': completed,
+            **writer.stats
+        }
+        
+    except (Supplier.DoesNotExist, SupplierSyncState.DoesNotExist):
+        error_msg = f"Supplier with ID {supplier_id} or its sync state not found"
+        logger.error(error_msg)
+        return {
+            'success': False,
+            'error': error_msg,
+            'supplier_id': supplier_id
+        }
+        
+    except Exception as e:
+        error_msg = f"Error syncing shard {start_page}-{end_page} of supplier {supplier_id}: {str(e)}"
+        logger.error(error_msg, exc_info=True)
+        
+        # Out of retries: fail the run so it is rescheduled from the start
+        # instead of staying 'running' until it goes stale
+        if self.request.retries >= self.max_retries:
+            try:
+                with transaction.atomic():
+                    state = SupplierSyncState.objects.select_for_update().filter(
+                        supplier_id=supplier_id,
+                        status='running'
+                    ).first()
+                    if state:
+                        state.fail_run(error_msg)
+                Supplier.objects.get(id=supplier_id).update_sync_status(False, error_msg)
+            except Exception as state_error:
+                logger.error(f"Failed to record failed shard of supplier {supplier_id}: {state_error}")
+        
+        raise self.retry(exc=e, countdown=60)
+
+
 @shared_task(bind=True, max_retries=2)
 def test_supplier_connection(self, supplier_id: int) -> Dict[str, Any]:
     """
@@ -268,7 +397,7 @@ def test_supplier_connection(self, supplier_id: int) -> Dict[str, Any]:
         logger.info(f"Testing connection to supplier: {supplier.name}")
         
         # Get connector for the supplier
-        connector = create_connector(supplier)
+        connector = get_cached_connector(supplier)
         if not connector:
             return {
                 'success': False,
@@ -329,53 +458,13 @@ def update_supplier_inventory(supplier_id: int, inventory_updates: List[Dict]) -
         supplier = Supplier.objects.get(id=supplier_id)
         logger.info(f"Updating inventory for supplier: {supplier.name}")
         
-        stats = {
-            'updates_processed': 0,
-            'updates_successful': 0,
-            'updates_failed': 0
-        }
-        
-        with transaction.atomic():
-            for update in inventory_updates:
-                stats['updates_processed'] += 1
-                
-                try:
-                    supplier_sku = update.get('sku')
-                    new_quantity = update.get('quantity', 0)
-                    
-                    if not supplier_sku:
-                        stats['updates_failed'] += 1
-                        continue
-                    
-                    # Update product quantity
-                    product = SupplierProduct.objects.get(
-                        supplier=supplier,
-                        supplier_sku=supplier_sku
-                    )
-                    
-                    old_quantity = product.quantity_available
-                    product.quantity_available = new_quantity
-                    product.last_updated_from_supplier = timezone.now()
-                    product.save(update_fields=[
-                        'quantity_available',
-                        'last_updated_from_supplier'
-                    ])
-                    
-                    stats['updates_successful'] += 1
-                    logger.debug(f"Updated inventory for {supplier_sku}: {old_quantity} -> {new_quantity}")
-                    
-                except SupplierProduct.DoesNotExist:
-                    logger.warning(f"Product not found for SKU: {supplier_sku}")
-                    stats['updates_failed'] += 1
-                    continue
-                    
-                except Exception as e:
-                    logger.error(f"Error updating inventory for {supplier_sku}: {e}")
-                    stats['updates_failed'] += 1
-                    continue
+        # Resolve and apply quantities in set-based chunks
+        stats = apply_inventory_updates(supplier, inventory_updates)
         
         logger.info(f"Completed inventory update for {supplier.name}: {stats}")
         
+        # Changed quantities reach marketplace inventory through the
+        # supplier_quantities_changed signal; the result only carries counts
         return {
             'success': True,
             'supplier_id': supplier_id,
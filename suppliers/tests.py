@@ -1,12 +1,37 @@
 """
 Tests for Supplier models and functionality.
 """
-from django.test import TestCase
+import os
+import tempfile
+import threading
+from datetime import datetime, timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.db import DatabaseError, connection
+from django.test import TestCase, override_settings
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
+from django.utils import timezone
 
-from .models import Supplier, SupplierProduct
-from .connectors.factory import create_connector, list_available_connectors
+from .models import Supplier, SupplierProduct, SupplierSyncState
+from .connectors.alibaba_1688 import Alibaba1688Connector, extract_product_details
+from .connectors.base import SupplierConnectorBase
+from .connectors.factory import (
+    close_cached_connectors, create_connector, get_cached_connector, list_available_connectors,
+    register_connector
+)
+from .connectors.normalization import Const, compile_spec, raw_product
+from .connectors.replay import ReplayConnector
+from .scheduling import (
+    SyncUnit, build_lanes, estimate_sync_cost, is_sync_in_progress, plan_supplier_units
+)
+from .signals import supplier_quantities_changed
+from .sync import (
+    SupplierProductWriter, apply_inventory_updates, normalize_inventory_updates,
+    upsert_supplier_products
+)
+from .tasks import sync_all_suppliers, sync_supplier_products, sync_supplier_shard
 from .utils.encryption import credential_encryption
 
 
@@ -225,6 +250,32 @@ class EncryptionUtilsTest(TestCase):
         """Test handling of invalid encrypted data."""
         decrypted = credential_encryption.decrypt_credentials("invalid-data")
         self.assertIsNone(decrypted)
+    
+    def test_decryption_is_cached_and_copied(self):
+        """Test that repeat decryptions skip the cipher and return independent copies."""
+        encrypted = credential_encryption.encrypt_credentials({'api_key': 'cached'})
+        first = credential_encryption.decrypt_credentials(encrypted)
+        first['api_key'] = 'mutated'
+        
+        with mock.patch.object(credential_encryption._cipher_suite, 'decrypt') as decrypt:
+            second = credential_encryption.decrypt_credentials(encrypted)
+        
+        decrypt.assert_not_called()
+        self.assertEqual(second, {'api_key': 'cached'})
+    
+    def test_set_credentials_invalidates_cache(self):
+        """Test that replacing credentials drops the cached plaintext."""
+        supplier = Supplier.objects.create(name='Cache Supplier', code='cache-supplier')
+        supplier.set_credentials({'api_key': 'old'})
+        old_encrypted = supplier.encrypted_credentials
+        self.assertEqual(supplier.get_decrypted_credentials(), {'api_key': 'old'})
+        
+        supplier.set_credentials({'api_key': 'new'})
+        
+        self.assertNotIn(
+            credential_encryption._cache_key(old_encrypted), credential_encryption._cache
+        )
+        self.assertEqual(supplier.get_decrypted_credentials(), {'api_key': 'new'})
 
 
 class ConnectorFactoryTest(TestCase):
@@ -249,6 +300,37 @@ class ConnectorFactoryTest(TestCase):
         self.assertEqual(connector.supplier, self.supplier)
         self.assertEqual(connector.connector_name, 'Example API Connector')
     
+    def test_cached_connector_reuse_and_invalidation(self):
+        """Test that connectors are reused until the credentials change."""
+        self.addCleanup(close_cached_connectors)
+        
+        connector = get_cached_connector(self.supplier)
+        session = connector.session
+        self.assertIs(get_cached_connector(self.supplier), connector)
+        self.assertIs(connector.session, session)
+        
+        self.supplier.set_credentials({'api_key': 'rotated'})
+        replacement = get_cached_connector(self.supplier)
+        self.assertIsNot(replacement, connector)
+        # The replaced connector released its HTTP session
+        self.assertIsNone(connector._connection)
+        
+        self.assertEqual(close_cached_connectors(), 1)
+    
+    def test_idle_connectors_are_evicted(self):
+        """Test that connectors unused for the idle period are closed."""
+        self.addCleanup(close_cached_connectors)
+        other = Supplier.objects.create(name='Other Supplier', code='example-2')
+        
+        connector = get_cached_connector(self.supplier)
+        connector.session
+        
+        with override_settings(SUPPLIER_CONNECTOR_IDLE_SECONDS=0):
+            get_cached_connector(other)
+        
+        self.assertIsNone(connector._connection)
+        self.assertIsNot(get_cached_connector(self.supplier), connector)
+    
     def test_list_available_connectors(self):
         """Test listing available connectors."""
         connectors = list_available_connectors()
@@ -257,3 +339,774 @@ class ConnectorFactoryTest(TestCase):
             connectors['example_api']['name'], 
             'Example API Connector'
         )
+
+
+class SupplierProductWriterTest(TestCase):
+    """Test cases for the batched supplier product upsert pipeline."""
+    
+    def setUp(self):
+        self.supplier = Supplier.objects.create(
+            name='Bulk Supplier',
+            code='bulk-supplier'
+        )
+        SupplierProduct.objects.create(
+            supplier=self.supplier,
+            supplier_sku='SKU-1',
+            supplier_name='Old Name',
+            brand='Old Brand',
+            quantity_available=1
+        )
+    
+    def test_creates_and_updates_in_chunks(self):
+        """Test that new and existing SKUs are written with bulk queries."""
+        products = [
+            {'sku': f'SKU-{i}', 'name': f'Product {i}', 'price': '9.99', 'quantity': i}
+            for i in range(1, 6)
+        ]
+        
+        writer = SupplierProductWriter(self.supplier, chunk_size=2)
+        # One SKU preload, then per chunk a savepoint pair around the bulk
+        # writes, plus one read of current values for the changed product
+        with self.assertNumQueries(12):
+            stats = writer.write(products)
+        
+        self.assertEqual(stats['products_processed'], 5)
+        self.assertEqual(stats['products_created'], 4)
+        self.assertEqual(stats['products_changed'], 1)
+        self.assertEqual(stats['products_errors'], 0)
+        
+        existing = SupplierProduct.objects.get(supplier=self.supplier, supplier_sku='SKU-1')
+        self.assertEqual(existing.supplier_name, 'Product 1')
+        # Fields missing from the payload are left untouched
+        self.assertEqual(existing.brand, 'Old Brand')
+        self.assertEqual(existing.cost_price, Decimal('9.99'))
+        self.assertIsNotNone(existing.last_updated_from_supplier)
+        
+        self.assertEqual(SupplierProduct.objects.filter(supplier=self.supplier).count(), 5)
+    
+    def test_unchanged_products_are_not_written(self):
+        """Test that a repeated feed only reads the stored fingerprints."""
+        products = [
+            {'sku': f'SKU-{i}', 'name': f'Product {i}', 'quantity': i}
+            for i in range(1, 4)
+        ]
+        upsert_supplier_products(self.supplier, products)
+        
+        products[2] = {'sku': 'SKU-3', 'name': 'Product 3', 'quantity': 30}
+        writer = SupplierProductWriter(self.supplier)
+        # Preload, then savepoint, current-value read, update, release
+        with self.assertNumQueries(5):
+            stats = writer.write(products)
+        
+        self.assertEqual(stats['products_unchanged'], 2)
+        self.assertEqual(stats['products_changed'], 1)
+        self.assertEqual(stats['products_created'], 0)
+        
+        product = SupplierProduct.objects.get(supplier=self.supplier, supplier_sku='SKU-3')
+        self.assertEqual(product.quantity_available, 30)
+        self.assertEqual(product.content_hash, SupplierProduct.compute_content_hash(products[2]))
+        
+        with self.assertNumQueries(1):
+            stats = upsert_supplier_products(self.supplier, products)
+        self.assertEqual(stats['products_unchanged'], 3)
+    
+    def test_quantity_signal_is_sent_inside_chunk_transaction(self):
+        """Test that receivers run in the transaction that wrote the quantities."""
+        depths = []
+        
+        def receiver(sender, supplier, quantities, **kwargs):
+            depths.append((len(connection.atomic_blocks), quantities))
+        
+        supplier_quantities_changed.connect(receiver)
+        self.addCleanup(supplier_quantities_changed.disconnect, receiver)
+        outside = len(connection.atomic_blocks)
+        
+        upsert_supplier_products(self.supplier, [{'sku': 'SKU-1', 'name': 'Old Name', 'quantity': 7}])
+        
+        product = SupplierProduct.objects.get(supplier=self.supplier, supplier_sku='SKU-1')
+        self.assertEqual(depths, [(outside + 1, {product.id: 7})])
+    
+    def test_rolled_back_chunk_records_no_new_ids(self):
+        """Test that SKUs inserted by a failed chunk are created again on retry."""
+        products = [
+            {'sku': 'SKU-1', 'name': 'Product 1', 'quantity': 5},
+            {'sku': 'SKU-2', 'name': 'Product 2', 'quantity': 2},
+        ]
+        writer = SupplierProductWriter(self.supplier)
+        
+        # The insert succeeds, then the update fails and rolls it back
+        with mock.patch.object(SupplierProduct.objects, 'bulk_update',
+                               side_effect=DatabaseError('update failed')):
+            stats = writer.write(products)
+        
+        self.assertEqual(writer.failed_chunks, 1)
+        self.assertEqual(stats['products_errors'], 2)
+        self.assertNotIn('SKU-2', writer.existing)
+        self.assertFalse(SupplierProduct.objects.filter(supplier_sku='SKU-2').exists())
+        
+        stats = writer.write(products)
+        
+        self.assertEqual(stats['products_created'], 1)
+        self.assertEqual(stats['products_changed'], 1)
+        product = SupplierProduct.objects.get(supplier=self.supplier, supplier_sku='SKU-2')
+        self.assertEqual(writer.existing['SKU-2'], (product.pk, product.content_hash))
+    
+    def test_skips_products_without_sku(self):
+        """Test that payloads without an identifier are counted as errors."""
+        stats = upsert_supplier_products(self.supplier, [
+            {'name': 'No SKU'},
+            {'supplier_sku': 'SKU-9', 'name': 'Alt key', 'price': {'amount': 3, 'currency': 'CNY'}}
+        ])
+        
+        self.assertEqual(stats['products_errors'], 1)
+        self.assertEqual(stats['products_created'], 1)
+        product = SupplierProduct.objects.get(supplier=self.supplier, supplier_sku='SKU-9')
+        self.assertEqual(product.cost_price, Decimal('3'))
+
+
+class InventoryUpdateTest(TestCase):
+    """Test cases for set-based supplier inventory updates."""
+    
+    def setUp(self):
+        self.supplier = Supplier.objects.create(
+            name='Inventory Supplier',
+            code='inventory-supplier'
+        )
+        for index in range(5):
+            SupplierProduct.objects.create(
+                supplier=self.supplier,
+                supplier_sku=f'INV-{index}',
+                supplier_name=f'Product {index}',
+                quantity_available=10
+            )
+    
+    def test_applies_changes_in_one_statement_per_chunk(self):
+        """Test that a chunk costs one read and one write, and changes are signalled."""
+        updates = [{'sku': f'INV-{index}', 'quantity': 10 + index} for index in range(5)]
+        updates.append({'sku': 'MISSING', 'quantity': 3})
+        updates.append({'sku': 'INV-1', 'quantity': 'not-a-number'})
+        signalled = {}
+        
+        def receiver(sender, supplier, quantities, **kwargs):
+            signalled.update(quantities)
+        
+        supplier_quantities_changed.connect(receiver)
+        self.addCleanup(supplier_quantities_changed.disconnect, receiver)
+        
+        # SELECT ... FOR UPDATE, UPDATE ... FROM (VALUES ...), plus savepoint
+        with self.assertNumQueries(4):
+            stats = apply_inventory_updates(self.supplier, updates)
+        
+        self.assertEqual(stats['updates_processed'], 7)
+        self.assertEqual(stats['updates_changed'], 4)
+        self.assertEqual(stats['updates_unchanged'], 1)
+        self.assertEqual(stats['updates_missing'], 1)
+        self.assertEqual(stats['updates_failed'], 2)
+        
+        ids = dict(SupplierProduct.objects.filter(supplier=self.supplier).values_list('supplier_sku', 'id'))
+        self.assertEqual(signalled, {ids[f'INV-{index}']: 10 + index for index in range(1, 5)})
+        
+        product = SupplierProduct.objects.get(supplier=self.supplier, supplier_sku='INV-4')
+        self.assertEqual(product.quantity_available, 14)
+        self.assertIsNotNone(product.last_updated_from_supplier)
+    
+    def test_reports_progress_per_chunk(self):
+        """Test that progress is reported after every applied chunk."""
+        updates = [{'sku': f'INV-{index}', 'quantity': index} for index in range(5)]
+        progress = []
+        
+        apply_inventory_updates(self.supplier, updates, chunk_size=2, on_progress=progress.append)
+        
+        self.assertEqual(progress, [2, 4, 5])
+    
+    def test_identical_feed_after_inventory_update_restores_quantity(self):
+        """Test that an inventory update invalidates the product payload hash."""
+        feed = [{'sku': 'INV-0', 'name': 'Product 0', 'quantity': 10}]
+        upsert_supplier_products(self.supplier, feed)
+        
+        apply_inventory_updates(self.supplier, [{'sku': 'INV-0', 'quantity': 3}])
+        product = SupplierProduct.objects.get(supplier=self.supplier, supplier_sku='INV-0')
+        self.assertEqual((product.quantity_available, product.content_hash), (3, ''))
+        
+        stats = upsert_supplier_products(self.supplier, feed)
+        self.assertEqual(stats['products_changed'], 1)
+        product.refresh_from_db()
+        self.assertEqual(product.quantity_available, 10)
+        self.assertEqual(product.content_hash, SupplierProduct.compute_content_hash(feed[0]))
+    
+    def test_normalizes_connector_inventory_mapping(self):
+        """Test that fetch_inventory() mappings become sku/quantity updates."""
+        updates = normalize_inventory_updates({
+            'INV-0': {'quantity': 7},
+            'INV-1': {'available_quantity': 2},
+            'INV-2': {'error': 'not found'}
+        })
+        
+        self.assertEqual(updates, [
+            {'sku': 'INV-0', 'quantity': 7},
+            {'sku': 'INV-1', 'quantity': 2}
+        ])
+
+
+class PagedConnector(SupplierConnectorBase):
+    """In-memory connector serving a fixed catalogue in pages."""
+    
+    def __init__(self, supplier, products, fail_on_page=None):
+        super().__init__(supplier)
+        self.products = products
+        self.fail_on_page = fail_on_page
+        self.requested_pages = []
+    
+    def validate_credentials(self):
+        return True, None
+    
+    def test_connection(self):
+        return True, None
+    
+    def fetch_products(self, **kwargs):
+        return list(self.products)
+    
+    def fetch_product_page(self, page, page_size, since=None):
+        self.requested_pages.append(page)
+        if page == self.fail_on_page:
+            raise ConnectionError('page unavailable')
+        start = (page - 1) * page_size
+        return self.products[start:start + page_size]
+    
+    def fetch_product_details(self, product_id):
+        return None
+    
+    def fetch_inventory(self, product_ids=None):
+        return {}
+    
+    def fetch_pricing(self, product_ids=None):
+        return {}
+
+
+class RawPagedConnector(PagedConnector):
+    """PagedConnector serving raw pages that are normalized separately."""
+    
+    separate_normalization = True
+    
+    def __init__(self, supplier, products):
+        super().__init__(supplier, products)
+        self.normalize_threads = set()
+    
+    def fetch_raw_product_page(self, page, page_size, since=None):
+        return self.fetch_product_page(page, page_size, since)
+    
+    def normalize_products(self, raw_products):
+        self.normalize_threads.add(threading.current_thread().name)
+        return [{'sku': product['id']} for product in raw_products]
+
+
+class ProductPageIteratorTest(TestCase):
+    """Test cases for paginated product fetching."""
+    
+    def setUp(self):
+        self.supplier = Supplier.objects.create(name='Paged Supplier', code='paged-supplier')
+        self.products = [{'sku': f'SKU-{i}'} for i in range(25)]
+    
+    def test_yields_all_pages_with_prefetch(self):
+        """Test that pages arrive in order and iteration stops at a short page."""
+        connector = PagedConnector(self.supplier, self.products)
+        
+        pages = list(connector.iter_product_pages(page_size=10, prefetch_pages=2))
+        
+        self.assertEqual([page.number for page in pages], [1, 2, 3])
+        self.assertEqual([len(page.products) for page in pages], [10, 10, 5])
+        self.assertEqual(connector.requested_pages, [1, 2, 3])
+    
+    def test_start_page_and_fetch_errors(self):
+        """Test resuming from a page and that fetch errors reach the caller."""
+        connector = PagedConnector(self.supplier, self.products, fail_on_page=3)
+        pages = connector.iter_product_pages(page_size=10, start_page=2)
+        
+        self.assertEqual(next(pages).number, 2)
+        with self.assertRaises(ConnectionError):
+            next(pages)
+    
+    def test_raw_pages_are_normalized_on_the_pool(self):
+        """Test that separately normalized pages keep order and are normalized off the fetch thread."""
+        connector = RawPagedConnector(self.supplier, [{'id': f'SKU-{i}'} for i in range(25)])
+        
+        pages = list(connector.iter_product_pages(page_size=10, prefetch_pages=2))
+        
+        self.assertEqual([page.number for page in pages], [1, 2, 3])
+        self.assertEqual(pages[2].products[-1], {'sku': 'SKU-24'})
+        self.assertTrue(all(name.startswith('supplier-normalize') for name in connector.normalize_threads))
+        
+        # Without prefetching, pages are normalized inline
+        connector.normalize_threads.clear()
+        pages = list(connector.iter_product_pages(page_size=10, prefetch_pages=0))
+        self.assertEqual(len(pages), 3)
+        self.assertEqual(connector.normalize_threads, {threading.current_thread().name})
+    
+    def test_default_page_uses_unpaginated_fetch(self):
+        """Test the base fallback for connectors without pagination."""
+        connector = PagedConnector(self.supplier, self.products)
+        # Call the base implementation directly, bypassing the override
+        self.assertEqual(len(SupplierConnectorBase.fetch_product_page(connector, 1, 10)), 25)
+        self.assertEqual(SupplierConnectorBase.fetch_product_page(connector, 2, 10), [])
+
+
+@override_settings(CONNECTOR_RESPONSE_CACHE_PATH='')
+class Alibaba1688BulkSyncTest(TestCase):
+    """Test cases for concurrent 1688 bulk product sync."""
+    
+    def setUp(self):
+        self.supplier = Supplier.objects.create(
+            name='1688 Supplier',
+            code='1688-supplier',
+            rate_limit_requests=1000,
+            rate_limit_window=1
+        )
+        self.connector = Alibaba1688Connector(self.supplier)
+        self.threads = set()
+    
+    def _fake_request(self, namespace, params=None):
+        self.threads.add(threading.current_thread().name)
+        product_id = params['productId']
+        if product_id == 'missing':
+            return {'success': False, 'errorMessage': 'not found'}
+        if namespace.endswith('product.get'):
+            return {'success': True, 'result': {
+                'productId': product_id, 'subject': f'Item {product_id}', 'weight': 1.5
+            }}
+        if namespace.endswith('price.get'):
+            return {'success': True, 'result': {'unitPrice': 12.5, 'currency': 'CNY'}}
+        return {'success': True, 'result': {'availableQuantity': 7}}
+    
+    @override_settings(RATE_LIMIT_REDIS_URL='')
+    def test_bulk_sync_fetches_concurrently_and_upserts(self):
+        """Test that API calls run on worker threads and results are bulk written."""
+        product_ids = [str(i) for i in range(10)] + ['missing']
+        
+        with mock.patch.object(self.connector, '_make_request', side_effect=self._fake_request):
+            results = self.connector.bulk_sync_products(product_ids, batch_size=20, max_workers=4)
+        
+        self.assertEqual(results['success_count'], 10)
+        self.assertEqual(results['error_count'], 1)
+        self.assertEqual(results['created'], 10)
+        self.assertTrue(all(name.startswith('1688-sync') for name in self.threads))
+        
+        product = SupplierProduct.objects.get(supplier=self.supplier, supplier_sku='3')
+        self.assertEqual(product.supplier_name, 'Item 3')
+        self.assertEqual(product.cost_price, Decimal('12.5'))
+        self.assertEqual(product.quantity_available, 7)
+        self.assertEqual(product.currency, 'CNY')
+        
+        # A repeated sync with identical data writes nothing
+        with mock.patch.object(self.connector, '_make_request', side_effect=self._fake_request):
+            results = self.connector.bulk_sync_products(product_ids[:10], batch_size=20)
+        self.assertEqual(results['unchanged'], 10)
+    
+    def test_search_page_writes_and_repeats_as_unchanged(self):
+        """Test that a 1688 search page is stored and an identical page writes nothing."""
+        raw_page = [
+            {'productId': index, 'subject': f'Item {index}', 'priceRange': {'startPrice': 3.5},
+             'company': {'name': 'Factory', 'creditLevel': 4}}
+            for index in range(1, 4)
+        ]
+        
+        with mock.patch.object(self.connector, '_search_raw_products', return_value=raw_page):
+            writer = SupplierProductWriter(self.supplier)
+            stats = writer.write(self.connector.fetch_product_page(1, 3))
+            self.assertEqual((stats['products_created'], stats['products_errors']), (3, 0))
+            self.assertEqual(writer.failed_chunks, 0)
+            
+            stats = SupplierProductWriter(self.supplier).write(self.connector.fetch_product_page(1, 3))
+        
+        self.assertEqual(stats['products_unchanged'], 3)
+        product = SupplierProduct.objects.get(supplier=self.supplier, supplier_sku='1')
+        self.assertEqual(product.cost_price, Decimal('3.5'))
+    
+    @override_settings(SUPPLIER_1688_RESPONSE_CACHE_TTLS={'alibaba.product.get': 60})
+    def test_product_details_are_served_from_response_cache(self):
+        """Test that repeat detail lookups do not call the API and failures are not cached."""
+        with tempfile.TemporaryDirectory() as cache_dir:
+            path = os.path.join(cache_dir, 'responses.sqlite3')
+            with override_settings(CONNECTOR_RESPONSE_CACHE_PATH=path), \
+                    mock.patch.object(self.connector, '_make_request', side_effect=self._fake_request) as request:
+                first = self.connector.get_product_details('5')
+                second = self.connector.get_product_details('5')
+                self.connector.get_product_details('missing')
+                self.connector.get_product_details('missing')
+                # Price lookups have no TTL configured here and always hit the API
+                self.connector.get_product_price('5')
+        
+        self.assertEqual(first['raw_data'], second['raw_data'])
+        self.assertEqual(second['name'], 'Item 5')
+        self.assertEqual(request.call_count, 4)
+
+
+@override_settings(SUPPLIER_SYNC_PREFETCH_PAGES=0)
+class ResumableSupplierSyncTest(TestCase):
+    """Test cases for cursor-based resumable supplier sync."""
+    
+    def setUp(self):
+        self.supplier = Supplier.objects.create(
+            name='Resumable Supplier',
+            code='resumable-supplier',
+            status='active'
+        )
+        self.products = [
+            {'sku': f'SKU-{i}', 'name': f'Product {i}', 'updated_at': f'2026-01-{i + 1:02d}T00:00:00Z'}
+            for i in range(25)
+        ]
+    
+    def _run(self, connector, **kwargs):
+        connector.default_page_size = 10
+        with mock.patch('suppliers.tasks.get_cached_connector', return_value=connector):
+            return sync_supplier_products.run(self.supplier.id, **kwargs)
+    
+    def test_interrupted_sync_resumes_and_advances_watermark_on_completion(self):
+        """Test that a failed run keeps its cursor and the watermark waits for the last page."""
+        failing = PagedConnector(self.supplier, self.products, fail_on_page=3)
+        with self.assertRaises(ConnectionError):
+            self._run(failing)
+        
+        state = SupplierSyncState.objects.get(supplier=self.supplier)
+        self.assertEqual(state.status, 'failed')
+        self.assertIn('Error syncing supplier', state.last_error)
+        self.assertEqual(state.cursor_page, 3)
+        self.assertEqual(state.products_created, 20)
+        self.assertIsNone(state.high_water_mark)
+        self.assertEqual(SupplierProduct.objects.filter(supplier=self.supplier).count(), 20)
+        
+        connector = PagedConnector(self.supplier, self.products)
+        result = self._run(connector)
+        
+        self.assertTrue(result['success'])
+        self.assertEqual(connector.requested_pages, [3])
+        self.assertEqual(result['products_created'], 25)
+        
+        state.refresh_from_db()
+        self.assertEqual(state.status, 'completed')
+        self.assertEqual(state.high_water_mark.isoformat(), '2026-01-25T00:00:00+00:00')
+        
+        # The next run fetches only what changed after the watermark
+        connector = PagedConnector(self.supplier, [])
+        with mock.patch.object(connector, 'fetch_product_page', return_value=[]) as fetch:
+            self._run(connector)
+        self.assertEqual(fetch.call_args.kwargs['since'], state.high_water_mark)
+    
+    @override_settings(SUPPLIER_SYNC_CHUNK_SIZE=5)
+    def test_failed_chunk_rolls_back_its_whole_page(self):
+        """Test that the page transaction is the commit boundary for its chunks."""
+        bulk_create = SupplierProductWriter._bulk_create
+        calls = []
+        
+        def fail_second_chunk(writer, products):
+            calls.append(len(products))
+            if len(calls) == 2:
+                raise DatabaseError('chunk failed')
+            return bulk_create(writer, products)
+        
+        with mock.patch.object(SupplierProductWriter, '_bulk_create', fail_second_chunk):
+            with self.assertRaises(RuntimeError):
+                self._run(PagedConnector(self.supplier, self.products))
+        
+        # The first chunk of the page was rolled back with the cursor
+        self.assertEqual(calls, [5, 5])
+        self.assertFalse(SupplierProduct.objects.filter(supplier=self.supplier).exists())
+        state = SupplierSyncState.objects.get(supplier=self.supplier)
+        self.assertEqual(state.status, 'failed')
+        self.assertEqual(state.cursor_page, 1)
+    
+    def test_force_full_sync_restarts_interrupted_run(self):
+        """Test that a forced full sync ignores the saved cursor and watermark."""
+        SupplierSyncState.objects.create(
+            supplier=self.supplier,
+            status='failed',
+            cursor_page=2,
+            high_water_mark=timezone.now()
+        )
+        connector = PagedConnector(self.supplier, self.products)
+        
+        result = self._run(connector, force_full_sync=True)
+        
+        self.assertEqual(connector.requested_pages, [1, 2, 3])
+        self.assertEqual(result['products_created'], 25)
+
+
+class SyncSchedulingTest(TestCase):
+    """Test cases for cost-based sharded sync scheduling."""
+    
+    def test_large_supplier_is_split_into_page_shards(self):
+        """Test that shards cover the estimated pages with an open-ended last shard."""
+        supplier = Supplier.objects.create(
+            name='Large Supplier', code='example', total_products=30000
+        )
+        
+        with override_settings(SUPPLIER_SYNC_SHARD_PAGES=50, SUPPLIER_SYNC_MAX_SHARDS=4):
+            units = plan_supplier_units(supplier, None)
+        
+        self.assertEqual(len(units), 4)
+        self.assertEqual([(u.start_page, u.end_page) for u in units],
+                         [(1, 75), (76, 150), (151, 225), (226, None)])
+        
+        # An interrupted run is resumed whole instead of sharded
+        state = SupplierSyncState(supplier=supplier, status='failed')
+        self.assertEqual(len(plan_supplier_units(supplier, state)), 1)
+    
+    def test_estimate_uses_last_run_duration(self):
+        """Test that completed runs drive the cost estimate."""
+        supplier = Supplier.objects.create(name='Timed Supplier', code='timed', total_products=50000)
+        started = timezone.now()
+        state = SupplierSyncState(
+            supplier=supplier,
+            status='completed',
+            pages_committed=4,
+            run_started_at=started,
+            run_completed_at=started + timedelta(seconds=20)
+        )
+        
+        self.assertEqual(estimate_sync_cost(supplier, state, 100), (4, 20.0))
+    
+    @override_settings(SUPPLIER_SYNC_CONNECTOR_CONCURRENCY={'default': 2, 'slow_api': 1})
+    def test_lanes_cap_concurrency_and_run_small_units_first(self):
+        """Test lane count per connector type and shortest-first ordering."""
+        units = [
+            SyncUnit(1, 'example_api', 500.0),
+            SyncUnit(2, 'example_api', 5.0),
+            SyncUnit(3, 'example_api', 10.0),
+            SyncUnit(4, 'example_api', 8.0),
+            SyncUnit(5, 'slow_api', 3.0),
+            SyncUnit(6, 'slow_api', 1.0),
+        ]
+        
+        lanes = build_lanes(units)
+        
+        self.assertEqual(len(lanes['example_api']), 2)
+        self.assertEqual(len(lanes['slow_api']), 1)
+        # The large supplier gets a lane to itself; small ones share the other
+        self.assertEqual([u.supplier_id for u in lanes['example_api'][0]], [1])
+        self.assertEqual([u.supplier_id for u in lanes['example_api'][1]], [2, 4, 3])
+        self.assertEqual([u.supplier_id for u in lanes['slow_api'][0]], [6, 5])
+
+
+@override_settings(SUPPLIER_SYNC_PREFETCH_PAGES=0)
+class SupplierShardSyncTest(TestCase):
+    """Test cases for sharded supplier sync completion."""
+    
+    def test_last_shard_completes_run(self):
+        """Test that the watermark only advances once every shard has finished."""
+        supplier = Supplier.objects.create(name='Sharded Supplier', code='sharded', status='active')
+        state = SupplierSyncState.objects.create(supplier=supplier)
+        state.start_run(shards=2)
+        products = [
+            {'sku': f'SKU-{i}', 'updated_at': f'2026-02-{i + 1:02d}T00:00:00Z'}
+            for i in range(25)
+        ]
+        connector = PagedConnector(supplier, products)
+        connector.default_page_size = 10
+        
+        with mock.patch('suppliers.tasks.get_cached_connector', return_value=connector):
+            first = sync_supplier_shard.run(supplier.id, 1, 1)
+            state.refresh_from_db()
+            self.assertFalse(first['run_completed'])
+            self.assertIsNone(state.high_water_mark)
+            
+            second = sync_supplier_shard.run(supplier.id, 2, None)
+        
+        self.assertTrue(second['run_completed'])
+        state.refresh_from_db()
+        self.assertEqual(state.status, 'completed')
+        self.assertEqual(state.pages_committed, 3)
+        self.assertEqual(state.products_created, 25)
+        self.assertEqual(state.high_water_mark.isoformat(), '2026-02-25T00:00:00+00:00')
+    
+    def _start_sharded_run(self, shards=2):
+        supplier = Supplier.objects.create(
+            name='Sharded Supplier', code='sharded', status='active', total_products=30000,
+            is_auto_sync_enabled=True,
+            last_sync_at=timezone.now() - timedelta(days=2)
+        )
+        state = SupplierSyncState.objects.create(supplier=supplier)
+        state.start_run(shards=shards)
+        return supplier, state
+    
+    def _run_shard(self, supplier, connector, *args, retries=0):
+        connector.default_page_size = 10
+        sync_supplier_shard.push_request(retries=retries)
+        try:
+            with mock.patch('suppliers.tasks.get_cached_connector', return_value=connector):
+                return sync_supplier_shard.run(supplier.id, *args)
+        finally:
+            sync_supplier_shard.pop_request()
+    
+    def test_retried_shard_is_counted_once(self):
+        """Test that recording the same page range twice does not double count it."""
+        supplier, state = self._start_sharded_run()
+        products = [{'sku': f'SKU-{i}'} for i in range(10)]
+        
+        self._run_shard(supplier, PagedConnector(supplier, products), 1, 1)
+        self._run_shard(supplier, PagedConnector(supplier, products), 1, 1)
+        
+        state.refresh_from_db()
+        self.assertEqual(state.status, 'running')
+        self.assertEqual(state.shards_completed, 1)
+        self.assertEqual(state.pages_committed, 1)
+        self.assertEqual(state.products_created, 10)
+    
+    def test_shard_fails_run_only_when_out_of_retries(self):
+        """Test the heartbeat of a retrying shard and the failure of its last attempt."""
+        supplier, state = self._start_sharded_run()
+        SupplierSyncState.objects.filter(pk=state.pk).update(
+            updated_at=timezone.now() - timedelta(days=1)
+        )
+        products = [{'sku': f'SKU-{i}'} for i in range(25)]
+        
+        with self.assertRaises(ConnectionError):
+            self._run_shard(supplier, PagedConnector(supplier, products, fail_on_page=2), 1, None)
+        
+        # The committed first page refreshed the heartbeat
+        state.refresh_from_db()
+        self.assertEqual(state.status, 'running')
+        self.assertTrue(is_sync_in_progress(state))
+        
+        with self.assertRaises(ConnectionError):
+            self._run_shard(supplier, PagedConnector(supplier, products, fail_on_page=2), 1, None,
+                            retries=sync_supplier_shard.max_retries)
+        
+        state.refresh_from_db()
+        self.assertEqual(state.status, 'failed')
+        self.assertIn('Error syncing shard', state.last_error)
+        self.assertFalse(state.is_resumable)
+        
+        # Shards still running for the failed run are not recorded
+        self._run_shard(supplier, PagedConnector(supplier, products), 3, None)
+        state.refresh_from_db()
+        self.assertEqual(state.shards_completed, 0)
+    
+    def test_manual_sync_does_not_take_over_live_sharded_run(self):
+        """Test that a whole-supplier sync refuses a sharded run that is still running."""
+        supplier, state = self._start_sharded_run()
+        connector = PagedConnector(supplier, [{'sku': 'SKU-1'}])
+        
+        with mock.patch('suppliers.tasks.get_cached_connector', return_value=connector):
+            result = sync_supplier_products.run(supplier.id)
+        
+        self.assertFalse(result['success'])
+        self.assertEqual(connector.requested_pages, [])
+        state.refresh_from_db()
+        self.assertEqual(state.shards_total, 2)
+    
+    @override_settings(SUPPLIER_SYNC_SHARD_PAGES=50, SUPPLIER_SYNC_MAX_SHARDS=4)
+    def test_stale_sharded_run_is_rescheduled_as_shards(self):
+        """Test that a sharded run whose shards died is restarted sharded, not resumed whole."""
+        supplier, state = self._start_sharded_run(shards=4)
+        SupplierSyncState.objects.filter(pk=state.pk).update(
+            updated_at=timezone.now() - timedelta(days=1)
+        )
+        
+        with mock.patch('suppliers.tasks.run_sync_lane.delay') as delay:
+            result = sync_all_suppliers.run()
+        
+        self.assertEqual(result['sync_tasks'][0]['shards'], 4)
+        units = [unit for call in delay.call_args_list for unit in call.args[0]]
+        self.assertEqual(len(units), 4)
+        self.assertTrue(all(unit['start_page'] is not None for unit in units))
+        
+        restarted = SupplierSyncState.objects.get(pk=state.pk)
+        self.assertGreater(restarted.run_started_at, state.run_started_at)
+        self.assertEqual(restarted.shards_total, 4)
+        self.assertEqual(restarted.shards_completed, 0)
+
+
+@override_settings(SUPPLIER_SYNC_PREFETCH_PAGES=0)
+class ReplayConnectorTest(TestCase):
+    """Test cases for recording connector pages and replaying them."""
+    
+    def setUp(self):
+        register_connector('replay', ReplayConnector)
+        self.supplier = Supplier.objects.create(
+            name='Replay Supplier',
+            code='replay-supplier',
+            status='active',
+            connection_settings={
+                'connector_type': 'replay',
+                'synthetic_products': 25,
+                'page_size': 10
+            }
+        )
+    
+    def tearDown(self):
+        close_cached_connectors()
+    
+    def test_synthetic_catalogue_syncs_and_filters_by_since(self):
+        """Test a full replayed sync and that incremental pages start after `since`."""
+        result = sync_supplier_products.run(self.supplier.id)
+        
+        self.assertTrue(result['success'])
+        self.assertEqual(result['products_created'], 25)
+        self.assertEqual(result['pages_fetched'], 3)
+        
+        connector = create_connector(self.supplier)
+        since = datetime.fromisoformat(connector.fetch_product_details('SYN-0000019')['updated_at'])
+        products = connector.fetch_products(since=since)
+        self.assertEqual([p['sku'] for p in products], [f'SYN-{i:07d}' for i in range(20, 25)])
+    
+    def test_recorded_pages_replay_and_errors_are_injected(self):
+        """Test that recorded pages can be served back, with configurable failures."""
+        with tempfile.TemporaryDirectory() as record_dir:
+            path = os.path.join(record_dir, 'recording.jsonl')
+            recorder = create_connector(self.supplier)
+            recorder.start_recording(path)
+            recorded = [product for page in recorder.iter_product_pages() for product in page.products]
+            
+            self.supplier.connection_settings = {'replay_file': path, 'page_size': 7}
+            replay = ReplayConnector(self.supplier)
+            self.assertEqual(replay.catalog_size(), 25)
+            self.assertEqual(replay.fetch_products(), recorded)
+            self.assertEqual(len(list(replay.iter_product_pages())), 4)
+        
+        self.supplier.connection_settings = {'synthetic_products': 25, 'error_rate': 1}
+        with self.assertRaises(ConnectionError):
+            ReplayConnector(self.supplier).fetch_product_page(1, 10)
+
+
+class CompiledSpecTest(TestCase):
+    """Test cases for compiled field-extraction specs."""
+    
+    def test_extracts_paths_defaults_and_conversions(self):
+        """Test nested paths, defaults for missing intermediates, constants and converters."""
+        extract = compile_spec({
+            'sku': ('id', '', str),
+            'price': {'amount': ('price.start', 0), 'currency': Const('CNY')},
+            'seller': 'company.name',
+            'images': ('images', []),
+            'raw': raw_product
+        })
+        
+        product = {'id': 7, 'price': {'start': 9.5}, 'company': {'name': 'Seller'}}
+        self.assertEqual(extract(product), {
+            'sku': '7',
+            'price': {'amount': 9.5, 'currency': 'CNY'},
+            'seller': 'Seller',
+            'images': [],
+            'raw': product
+        })
+        
+        first = extract({'price': None, 'company': 'not-a-dict'})
+        self.assertEqual(first['price']['amount'], 0)
+        self.assertIsNone(first['seller'])
+        # Default containers are not shared between products
+        self.assertIsNot(first['images'], extract({})['images'])
+    
+    def test_1688_spec_matches_payload_layout(self):
+        """Test the 1688 detail spec against a search-style payload."""
+        details = extract_product_details({
+            'productId': 55,
+            'subject': 'Cable',
+            'productSpec': [{'name': 'length', 'value': '1m'}],
+            'company': {'name': 'Factory', 'creditLevel': 4}
+        })
+        
+        self.assertEqual(details['supplier_product_id'], '55')
+        self.assertEqual(details['specifications'], [{'name': 'length', 'value': '1m'}])
+        self.assertEqual(details['supplier_info']['company_name'], 'Factory')
+        self.assertEqual(details['supplier_info']['rating'], 4)
+        self.assertEqual(details['supplier_info']['address'], '')
+        self.assertEqual(details['packaging_info']['dimensions'], {})
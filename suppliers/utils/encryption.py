@@ -1,22 +1,41 @@
 """
 Encryption utilities for storing sensitive supplier API credentials.
 Uses Django's built-in encryption capabilities with Fernet symmetric encryption.
+The Fernet cipher is built once per process and decrypted credentials are
+cached briefly by ciphertext hash, so repeated connector creation does not
+repeat the decryption.
 """
 import base64
+import copy
+import hashlib
 import json
+import threading
+from functools import lru_cache
 from typing import Any, Dict, Optional
 
+from cachetools import TTLCache
 from cryptography.fernet import Fernet
 from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured
 
 
+@lru_cache(maxsize=4)
+def _build_cipher_suite(encryption_key: bytes) -> Fernet:
+    """Build the Fernet cipher for a key once per process."""
+    return Fernet(encryption_key)
+
+
 class CredentialEncryption:
     """Handles encryption and decryption of supplier API credentials."""
     
     def __init__(self):
         """Initialize the encryption handler with the encryption key."""
         self._cipher_suite = self._get_cipher_suite()
+        self._cache = TTLCache(
+            maxsize=getattr(settings, 'CREDENTIAL_CACHE_MAX_ENTRIES', 256),
+            ttl=getattr(settings, 'CREDENTIAL_CACHE_TTL_SECONDS', 300)
+        )
+        self._cache_lock = threading.Lock()
     
     def _get_cipher_suite(self) -> Fernet:
         """Get or create the Fernet cipher suite for encryption."""
@@ -32,8 +51,11 @@ class CredentialEncryption:
                 secret_key_bytes = secret_key_bytes.ljust(32, b'0')
             encryption_key = base64.urlsafe_b64encode(secret_key_bytes)
         
+        if isinstance(encryption_key, str):
+            encryption_key = encryption_key.encode()
+        
         try:
-            return Fernet(encryption_key)
+            return _build_cipher_suite(encryption_key)
         except Exception as e:
             raise ImproperlyConfigured(
                 f"Invalid SUPPLIER_ENCRYPTION_KEY. Please ensure it's a valid Fernet key: {str(e)}"
@@ -65,6 +87,9 @@ class CredentialEncryption:
         """
         Decrypt an encrypted credentials string.
         
+        Results are cached for CREDENTIAL_CACHE_TTL_SECONDS by ciphertext
+        hash. Each call returns its own copy, so callers may modify it.
+        
         Args:
             encrypted_data: Encrypted string containing credentials
             
@@ -74,6 +99,12 @@ class CredentialEncryption:
         if not encrypted_data:
             return None
         
+        cache_key = self._cache_key(encrypted_data)
+        with self._cache_lock:
+            cached = self._cache.get(cache_key)
+        if cached is not None:
+            return copy.deepcopy(cached)
+        
         try:
             # Decode from base64
             encrypted_bytes = base64.urlsafe_b64decode(encrypted_data.encode())
@@ -82,11 +113,37 @@ class CredentialEncryption:
             decrypted_bytes = self._cipher_suite.decrypt(encrypted_bytes)
             
             # Parse JSON
-            return json.loads(decrypted_bytes.decode())
+            credentials = json.loads(decrypted_bytes.decode())
         except Exception as e:
             # Log the error in production, return None for now
             print(f"Failed to decrypt credentials: {str(e)}")
             return None
+        
+        with self._cache_lock:
+            self._cache[cache_key] = credentials
+        return copy.deepcopy(credentials)
+    
+    def invalidate(self, encrypted_data: str) -> None:
+        """
+        Drop cached credentials for a ciphertext.
+        
+        Args:
+            encrypted_data: Encrypted string whose cached credentials to drop
+        """
+        if not encrypted_data:
+            return
+        with self._cache_lock:
+            self._cache.pop(self._cache_key(encrypted_data), None)
+    
+    def clear_cache(self) -> None:
+        """Drop all cached credentials."""
+        with self._cache_lock:
+            self._cache.clear()
+    
+    @staticmethod
+    def _cache_key(encrypted_data: str) -> str:
+        """Key cache entries by a digest of the ciphertext."""
+        return hashlib.sha256(encrypted_data.encode()).hexdigest()
 
 
 # Create a singleton instance